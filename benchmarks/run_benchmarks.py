@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""Бенчмарки горячих путей разбора текста на синтетических данных.
+
+    python3 benchmarks/run_benchmarks.py                 # сравнить с baseline.json
+    python3 benchmarks/run_benchmarks.py --update        # записать новый baseline
+    python3 benchmarks/run_benchmarks.py --scale 0.1     # уменьшенные входные данные
+    python3 benchmarks/run_benchmarks.py --only progress_borg
+
+Время каждого замера — медиана нескольких повторов. Перед замерами выполняется калибровочный
+цикл на чистом Python: baseline масштабируется по его времени, поэтому записанные значения
+переносимы между машинами. Код выхода 1 — хотя бы один замер медленнее baseline больше порога.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from core.borg import _translate_borg_line, archive_dir_sizes, build_archive_tree  # noqa: E402
+from core.packages import _parse_apt_simulate_output  # noqa: E402
+from core.progress import PROGRESS_BORG, PROGRESS_RSYNC, get_progress_parser  # noqa: E402
+from core.search_index import SearchIndex  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 3
+MIN_TOTAL_S = 2.0
+MAX_ROUNDS = 100
+SEED = 20260319
+
+# Полные размеры входных данных (умножаются на --scale).
+APT_PACKAGES = 5_000
+PROGRESS_LINES = 1_000_000
+ARCHIVE_ENTRIES = 2_000_000
+SEARCH_ITEMS = 10_000
+SEARCH_QUERIES = 300
+BORG_LOG_LINES = 200_000
+
+_WORDS = (
+    "firefox", "thunderbird", "gimp", "inkscape", "krita", "blender", "obs", "studio", "steam",
+    "telegram", "desktop", "vlc", "player", "libreoffice", "writer", "calc", "kernel", "image",
+    "nvidia", "driver", "mesa", "vulkan", "gnome", "shell", "extension", "flatpak", "runtime",
+    "python3", "module", "devel", "utils", "common", "data", "fonts", "ttf", "noto", "sans",
+    "браузер", "почта", "графика", "редактор", "видео", "звук", "игры", "офис", "терминал",
+    "обновление", "резервная", "копия", "снимок", "драйвер", "шрифты", "настройка", "система",
+)
+
+
+@dataclass
+class _Item:
+    title: str
+    subtitle: str
+    keywords: tuple[str, ...]
+
+
+@dataclass
+class Bench:
+    name: str
+    description: str
+    setup: Callable[[float, random.Random], object]
+    run: Callable[[object], object]
+
+
+def _n(full: int, scale: float) -> int:
+    return max(1, int(full * scale))
+
+
+def _pkg_name(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}{i}"
+
+
+# ── apt-get -s dist-upgrade ───────────────────────────────────────────────────────────────────
+
+def _setup_apt(scale: float, rng: random.Random) -> list[str]:
+    total = _n(APT_PACKAGES, scale)
+    upgraded = [_pkg_name(rng, i) for i in range(total * 7 // 10)]
+    new = [_pkg_name(rng, i) for i in range(total * 2 // 10)]
+    removed = [_pkg_name(rng, i) for i in range(total - len(upgraded) - len(new))]
+    lines = ["Reading Package Lists... Done", "Building Dependency Tree... Done"]
+
+    def _section(header: str, names: list[str]) -> None:
+        lines.append(header)
+        for i in range(0, len(names), 6):
+            lines.append("  " + " ".join(f"{p}#{rng.randint(1, 9)}.{rng.randint(0, 30)}-alt1"
+                                         for p in names[i:i + 6]))
+
+    _section("The following packages will be REMOVED:", removed)
+    _section("The following packages will be upgraded", upgraded)
+    _section("The following NEW packages will be installed:", new)
+    lines.append(f"{len(upgraded)} upgraded, {len(new)} newly installed, {len(removed)} removed "
+                 "and 0 not upgraded.")
+    lines.append("Need to get 3412MB of archives.")
+    lines.append("After unpacking 1024MB of additional disk space will be used.")
+    for p in removed:
+        lines.append(f"Remv {p} [1.0-alt1]")
+    for p in upgraded:
+        lines.append(f"Inst {p} [1.0-alt1] (1.1-alt1 p11/branch [x86_64])")
+    for p in new:
+        lines.append(f"Inst {p} (1.0-alt1 p11/branch [noarch])")
+    for p in upgraded + new:
+        lines.append(f"Conf {p} (1.1-alt1 p11/branch)")
+    lines.append("W: Some packages are from an untrusted source")
+    return lines
+
+
+def _run_apt(lines: list[str]):
+    return _parse_apt_simulate_output(lines, "apt", [], False)
+
+
+# ── Прогресс borg / rsync ─────────────────────────────────────────────────────────────────────
+
+def _setup_progress_borg(scale: float, rng: random.Random) -> list[str]:
+    lines = []
+    for i in range(_n(PROGRESS_LINES, scale)):
+        if i % 50 == 0:
+            lines.append(f"{rng.uniform(0, 99):.1f}% Extracting: home/user/{rng.choice(_WORDS)}/f{i}.dat")
+        elif i % 97 == 0:
+            lines.append("Remote: Warning: Permanently added 'host' to the list of known hosts.")
+        else:
+            lines.append(
+                f"{i / 1000:.2f} GB O {i / 1700:.2f} GB C {i / 1900:.2f} GB D {i} N "
+                f"home/user/{rng.choice(_WORDS)}/{rng.choice(_WORDS)}/file{i}.dat"
+            )
+    return lines
+
+
+def _setup_progress_rsync(scale: float, rng: random.Random) -> list[str]:
+    lines = []
+    for i in range(_n(PROGRESS_LINES, scale)):
+        if i % 40 == 0:
+            lines.append(f"home/user/{rng.choice(_WORDS)}/file{i}.dat")
+        else:
+            lines.append(
+                f"  {i * 1234:,}  {i * 100 // _n(PROGRESS_LINES, scale)}%  "
+                f"{rng.uniform(1, 500):.2f}MB/s    0:{i % 60:02d}:{i % 60:02d} (xfr#{i}, to-chk={i}/99999)"
+            )
+    return lines
+
+
+def _run_parser(fmt: str) -> Callable[[list[str]], int]:
+    parser = get_progress_parser(fmt)
+
+    def _run(lines: list[str]) -> int:
+        hits = 0
+        for line in lines:
+            if parser(line) is not None:
+                hits += 1
+        return hits
+
+    return _run
+
+
+# ── Дерево архива borg ────────────────────────────────────────────────────────────────────────
+
+def _setup_archive(scale: float, rng: random.Random) -> list[dict]:
+    total = _n(ARCHIVE_ENTRIES, scale)
+    items: list[dict] = []
+    dirs_per_level = (8, 12, 10, 6)
+    while len(items) < total:
+        a = rng.randrange(dirs_per_level[0])
+        b = rng.randrange(dirs_per_level[1])
+        c = rng.randrange(dirs_per_level[2])
+        d = rng.randrange(dirs_per_level[3])
+        base = f"home/user/{_WORDS[a]}/{_WORDS[b + 8]}/{_WORDS[c + 20]}/d{d}"
+        if len(items) % 25 == 0:
+            items.append({"path": base, "type": "d", "size": 0})
+        else:
+            items.append({"path": f"{base}/file{len(items)}.dat", "type": "-",
+                          "size": rng.randrange(1, 10_000_000)})
+    return items
+
+
+def _run_build_tree(items: list[dict]):
+    return build_archive_tree(items)
+
+
+def _run_dir_sizes(items: list[dict]):
+    return archive_dir_sizes(items)
+
+
+# ── Глобальный поиск ──────────────────────────────────────────────────────────────────────────
+
+def _setup_search(scale: float, rng: random.Random) -> tuple[list[_Item], list[str]]:
+    items = [
+        _Item(
+            title=f"{rng.choice(_WORDS).capitalize()} {rng.choice(_WORDS)} {i}",
+            subtitle=" ".join(rng.choice(_WORDS) for _ in range(6)),
+            keywords=tuple(rng.choice(_WORDS) for _ in range(3)),
+        )
+        for i in range(_n(SEARCH_ITEMS, scale))
+    ]
+    queries = []
+    for i in range(SEARCH_QUERIES):
+        word = rng.choice(_WORDS)
+        kind = i % 4
+        if kind == 0:
+            queries.append(word[:3])
+        elif kind == 1:
+            queries.append(f"{word} {rng.choice(_WORDS)[:2]}")
+        elif kind == 2 and len(word) > 4:
+            queries.append(word[:2] + word[3] + word[2] + word[4:])
+        else:
+            queries.append(word)
+    return items, queries
+
+
+def _run_search_build(data):
+    items, _queries = data
+    return SearchIndex(items)
+
+
+def _run_search_queries(data):
+    items, queries = data
+    index = SearchIndex(items)
+    start = time.perf_counter()
+    for q in queries:
+        index.search(q)
+    return time.perf_counter() - start
+
+
+# ── Перевод вывода borg ───────────────────────────────────────────────────────────────────────
+
+def _setup_translate(scale: float, rng: random.Random) -> list[str]:
+    sample = [
+        "Repository: /mnt/backup/borg",
+        "Enter passphrase for key /home/user/.config/borg/keys/repo:",
+        "Warning: Attempting to access a previously unknown unencrypted repository!",
+        "Do you want to continue? [yN] yes (from BORG_UNKNOWN_UNENCRYPTED_REPO_ACCESS_IS_OK)",
+        "1. Export the borg key and store the result at a safe place:",
+    ]
+    lines = []
+    for i in range(_n(BORG_LOG_LINES, scale)):
+        if i % 10 == 0:
+            lines.append(rng.choice(sample))
+        else:
+            lines.append(f"home/user/{rng.choice(_WORDS)}/{rng.choice(_WORDS)}/file{i}.dat")
+    return lines
+
+
+def _run_translate(lines: list[str]):
+    for line in lines:
+        _translate_borg_line(line)
+
+
+BENCHMARKS: tuple[Bench, ...] = (
+    Bench("apt_simulate", f"_parse_apt_simulate_output, {APT_PACKAGES} пакетов", _setup_apt, _run_apt),
+    Bench("progress_borg", f"парсер прогресса borg, {PROGRESS_LINES} строк",
+          _setup_progress_borg, _run_parser(PROGRESS_BORG)),
+    Bench("progress_rsync", f"парсер прогресса rsync, {PROGRESS_LINES} строк",
+          _setup_progress_rsync, _run_parser(PROGRESS_RSYNC)),
+    Bench("archive_tree", f"build_archive_tree, {ARCHIVE_ENTRIES} записей", _setup_archive, _run_build_tree),
+    Bench("archive_dir_sizes", f"archive_dir_sizes, {ARCHIVE_ENTRIES} записей", _setup_archive, _run_dir_sizes),
+    Bench("search_build", f"SearchIndex (filter_items), {SEARCH_ITEMS} пунктов", _setup_search, _run_search_build),
+    Bench("search_queries", f"filter_items, {SEARCH_ITEMS} пунктов × {SEARCH_QUERIES} запросов",
+          _setup_search, _run_search_queries),
+    Bench("borg_translate", f"_translate_borg_line, {BORG_LOG_LINES} строк", _setup_translate, _run_translate),
+)
+
+
+def _calibrate() -> float:
+    """Время фиксированной нагрузки на чистом Python — мера скорости машины."""
+    times = []
+    for _ in range(9):
+        start = time.perf_counter()
+        acc: dict[str, int] = {}
+        for i in range(300_000):
+            key = f"k{i % 1000}"
+            acc[key] = acc.get(key, 0) + len(key.split("k"))
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _measure(bench: Bench, scale: float, repeat: int) -> float:
+    data = bench.setup(scale, random.Random(SEED))
+    times = []
+    spent = 0.0
+    # Короткие замеры повторяются дольше: не меньше repeat раз и не меньше MIN_TOTAL_S в сумме.
+    while len(times) < repeat or (spent < MIN_TOTAL_S and len(times) < MAX_ROUNDS):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = bench.run(data)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        spent += elapsed
+        # Замер может вернуть собственное время, если подготовка входит в вызов (search_queries).
+        times.append(result if isinstance(result, float) else elapsed)
+    del data
+    gc.collect()
+    return statistics.median(times)
+
+
+def _load_baseline() -> dict:
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _scale_key(scale: float) -> str:
+    return f"{scale:g}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--update", action="store_true", help="записать результаты как baseline")
+    ap.add_argument("--scale", type=float, default=1.0, help="множитель размера входных данных")
+    ap.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="число повторов замера")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="допустимое замедление относительно baseline (0.25 = 25%%)")
+    ap.add_argument("--only", action="append", default=[], help="запустить только указанный замер")
+    args = ap.parse_args(argv)
+
+    benches = [b for b in BENCHMARKS if not args.only or b.name in args.only]
+    if not benches:
+        print(f"Нет замеров: {', '.join(args.only)}", file=sys.stderr)
+        return 2
+
+    calib = _calibrate()
+    baseline = _load_baseline()
+    entry = baseline.get("scales", {}).get(_scale_key(args.scale), {})
+    recorded = entry.get("results", {})
+    base_calib = entry.get("calibration_s")
+    factor = calib / base_calib if base_calib else 1.0
+    print(f"Калибровка: {calib * 1000:.1f} мс (коэффициент к baseline {factor:.2f}), "
+          f"масштаб данных {args.scale:g}")
+
+    results: dict[str, float] = {}
+    regressions = []
+    for bench in benches:
+        elapsed = _measure(bench, args.scale, args.repeat)
+        results[bench.name] = elapsed
+        line = f"  {bench.name:<18} {elapsed * 1000:>10.1f} мс   {bench.description}"
+        if bench.name in recorded and not args.update:
+            expected = recorded[bench.name] * factor
+            delta = elapsed / expected - 1.0
+            line += f"   {delta:+.0%}"
+            if delta > args.threshold:
+                line += "   ✘ регрессия"
+                regressions.append(bench.name)
+        print(line, flush=True)
+
+    if args.update:
+        # Прежние результаты этого масштаба (при --only) приводятся к текущей калибровке.
+        kept = {name: t * factor for name, t in recorded.items()}
+        scales = baseline.get("scales", {})
+        scales[_scale_key(args.scale)] = {
+            "calibration_s": calib,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": time.strftime("%Y-%m-%d"),
+            "results": {**kept, **results},
+        }
+        baseline = {"scales": scales}
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline записан: {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print(f"✘ Замедление больше {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
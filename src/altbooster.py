@@ -35,6 +35,7 @@ def main() -> int:
             "  -m    Открыть вкладку «Обслуживание»\n"
             "  -h    Показать эту справку\n"
             "  --debug  Режим отладки\n"
+            "  --offline  Не обращаться к сети\n"
         )
         return 0
 
@@ -45,6 +46,10 @@ def main() -> int:
             initial_tab = tab
             break
 
+    offline = "--offline" in sys.argv
+    if offline:
+        sys.argv.remove("--offline")
+
     debug = "--debug" in sys.argv
     if debug:
         sys.argv.remove("--debug")
@@ -67,6 +72,15 @@ def main() -> int:
     from core import config
 
     config.init_runtime(debug=debug, initial_tab=initial_tab)
+    if offline:
+        from core import net
+
+        net.set_offline(True)
+    if debug:
+        from core import spawn, watchdog
+
+        spawn.install()
+        watchdog.start()
 
     from ui import PlafonWindow
 
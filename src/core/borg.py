@@ -3,17 +3,15 @@ from __future__ import annotations
 import datetime
 import json
 import os
-import shutil
 import subprocess
 import threading
 from pathlib import Path
 from urllib.parse import unquote, urlparse
 
-import gi
-gi.require_version("GLib", "2.0")
-from gi.repository import GLib
-
 from core import config
+from core.catalog import get_catalog
+from core import pathindex
+from core.watchdog import begin_job, idle_add
 
 
 OPTIONAL_EXCLUDES = [
@@ -239,15 +237,15 @@ DEFAULT_EXCLUDES = [
 
 
 def _borg_exe() -> str:
-    return shutil.which("borg") or shutil.which("borgbackup") or "borg"
+    return pathindex.which("borg") or pathindex.which("borgbackup") or "borg"
 
 
 def is_borg_installed() -> bool:
-    return shutil.which("borg") is not None or shutil.which("borgbackup") is not None
+    return pathindex.which("borg") is not None or pathindex.which("borgbackup") is not None
 
 
 def borg_version() -> str | None:
-    exe = shutil.which("borg") or shutil.which("borgbackup")
+    exe = pathindex.which("borg") or pathindex.which("borgbackup")
     if not exe:
         return None
     try:
@@ -310,6 +308,7 @@ def borg_repo_info(repo_path: str) -> dict | None:
 
 def _run_borg_async(cmd: list, on_line, on_done, cwd: str | None = None, env: dict | None = None) -> None:
     def _worker():
+        begin_job(f"borg {cmd[1] if len(cmd) > 1 else ''}".strip())
         ok = False
         try:
             proc = subprocess.Popen(
@@ -319,12 +318,12 @@ def _run_borg_async(cmd: list, on_line, on_done, cwd: str | None = None, env: di
                 cwd=cwd, env=env,
             )
             for line in proc.stdout:
-                GLib.idle_add(on_line, line)
+                idle_add(on_line, line)
             proc.wait()
             ok = proc.returncode in (0, 1)
         except Exception as e:
-            GLib.idle_add(on_line, f"✘ Ошибка: {e}\n")
-        GLib.idle_add(on_done, ok)
+            idle_add(on_line, f"✘ Ошибка: {e}\n")
+        idle_add(on_done, ok)
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -481,6 +480,54 @@ def borg_list_archive(repo_path: str, archive_name: str) -> list[dict]:
     return []
 
 
+def archive_dir_sizes(items: list[dict]) -> dict:
+    """Суммарный размер файлов по каталогам архива (borg list --json-lines); "" — корень."""
+    sizes = {}
+    for item in items:
+        if item.get("type", "-") != "-":
+            continue
+        path = item.get("path", "").rstrip("/")
+        size = item.get("size") or 0
+        parts = path.split("/")
+        for i in range(len(parts)):
+            key = "/".join(parts[:i])
+            sizes[key] = sizes.get(key, 0) + size
+    return sizes
+
+
+def build_archive_tree(items: list[dict]) -> dict:
+    """Дерево архива: путь каталога → {"dirs": [пути подкаталогов], "files": [записи]}."""
+    children = {}
+
+    def _ensure_chain(path):
+        if path in children:
+            return
+        children[path] = {"dirs": [], "files": []}
+        if path:
+            parent = "/".join(path.split("/")[:-1])
+            _ensure_chain(parent)
+            if path not in children[parent]["dirs"]:
+                children[parent]["dirs"].append(path)
+
+    for item in items:
+        path = item.get("path", "").rstrip("/")
+        if not path:
+            continue
+        itype = item.get("type", "-")
+        parent = "/".join(path.split("/")[:-1])
+        if itype == "d":
+            _ensure_chain(path)
+        else:
+            _ensure_chain(parent)
+            children[parent]["files"].append(item)
+
+    for v in children.values():
+        v["dirs"].sort()
+        v["files"].sort(key=lambda x: x.get("path", ""))
+
+    return children
+
+
 def archive_stats_dedup_bytes(stats: dict | None) -> int | None:
     """Байты, уникальные для архива в репозитории (borg stats / JSON)."""
     if not stats:
@@ -526,11 +573,11 @@ def borg_archive_info(repo_path: str, archive_name: str, on_done) -> None:
             if data is not None and r.returncode in (0, 1):
                 archives = data.get("archives", [])
                 if archives:
-                    GLib.idle_add(on_done, archives[0].get("stats"))
+                    idle_add(on_done, archives[0].get("stats"))
                     return
         except Exception:
             pass
-        GLib.idle_add(on_done, None)
+        idle_add(on_done, None)
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -585,12 +632,12 @@ def borg_export_tar(repo_path: str, target_dir: str, on_line, on_done) -> None:
                 capture_output=True, text=True, encoding="utf-8",
             )
             if r.stderr:
-                GLib.idle_add(on_line, r.stderr)
-            GLib.idle_add(on_line, f"   → {tar_path}\n")
-            GLib.idle_add(on_done, r.returncode == 0)
+                idle_add(on_line, r.stderr)
+            idle_add(on_line, f"   → {tar_path}\n")
+            idle_add(on_done, r.returncode == 0)
         except Exception as e:
-            GLib.idle_add(on_line, f"   ✘ {e}\n")
-            GLib.idle_add(on_done, False)
+            idle_add(on_line, f"   ✘ {e}\n")
+            idle_add(on_done, False)
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -726,35 +773,7 @@ def find_gvfs_google_drive() -> str | None:
 
 
 def flatpak_apps_from_booster_list() -> list[tuple[str, str]]:
-    paths_to_try = [
-        Path.home() / ".config" / "altbooster" / "apps.json",
-        Path(__file__).resolve().parent.parent / "modules" / "apps.json",
-    ]
-    for path in paths_to_try:
-        if not path.exists():
-            continue
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        result = []
-        seen = set()
-        for group in data.get("groups", []):
-            for item in group.get("items", []):
-                sources = item.get("sources", [])
-                single = item.get("source")
-                if single:
-                    sources = [single] + sources
-                for src in sources:
-                    check = src.get("check", [])
-                    if len(check) >= 2 and check[0] == "flatpak":
-                        app_id = check[1]
-                        if app_id not in seen:
-                            seen.add(app_id)
-                            result.append((item.get("label", app_id), app_id))
-                        break
-        return result
-    return []
+    return list(get_catalog().flatpak_apps)
 
 
 def generate_flatpak_meta(target_dir: Path, source_mode: int | None = 0) -> bool:
@@ -833,12 +852,12 @@ def generate_system_meta(target_dir: Path, include_packages: bool = True) -> boo
 def restore_packages_meta(meta_dir: Path, on_line, on_done, only_missing: bool = False) -> None:
     pkg_file = meta_dir / "packages.txt"
     if not pkg_file.exists():
-        GLib.idle_add(on_done, False)
+        idle_add(on_done, False)
         return
     packages = pkg_file.read_text(encoding="utf-8").splitlines()
     packages = [p.strip() for p in packages if p.strip()]
     if not packages:
-        GLib.idle_add(on_done, True)
+        idle_add(on_done, True)
         return
 
     if only_missing:
@@ -851,28 +870,28 @@ def restore_packages_meta(meta_dir: Path, on_line, on_done, only_missing: bool =
                 installed = {p.strip() for p in r.stdout.splitlines() if p.strip()}
                 total = len(packages)
                 packages = [p for p in packages if p not in installed]
-                GLib.idle_add(
+                idle_add(
                     on_line,
                     f"▶  Системные пакеты: всего {total}, отсутствуют {len(packages)}\n",
                 )
             else:
-                GLib.idle_add(
+                idle_add(
                     on_line,
                     "⚠  Не удалось получить список установленных пакетов. Будет обычная установка.\n",
                 )
         except Exception:
-            GLib.idle_add(
+            idle_add(
                 on_line,
                 "⚠  Ошибка проверки установленных пакетов. Будет обычная установка.\n",
             )
 
     if not packages:
-        GLib.idle_add(on_line, "✔  Все пакеты из резервной копии уже установлены.\n")
-        GLib.idle_add(on_done, True)
+        idle_add(on_line, "✔  Все пакеты из резервной копии уже установлены.\n")
+        idle_add(on_done, True)
         return
 
     from core import privileges
-    GLib.idle_add(
+    idle_add(
         on_line,
         "▶  Установка отсутствующих RPM-пакетов...\n" if only_missing else "▶  Переустановка RPM-пакетов...\n",
     )
@@ -884,7 +903,7 @@ def restore_flatpak_meta(meta_dir: Path, on_line, on_done) -> None:
         ok = True
         remotes_file = meta_dir / "flatpak-remotes.txt"
         if remotes_file.exists():
-            GLib.idle_add(on_line, "▶  Восстановление репозиториев Flatpak...\n")
+            idle_add(on_line, "▶  Восстановление репозиториев Flatpak...\n")
             for line in remotes_file.read_text(encoding="utf-8").splitlines():
                 parts = line.split()
                 if len(parts) < 2:
@@ -896,10 +915,10 @@ def restore_flatpak_meta(meta_dir: Path, on_line, on_done) -> None:
                     ["flatpak", "remote-add", "--user", "--if-not-exists", name, url],
                     capture_output=True, text=True, encoding="utf-8", timeout=30,
                 )
-                GLib.idle_add(on_line, f"   {'✔' if r.returncode == 0 else '⚠'} {name}\n")
+                idle_add(on_line, f"   {'✔' if r.returncode == 0 else '⚠'} {name}\n")
         apps_file = meta_dir / "flatpak-apps.txt"
         if apps_file.exists():
-            GLib.idle_add(on_line, "▶  Переустановка Flatpak-приложений...\n")
+            idle_add(on_line, "▶  Переустановка Flatpak-приложений...\n")
             for app_id in apps_file.read_text(encoding="utf-8").splitlines():
                 app_id = app_id.strip()
                 if not app_id:
@@ -908,8 +927,8 @@ def restore_flatpak_meta(meta_dir: Path, on_line, on_done) -> None:
                     ["flatpak", "install", "-y", "--user", app_id],
                     capture_output=True, text=True, encoding="utf-8", timeout=300,
                 )
-                GLib.idle_add(on_line, f"   {'✔' if r.returncode == 0 else '⚠'} {app_id}\n")
-        GLib.idle_add(on_done, ok)
+                idle_add(on_line, f"   {'✔' if r.returncode == 0 else '⚠'} {app_id}\n")
+        idle_add(on_done, ok)
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -9,10 +9,9 @@ from datetime import datetime
 from pathlib import Path
 
 
-from gi.repository import GLib
-
 from core import config
 from core import privileges
+from core.watchdog import idle_add
 
 
 def _real_home() -> Path:
@@ -78,8 +77,8 @@ def _validate_mount_point(mp: str) -> bool:
 def btrfs_snapshot_create(on_line, on_done) -> None:
     mount_point = get_btrfs_mount_for_home()
     if not mount_point or not _validate_mount_point(mount_point):
-        GLib.idle_add(on_line, "✘ $HOME не находится на Btrfs.\n")
-        GLib.idle_add(on_done, False)
+        idle_add(on_line, "✘ $HOME не находится на Btrfs.\n")
+        idle_add(on_done, False)
         return
 
     snapshots_dir = get_snapshots_dir()
@@ -99,7 +98,7 @@ def btrfs_snapshot_list(on_done) -> None:
     snapshots_dir = get_snapshots_dir()
 
     if not mount_point:
-        GLib.idle_add(on_done, [])
+        idle_add(on_done, [])
         return
 
     output_lines: list[str] = []
@@ -109,7 +108,7 @@ def btrfs_snapshot_list(on_done) -> None:
 
     def _on_list_done(success: bool) -> None:
         if not success:
-            GLib.idle_add(on_done, [])
+            idle_add(on_done, [])
             return
 
         snapshots = []
@@ -151,7 +150,7 @@ def btrfs_snapshot_list(on_done) -> None:
             })
 
         snapshots.sort(key=lambda x: x["name"], reverse=True)
-        GLib.idle_add(on_done, snapshots)
+        idle_add(on_done, snapshots)
 
     privileges.run_privileged(["btrfs", "subvolume", "list", "-s", mount_point], _on_line, _on_list_done)
 
@@ -165,8 +164,8 @@ def btrfs_snapshot_restore(snapshot_path: str, target_dir: str, on_line, on_done
         try:
             Path(target_dir).mkdir(parents=True, exist_ok=True)
         except Exception as e:
-            GLib.idle_add(on_line, f"✘ Ошибка подготовки: {e}\n")
-            GLib.idle_add(on_done, False)
+            idle_add(on_line, f"✘ Ошибка подготовки: {e}\n")
+            idle_add(on_done, False)
             return
 
         import getpass
@@ -206,7 +205,7 @@ def btrfs_snapshot_size(snapshot_path: str, on_done) -> None:
                 if len(parts) >= 2:
                     size = _parse_btrfs_size(parts[1])
                     break
-        GLib.idle_add(on_done, size)
+        idle_add(on_done, size)
 
     privileges.run_privileged(
         ["btrfs", "filesystem", "du", "--summarize", snapshot_path],
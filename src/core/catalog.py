@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core import config
+
+MODULES_DIR = Path(__file__).resolve().parent.parent / "modules"
+USER_APPS_JSON = config.CONFIG_DIR / "apps.json"
+SYSTEM_APPS_JSON = MODULES_DIR / "apps.json"
+
+# Минимальная схема: поле → допустимые типы. Обязательные поля перечислены отдельно.
+_ROW_FIELDS = {"id": str, "type": str, "title": str, "subtitle": str, "icon": str,
+               "requires": str, "check": (dict, list, type(None)), "action": dict}
+_ROW_REQUIRED = ("id", "title")
+_TASK_FIELDS = {"id": str, "label": str, "desc": str, "icon": str, "cmd": list}
+_TASK_REQUIRED = ("id", "label")
+_APP_FIELDS = {"id": str, "label": str, "desc": str, "source": dict, "sources": list}
+_APP_REQUIRED = ("id", "label")
+
+
+@dataclass(frozen=True)
+class CompiledModule:
+    """Разобранный modules/<name>.json с таблицами поиска. Общий для всех потребителей — не изменять."""
+
+    name: str
+    data: dict
+    groups: tuple[dict, ...] = ()
+    rows_by_id: dict[str, dict] = field(default_factory=dict)
+    tasks_by_id: dict[str, dict] = field(default_factory=dict)
+    requires: frozenset[str] = frozenset()
+    errors: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class CompiledCatalog:
+    """Разобранный apps.json (пользовательский или системный) с таблицами поиска."""
+
+    path: Path | None
+    data: dict
+    groups: tuple[dict, ...] = ()
+    groups_by_id: dict[str, dict] = field(default_factory=dict)
+    apps_by_id: dict[str, dict] = field(default_factory=dict)
+    apps_by_flatpak_id: dict[str, dict] = field(default_factory=dict)
+    # (название, app_id) в порядке каталога — по одному на приложение с источником Flatpak
+    flatpak_apps: tuple[tuple[str, str], ...] = ()
+    errors: tuple[str, ...] = ()
+
+
+_modules: dict[str, tuple[int, CompiledModule]] = {}
+_catalog: tuple[tuple, CompiledCatalog] | None = None
+_lock = threading.Lock()
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _check_fields(obj, where: str, fields: dict, required: tuple[str, ...], errors: list[str]) -> bool:
+    if not isinstance(obj, dict):
+        errors.append(f"{where}: ожидался объект")
+        return False
+    for key in required:
+        if not obj.get(key):
+            errors.append(f"{where}: нет поля «{key}»")
+    for key, types in fields.items():
+        if key in obj and not isinstance(obj[key], types):
+            errors.append(f"{where}.{key}: неверный тип")
+    return True
+
+
+def _dict_list(data: dict, key: str, where: str, errors: list[str]) -> list[dict]:
+    value = data.get(key, [])
+    if not isinstance(value, list):
+        errors.append(f"{where}.{key}: ожидался список")
+        return []
+    return value
+
+
+def compile_module(name: str, data: dict) -> CompiledModule:
+    errors: list[str] = []
+    if not isinstance(data, dict):
+        return CompiledModule(name, {}, errors=("корень: ожидался объект",))
+    groups: list[dict] = []
+    rows_by_id: dict[str, dict] = {}
+    tasks_by_id: dict[str, dict] = {}
+    requires: set[str] = set()
+
+    for gi, group in enumerate(_dict_list(data, "groups", name, errors)):
+        where = f"{name}.groups[{gi}]"
+        if not isinstance(group, dict):
+            errors.append(f"{where}: ожидался объект")
+            continue
+        groups.append(group)
+        if isinstance(group.get("requires"), str):
+            requires.add(group["requires"])
+        for ri, row in enumerate(_dict_list(group, "rows", where, errors)):
+            if not _check_fields(row, f"{where}.rows[{ri}]", _ROW_FIELDS, _ROW_REQUIRED, errors):
+                continue
+            if isinstance(row.get("requires"), str):
+                requires.add(row["requires"])
+            rid = row.get("id")
+            if rid:
+                if str(rid) in rows_by_id:
+                    errors.append(f"{where}.rows[{ri}]: повтор id «{rid}»")
+                rows_by_id.setdefault(str(rid), row)
+
+    for ti, task in enumerate(_dict_list(data, "tasks", name, errors)):
+        if not _check_fields(task, f"{name}.tasks[{ti}]", _TASK_FIELDS, _TASK_REQUIRED, errors):
+            continue
+        if task.get("id"):
+            tasks_by_id.setdefault(str(task["id"]), task)
+
+    return CompiledModule(
+        name=name,
+        data=data,
+        groups=tuple(groups),
+        rows_by_id=rows_by_id,
+        tasks_by_id=tasks_by_id,
+        requires=frozenset(requires),
+        errors=tuple(errors),
+    )
+
+
+def _app_sources(app: dict) -> list[dict]:
+    sources = app.get("sources", [])
+    sources = [s for s in sources if isinstance(s, dict)] if isinstance(sources, list) else []
+    single = app.get("source")
+    if isinstance(single, dict):
+        sources = [single] + sources
+    return sources
+
+
+def compile_catalog(path: Path | None, data: dict) -> CompiledCatalog:
+    errors: list[str] = []
+    if not isinstance(data, dict):
+        return CompiledCatalog(path, {}, errors=("корень: ожидался объект",))
+    groups: list[dict] = []
+    groups_by_id: dict[str, dict] = {}
+    apps_by_id: dict[str, dict] = {}
+    apps_by_flatpak_id: dict[str, dict] = {}
+    flatpak_apps: list[tuple[str, str]] = []
+
+    for gi, group in enumerate(_dict_list(data, "groups", "apps", errors)):
+        where = f"apps.groups[{gi}]"
+        if not isinstance(group, dict):
+            errors.append(f"{where}: ожидался объект")
+            continue
+        groups.append(group)
+        if group.get("id"):
+            groups_by_id.setdefault(str(group["id"]), group)
+        for ai, app in enumerate(_dict_list(group, "items", where, errors)):
+            if not _check_fields(app, f"{where}.items[{ai}]", _APP_FIELDS, _APP_REQUIRED, errors):
+                continue
+            if app.get("id"):
+                apps_by_id.setdefault(str(app["id"]), app)
+            for src in _app_sources(app):
+                check = src.get("check", [])
+                if isinstance(check, list) and len(check) >= 2 and check[0] == "flatpak":
+                    app_id = check[1]
+                    if app_id not in apps_by_flatpak_id:
+                        apps_by_flatpak_id[app_id] = app
+                        flatpak_apps.append((app.get("label", app_id), app_id))
+                    break
+
+    return CompiledCatalog(
+        path=path,
+        data=data,
+        groups=tuple(groups),
+        groups_by_id=groups_by_id,
+        apps_by_id=apps_by_id,
+        apps_by_flatpak_id=apps_by_flatpak_id,
+        flatpak_apps=tuple(flatpak_apps),
+        errors=tuple(errors),
+    )
+
+
+def _report_errors(what: str, errors: tuple[str, ...]) -> None:
+    if not errors:
+        return
+    print(f"[ALT Booster] {what}: {len(errors)} ошибок схемы")
+    if config.DEBUG:
+        for err in errors:
+            print(f"   {err}")
+
+
+def get_module(name: str) -> CompiledModule:
+    """modules/<name>.json: читается один раз и перечитывается только при смене mtime."""
+    path = MODULES_DIR / f"{name}.json"
+    mtime = _mtime_ns(path)
+    with _lock:
+        cached = _modules.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[ALT Booster] Не удалось загрузить модуль '{name}': {e}")
+        data = {}
+    compiled = compile_module(name, data)
+    _report_errors(f"Модуль '{name}'", compiled.errors)
+    with _lock:
+        _modules[name] = (mtime, compiled)
+    return compiled
+
+
+def _read_catalog() -> CompiledCatalog:
+    for path in (USER_APPS_JSON, SYSTEM_APPS_JSON):
+        if not path.exists():
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not isinstance(data, dict):
+            continue
+        compiled = compile_catalog(path, data)
+        _report_errors(os.fspath(path), compiled.errors)
+        return compiled
+    return CompiledCatalog(None, {})
+
+
+def get_catalog() -> CompiledCatalog:
+    """Каталог приложений: пользовательский apps.json, иначе системный; кэш по mtime обоих файлов."""
+    global _catalog
+    key = (_mtime_ns(USER_APPS_JSON), _mtime_ns(SYSTEM_APPS_JSON))
+    with _lock:
+        if _catalog is not None and _catalog[0] == key:
+            return _catalog[1]
+    compiled = _read_catalog()
+    with _lock:
+        _catalog = (key, compiled)
+    return compiled
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-import shutil
 import subprocess
 import threading
 from pathlib import Path
@@ -9,6 +8,7 @@ from pathlib import Path
 from .privileges import run_privileged_sync
 from .gsettings import gsettings_get
 from core import config
+from core import pathindex
 
 
 _desktop_files_cache: list[Path] | None = None
@@ -83,11 +83,11 @@ def _eval_check_pair(kind: str, value) -> bool:
         if kind == "rpm":
             if subprocess.run(["rpm", "-q", value], capture_output=True, timeout=10).returncode == 0:
                 return True
-            return shutil.which(value) is not None
+            return pathindex.which(value) is not None
         if kind == "path":
             return os.path.exists(os.path.expanduser(value))
         if kind == "which":
-            return shutil.which(value) is not None
+            return pathindex.which(value) is not None
         if kind == "desktop_keyword":
             return _desktop_keyword_installed(str(value))
     except (subprocess.TimeoutExpired, OSError, TypeError):
@@ -96,7 +96,7 @@ def _eval_check_pair(kind: str, value) -> bool:
 
 
 def is_sudo_enabled() -> bool:
-    control = shutil.which("control") or "/usr/sbin/control"
+    control = pathindex.which("control") or "/usr/sbin/control"
     lines: list[str] = []
     run_privileged_sync([control, "sudowheel"], lambda line: lines.append(line))
     out = "".join(lines).lower()
@@ -160,6 +160,79 @@ def _get_flatpak_installed() -> set[str]:
     return ids
 
 
+def _flatpak_installation_dirs() -> list[Path]:
+    return [Path("/var/lib/flatpak"), Path.home() / ".local/share/flatpak"]
+
+
+def flatpak_inventory_generation() -> str:
+    """Поколение набора установленных Flatpak: flatpak обновляет .changed и каталог app/ при каждой транзакции."""
+    parts: list[str] = []
+    for base in _flatpak_installation_dirs():
+        for p in (base / ".changed", base / "app"):
+            try:
+                parts.append(str(p.stat().st_mtime_ns))
+            except OSError:
+                parts.append("0")
+    return ":".join(parts)
+
+
+_RPM_DB_DIR = Path("/var/lib/rpm")
+
+_rpm_list_cache: tuple[str, frozenset[str]] | None = None
+_rpm_list_lock = threading.Lock()
+
+
+def rpm_inventory_generation() -> str:
+    """Поколение базы rpm: любая транзакция переписывает файлы в /var/lib/rpm."""
+    parts: list[str] = []
+    try:
+        with os.scandir(_RPM_DB_DIR) as it:
+            for entry in it:
+                try:
+                    parts.append(f"{entry.name}:{entry.stat().st_mtime_ns}")
+                except OSError:
+                    continue
+    except OSError:
+        return ""
+    return ";".join(sorted(parts))
+
+
+def _get_rpm_installed() -> frozenset[str]:
+    """Имена всех установленных пакетов одним вызовом rpm -qa; перечитываются после смены базы rpm."""
+    global _rpm_list_cache
+    generation = rpm_inventory_generation()
+    with _rpm_list_lock:
+        if _rpm_list_cache is not None and generation and _rpm_list_cache[0] == generation:
+            return _rpm_list_cache[1]
+    try:
+        res = subprocess.run(
+            ["rpm", "-qa", "--queryformat", "%{NAME}\\n"],
+            capture_output=True, text=True, timeout=30,
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        res = None
+    if res is None or res.returncode != 0:
+        # Сбой не кэшируем: иначе до следующей транзакции rpm всё выглядело бы неустановленным.
+        with _rpm_list_lock:
+            return _rpm_list_cache[1] if _rpm_list_cache is not None else frozenset()
+    names = frozenset(line.strip() for line in res.stdout.splitlines() if line.strip())
+    with _rpm_list_lock:
+        _rpm_list_cache = (generation, names)
+    return names
+
+
+def installed_flags(items: list[tuple[str, str]]) -> list[bool]:
+    """Установлены ли пакеты [(install_type, install_id), ...] — по одной выборке rpm и flatpak на весь набор."""
+    need_flatpak = any(kind == "flatpak" for kind, _ in items)
+    need_rpm = any(kind != "flatpak" for kind, _ in items)
+    flatpaks = _get_flatpak_installed() if need_flatpak else set()
+    rpms = _get_rpm_installed() if need_rpm else frozenset()
+    return [
+        (install_id in flatpaks) if kind == "flatpak" else (install_id in rpms)
+        for kind, install_id in items
+    ]
+
+
 def invalidate_flatpak_cache() -> None:
     global _flatpak_list_cache
     with _flatpak_list_lock:
@@ -167,9 +240,10 @@ def invalidate_flatpak_cache() -> None:
 
 
 def invalidate_app_detection_caches() -> None:
-    """Сброс кэшей .desktop и списка Flatpak (например после возврата в окно)."""
+    """Сброс кэшей .desktop, списка Flatpak и индекса PATH (например после возврата в окно)."""
     invalidate_desktop_files_cache()
     invalidate_flatpak_cache()
+    pathindex.invalidate()
 
 
 def check_app_installed(source: dict) -> bool:
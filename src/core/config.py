@@ -1,15 +1,17 @@
-import json
-import os
+import sqlite3
 import subprocess
 import threading
+import time
 import traceback
-import urllib.request
 from pathlib import Path
 
+from core.state_store import StateStore, namespace_of
+
 
 CONFIG_DIR  = Path.home() / ".config" / "altbooster"
 CONFIG_FILE = CONFIG_DIR / "window.json"
 STATE_FILE  = CONFIG_DIR / "state.json"
+STATE_DB    = CONFIG_DIR / "state.db"
 SYSTEMD_USER_DIR = Path.home() / ".config" / "systemd" / "user"
 
 VERSION = "5.6.9"
@@ -18,8 +20,11 @@ DEBUG: bool = False
 INITIAL_TAB: str = ""
 
 _STATE_SAVE_DEBOUNCE_S = 0.45
-_state_save_timer: threading.Timer | None = None
-_state_save_timer_lock = threading.Lock()
+# При непрерывных изменениях запись всё равно происходит не реже раза в _STATE_SAVE_MAX_DELAY_S.
+_STATE_SAVE_MAX_DELAY_S = 3.0
+# После неудачной записи следующая попытка — не раньше чем через паузу, растущую до максимума.
+_STATE_RETRY_BASE_S = 1.0
+_STATE_RETRY_MAX_S = 60.0
 
 
 def init_runtime(*, debug: bool = False, initial_tab: str = "") -> None:
@@ -42,62 +47,99 @@ APT_LOCK_FILES = [
     "/var/lib/apt/lists/lock",
 ]
 
+_MISSING = object()
 _state: dict = {}
+_state_dirty: set[str] = set()
 _state_lock = threading.Lock()
+_state_changed = threading.Condition(_state_lock)
+_state_last_change = 0.0
+_state_first_change = 0.0
+_state_retry_at = 0.0
+_state_write_failures = 0
+_state_writer: threading.Thread | None = None
+# Держится на всё время записи: flush_pending_state дожидается записи, уже начатой фоновым потоком.
+_state_write_lock = threading.Lock()
+_state_store = StateStore(STATE_DB)
 
 
 def load_state() -> None:
     global _state
     try:
-        with open(STATE_FILE) as f:
-            data = json.load(f)
-        with _state_lock:
-            _state = data
-    except (OSError, json.JSONDecodeError):
-        with _state_lock:
-            _state = {}
-
-
-def save_state() -> None:
+        _state_store.migrate_from_json(STATE_FILE)
+        data = _state_store.load()
+    except (sqlite3.Error, OSError) as e:
+        print(f"[ALT Booster] Не удалось открыть {STATE_DB}: {e}")
+        data = {}
     with _state_lock:
-        data = dict(_state)
-    try:
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        os.chmod(STATE_FILE, 0o600)
-    except OSError:
-        pass
-
+        _state = data
+        _state_dirty.clear()
 
-def _cancel_debounced_state_save() -> None:
-    global _state_save_timer
-    with _state_save_timer_lock:
-        if _state_save_timer is not None:
-            _state_save_timer.cancel()
-            _state_save_timer = None
 
-
-def _debounced_state_save_fire() -> None:
-    global _state_save_timer
-    with _state_save_timer_lock:
-        _state_save_timer = None
-    save_state()
+def save_state() -> None:
+    """Записать изменённые ключи одной транзакцией."""
+    global _state_first_change, _state_retry_at, _state_write_failures
+    with _state_write_lock:
+        with _state_lock:
+            if not _state_dirty:
+                return
+            changes = {k: _state[k] for k in _state_dirty if k in _state}
+            _state_dirty.clear()
+            _state_first_change = 0.0
+        try:
+            _state_store.write(changes)
+        except (sqlite3.Error, OSError):
+            with _state_lock:
+                # Ключи, изменённые во время записи, уже в _state_dirty с новыми значениями.
+                _state_dirty.update(changes)
+                now = time.monotonic()
+                _state_first_change = now
+                _state_retry_at = now + min(
+                    _STATE_RETRY_MAX_S, _STATE_RETRY_BASE_S * 2 ** _state_write_failures,
+                )
+                _state_write_failures += 1
+            if DEBUG:
+                traceback.print_exc()
+        else:
+            with _state_lock:
+                _state_retry_at = 0.0
+                _state_write_failures = 0
+
+
+def _state_writer_loop() -> None:
+    while True:
+        with _state_changed:
+            while not _state_dirty:
+                _state_changed.wait()
+            while _state_dirty:
+                now = time.monotonic()
+                deadline = max(
+                    min(
+                        _state_last_change + _STATE_SAVE_DEBOUNCE_S,
+                        _state_first_change + _STATE_SAVE_MAX_DELAY_S,
+                    ),
+                    _state_retry_at,
+                )
+                if now >= deadline:
+                    break
+                _state_changed.wait(deadline - now)
+        save_state()
 
 
 def _schedule_state_save() -> None:
-    global _state_save_timer
-    with _state_save_timer_lock:
-        if _state_save_timer is not None:
-            _state_save_timer.cancel()
-        _state_save_timer = threading.Timer(_STATE_SAVE_DEBOUNCE_S, _debounced_state_save_fire)
-        _state_save_timer.daemon = True
-        _state_save_timer.start()
+    """Вызывать под _state_lock: отметить изменение и разбудить поток записи."""
+    global _state_last_change, _state_first_change, _state_writer
+    now = time.monotonic()
+    if _state_first_change == 0.0:
+        _state_first_change = now
+    _state_last_change = now
+    if _state_writer is None:
+        _state_writer = threading.Thread(target=_state_writer_loop, name="state-writer", daemon=True)
+        _state_writer.start()
+    _state_changed.notify()
 
 
 def flush_pending_state() -> None:
-    """Сбросить отложенную запись state.json на диск (перед выходом из приложения)."""
-    _cancel_debounced_state_save()
+    """Сбросить отложенные изменения состояния на диск (перед выходом из приложения)."""
     save_state()
 
 
@@ -108,20 +150,38 @@ def state_get(key: str, default=None):
 
 def state_set(key: str, value) -> None:
     with _state_lock:
+        old = _state.get(key, _MISSING)
+        # Равное, но другое значение писать незачем; тот же объект мог быть изменён на месте.
+        if old is not value and old == value:
+            return
         _state[key] = value
-    _schedule_state_save()
+        _state_dirty.add(key)
+        _schedule_state_save()
 
 
-def reset_state() -> None:
-    _cancel_debounced_state_save()
-    with _state_lock:
-        _state.clear()
-    save_state()
+def reset_state(namespace: str | None = None) -> None:
+    """Очистить всё состояние или только пространство имён одной вкладки (см. core.state_store)."""
+    with _state_write_lock:
+        with _state_lock:
+            if namespace is None:
+                _state.clear()
+                _state_dirty.clear()
+            else:
+                for key in [k for k in _state if namespace_of(k) == namespace]:
+                    del _state[key]
+                    _state_dirty.discard(key)
+        try:
+            _state_store.clear(namespace)
+        except sqlite3.Error:
+            if DEBUG:
+                traceback.print_exc()
 
 
-def get_state_copy() -> dict:
+def get_state_copy(namespace: str | None = None) -> dict:
     with _state_lock:
-        return dict(_state)
+        if namespace is None:
+            return dict(_state)
+        return {k: v for k, v in _state.items() if namespace_of(k) == namespace}
 
 
 def get_dv_cache() -> str:
@@ -148,10 +208,9 @@ _GITHUB_API = "https://api.github.com/repos/plafonlinux/altbooster"
 
 
 def _fetch_github(path: str) -> object:
-    url = f"{_GITHUB_API}/{path}"
-    req = urllib.request.Request(url, headers={"User-Agent": "ALTBooster"})
-    with urllib.request.urlopen(req, timeout=5) as response:
-        return json.loads(response.read().decode())
+    from core import net
+
+    return net.get_json(f"{_GITHUB_API}/{path}", timeout=5)
 
 
 def check_update(on_result):
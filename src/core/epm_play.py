@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+from core import config, memprofile
+from core.checks import rpm_inventory_generation
+
+EPM_PLAY_CACHE = config.CONFIG_DIR / "epm_play.json"
+
+# Список epm play зашит в пакет eepm и меняется только с его обновлением;
+# TTL страхует от случаев, когда версия eepm не определилась.
+_TTL_S = 24 * 3600
+_CACHE_FORMAT = 1
+_LIST_TIMEOUT_S = 30
+
+
+@dataclass(frozen=True)
+class PlayApp:
+    name: str
+    desc: str
+    haystack: str
+
+
+@dataclass(frozen=True)
+class PlayCatalog:
+    """Разобранный вывод `epm play`: строки для поиска приведены к нижнему регистру заранее."""
+
+    apps: tuple[PlayApp, ...]
+    eepm_version: str
+    fetched_at: float
+
+    def search(self, query: str) -> list[PlayApp]:
+        q = query.strip().lower()
+        if not q:
+            return []
+        return [app for app in self.apps if q in app.haystack]
+
+
+_catalog: PlayCatalog | None = None
+_lock = threading.Lock()
+_fetch_lock = threading.Lock()
+# Версия eepm перечитывается через rpm только после транзакции в базе rpm.
+_probe: tuple[str, str] | None = None
+
+
+def _make_catalog(pairs, eepm_version: str, fetched_at: float) -> PlayCatalog:
+    apps = tuple(
+        PlayApp(name, desc, f"{name}\n{desc}".lower()) for name, desc in pairs if name
+    )
+    return PlayCatalog(apps, eepm_version, fetched_at)
+
+
+def parse_listing(output: str) -> list[tuple[str, str]]:
+    """Строки вида «name - описание» из вывода `epm play`."""
+    apps: list[tuple[str, str]] = []
+    for line in output.splitlines():
+        line = line.strip()
+        if not line or " - " not in line:
+            continue
+        name, _, desc = line.partition(" - ")
+        name = name.strip()
+        if name:
+            apps.append((name, desc.strip()))
+    return apps
+
+
+def eepm_version() -> str:
+    """Версия-релиз установленного eepm; "" — пакет не найден."""
+    global _probe
+    generation = rpm_inventory_generation()
+    probe = _probe
+    if probe is not None and probe[0] == generation:
+        return probe[1]
+    try:
+        r = subprocess.run(
+            ["rpm", "-q", "--qf", "%{VERSION}-%{RELEASE}", "eepm"],
+            capture_output=True, text=True, timeout=10,
+        )
+        version = r.stdout.strip() if r.returncode == 0 else ""
+    except (OSError, subprocess.SubprocessError):
+        version = ""
+    _probe = (generation, version)
+    return version
+
+
+def _load_disk() -> PlayCatalog | None:
+    try:
+        data = json.loads(EPM_PLAY_CACHE.read_text(encoding="utf-8"))
+        if data.get("format") != _CACHE_FORMAT:
+            return None
+        return _make_catalog(
+            (tuple(pair) for pair in data.get("apps", [])),
+            str(data.get("eepm_version", "")),
+            float(data.get("fetched_at", 0)),
+        )
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _save_disk(catalog: PlayCatalog) -> None:
+    data = {
+        "format": _CACHE_FORMAT,
+        "eepm_version": catalog.eepm_version,
+        "fetched_at": catalog.fetched_at,
+        "apps": [[app.name, app.desc] for app in catalog.apps],
+    }
+    tmp = EPM_PLAY_CACHE.with_suffix(".tmp")
+    try:
+        EPM_PLAY_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, EPM_PLAY_CACHE)
+    except OSError as e:
+        print(f"[ALT Booster] Не удалось сохранить список epm play: {e}")
+
+
+def _fetch(version: str) -> PlayCatalog | None:
+    started = time.monotonic()
+    try:
+        r = subprocess.run(
+            ["epm", "play"], capture_output=True, text=True, timeout=_LIST_TIMEOUT_S,
+        )
+    except FileNotFoundError:
+        # eepm не установлен — запоминаем пустой список, чтобы не пробовать при каждом поиске.
+        return _make_catalog((), version, time.time())
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[ALT Booster] Не удалось получить список epm play: {e}")
+        return None
+    pairs = parse_listing(r.stdout)
+    if not pairs and r.returncode != 0:
+        return None
+    if config.DEBUG:
+        print(f"[ALT Booster] epm play: {len(pairs)} приложений "
+              f"за {time.monotonic() - started:.1f} с")
+    return _make_catalog(pairs, version, time.time())
+
+
+def _is_fresh(catalog: PlayCatalog, version: str) -> bool:
+    return catalog.eepm_version == version and time.time() - catalog.fetched_at < _TTL_S
+
+
+def cached() -> PlayCatalog | None:
+    """Каталог из памяти или с диска без проверки свежести; процессов не запускает."""
+    global _catalog
+    with _lock:
+        if _catalog is not None:
+            return _catalog
+    loaded = _load_disk()
+    if loaded is not None:
+        with _lock:
+            if _catalog is None:
+                _catalog = loaded
+    return loaded
+
+
+def catalog(force: bool = False) -> PlayCatalog:
+    """Каталог epm play; `epm play` запускается, только если кэш устарел или сменилась версия eepm."""
+    global _catalog
+    current = None if force else cached()
+    version = eepm_version()
+    if current is not None and _is_fresh(current, version):
+        return current
+    with _fetch_lock:
+        # Пока ждали блокировку, каталог мог обновить другой поток.
+        with _lock:
+            current = _catalog
+        if current is not None and not force and _is_fresh(current, version):
+            return current
+        fetched = _fetch(version)
+        if fetched is None:
+            return current or _make_catalog((), "", 0.0)
+        _save_disk(fetched)
+        with _lock:
+            _catalog = fetched
+        return fetched
+
+
+def refresh_in_background() -> None:
+    threading.Thread(target=catalog, daemon=True).start()
+
+
+def generation() -> int:
+    """Отпечаток для индекса глобального поиска: mtime файла кэша."""
+    try:
+        return EPM_PLAY_CACHE.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def search(query: str) -> list[dict]:
+    """Поиск по каталогу; словари в формате результатов поиска пакетов."""
+    return [
+        {
+            "display_name": app.name,
+            "install_id": app.name,
+            "summary": app.desc,
+            "version": "",
+            "install_type": "epm_play",
+            "branch": "epm_play",
+        }
+        for app in catalog().search(query)
+    ]
+
+
+def _memory_size() -> tuple[int, int | None]:
+    with _lock:
+        current = _catalog
+    if current is None:
+        return 0, 0
+    return len(current.apps), memprofile.approx_sizeof(
+        [(app.name, app.desc, app.haystack) for app in current.apps]
+    )
+
+
+memprofile.register_cache("Каталог epm play", _memory_size)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import subprocess
 from typing import Sequence
 
+from core import resources
+
 
 def run_gsettings(args: Sequence[str]) -> bool:
     try:
@@ -10,6 +12,8 @@ def run_gsettings(args: Sequence[str]) -> bool:
             ["gsettings", *args],
             capture_output=True, text=True, timeout=5,
         )
+        if result.returncode == 0:
+            resources.notify_changed(frozenset({resources.SETTINGS}))
         return result.returncode == 0
     except (subprocess.TimeoutExpired, OSError):
         return False
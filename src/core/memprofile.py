@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from core import config
+
+_TRACE_FRAMES = 25
+_TOP_LIMIT = 30
+_SIZEOF_MAX_OBJECTS = 500_000
+
+# Имя кэша → функция, возвращающая (число записей, примерный размер в байтах или None).
+CacheSizer = Callable[[], tuple[int, int | None]]
+_caches: dict[str, CacheSizer] = {}
+_lock = threading.Lock()
+_baseline: tracemalloc.Snapshot | None = None
+_started_at = 0.0
+
+
+def register_cache(name: str, sizer: CacheSizer) -> None:
+    with _lock:
+        _caches[name] = sizer
+
+
+def approx_sizeof(obj, max_objects: int = _SIZEOF_MAX_OBJECTS) -> int:
+    """Примерный размер контейнера вместе с содержимым (обход ограничен max_objects объектами)."""
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < max_objects:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, "__dict__") and not isinstance(o, type):
+            stack.append(vars(o))
+    return total
+
+
+def _fmt_bytes(n: int | None) -> str:
+    if n is None:
+        return "—"
+    for unit in ("Б", "КБ", "МБ"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} ГБ"
+
+
+def cache_report() -> list[str]:
+    with _lock:
+        sizers = list(_caches.items())
+    lines: list[str] = []
+    for name, sizer in sizers:
+        try:
+            entries, size = sizer()
+        except Exception as e:
+            lines.append(f"{name}: ошибка ({e})")
+            continue
+        lines.append(f"{name}: записей {entries}, ~{_fmt_bytes(size)}")
+    return lines
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def start() -> None:
+    global _baseline, _started_at
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(_TRACE_FRAMES)
+    _baseline = _take_snapshot()
+    _started_at = time.monotonic()
+
+
+def stop_and_dump(directory: Path | None = None) -> Path:
+    """Снимок, топ мест выделения и прирост с момента start(); трассировка останавливается."""
+    global _baseline
+    snap = _take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    baseline = _baseline
+    _baseline = None
+    tracemalloc.stop()
+
+    directory = directory or config.CONFIG_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"memprofile-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+    out = [
+        f"Трассировка: {time.monotonic() - _started_at:.0f} с, "
+        f"сейчас {_fmt_bytes(current)}, пик {_fmt_bytes(peak)}",
+        "",
+        "== Кэши ==",
+        *cache_report(),
+        "",
+        f"== Топ {_TOP_LIMIT} мест выделения ==",
+    ]
+    for stat in snap.statistics("lineno")[:_TOP_LIMIT]:
+        out.append(str(stat))
+    if baseline is not None:
+        out += ["", f"== Прирост с начала трассировки (топ {_TOP_LIMIT}) =="]
+        for stat in snap.compare_to(baseline, "lineno")[:_TOP_LIMIT]:
+            out.append(str(stat))
+    path.write_text("\n".join(out) + "\n", encoding="utf-8")
+    return path
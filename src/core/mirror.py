@@ -9,6 +9,7 @@ from datetime import datetime
 from pathlib import Path
 
 from core import config
+from core.watchdog import begin_job, idle_add
 
 _ALWAYS_EXCLUDES = [
     "/proc", "/sys", "/dev", "/run",
@@ -152,6 +153,7 @@ def _build_rsync_excludes(optional_includes: list[str]) -> list[str]:
 
 def _run_mirror_async(cmd: list[str], on_line, on_done, cwd: str | None = None):
     def _worker():
+        begin_job(f"mirror {os.path.basename(cmd[0])}")
         try:
             proc = subprocess.Popen(
                 cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
@@ -160,23 +162,14 @@ def _run_mirror_async(cmd: list[str], on_line, on_done, cwd: str | None = None):
             )
             for line in proc.stdout:
                 if on_line:
-                    import gi
-                    gi.require_version("GLib", "2.0")
-                    from gi.repository import GLib
-                    GLib.idle_add(on_line, line)
+                    idle_add(on_line, line)
             proc.wait()
             ok = proc.returncode == 0
         except Exception as e:
             ok = False
             if on_line:
-                import gi
-                gi.require_version("GLib", "2.0")
-                from gi.repository import GLib
-                GLib.idle_add(on_line, f"Ошибка: {e}\n")
-        import gi
-        gi.require_version("GLib", "2.0")
-        from gi.repository import GLib
-        GLib.idle_add(on_done, ok)
+                idle_add(on_line, f"Ошибка: {e}\n")
+        idle_add(on_done, ok)
     threading.Thread(target=_worker, daemon=True).start()
 
 
@@ -518,34 +511,25 @@ def generate_newsync_btrfs(dest_dir: str, device: str, subvolumes: list[str], ue
 def restore_to_disk(mirror_dir: str, target_device: str, on_line, on_done):
     info = detect_mirror_type(mirror_dir)
     if not info:
-        import gi
-        gi.require_version("GLib", "2.0")
-        from gi.repository import GLib
-        GLib.idle_add(on_line, "Ошибка: не удалось определить тип зеркала\n")
-        GLib.idle_add(on_done, False)
+        idle_add(on_line, "Ошибка: не удалось определить тип зеркала\n")
+        idle_add(on_done, False)
         return
 
     script = Path(mirror_dir) / "newsync.sh"
     if not script.exists():
-        import gi
-        gi.require_version("GLib", "2.0")
-        from gi.repository import GLib
-        GLib.idle_add(on_line, "Ошибка: newsync.sh не найден в папке зеркала\n")
-        GLib.idle_add(on_done, False)
+        idle_add(on_line, "Ошибка: newsync.sh не найден в папке зеркала\n")
+        idle_add(on_done, False)
         return
 
     def _worker():
-        import gi
-        gi.require_version("GLib", "2.0")
-        from gi.repository import GLib
-
+        begin_job("mirror restore")
         env = os.environ.copy()
         env["TARGET_DISK"] = target_device.lstrip("/dev/") if target_device.startswith("/dev/") else target_device
         env["NEWSYNC_AUTO"] = "1"
 
         auto_script = _build_auto_restore_script(mirror_dir, target_device, info)
 
-        GLib.idle_add(on_line, f"Восстановление на {target_device}...\n")
+        idle_add(on_line, f"Восстановление на {target_device}...\n")
         try:
             proc = subprocess.Popen(
                 ["sudo", "-n", "bash", "-c", auto_script],
@@ -553,13 +537,13 @@ def restore_to_disk(mirror_dir: str, target_device: str, on_line, on_done):
                 text=True, encoding="utf-8", errors="replace",
             )
             for line in proc.stdout:
-                GLib.idle_add(on_line, line)
+                idle_add(on_line, line)
             proc.wait()
             ok = proc.returncode == 0
         except Exception as e:
-            GLib.idle_add(on_line, f"Ошибка: {e}\n")
+            idle_add(on_line, f"Ошибка: {e}\n")
             ok = False
-        GLib.idle_add(on_done, ok)
+        idle_add(on_done, ok)
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import gzip
+import http.client
+import json
+import os
+import random
+import socket
+import ssl
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from core import config
+
+USER_AGENT = f"ALTBooster/{config.VERSION}"
+
+_MAX_CONCURRENT = 6
+_MAX_IDLE_PER_HOST = 4
+# Сервер обычно закрывает простаивающее keep-alive соединение сам; старше этого не переиспользуем.
+_IDLE_TIMEOUT_S = 30.0
+_RETRIES = 2
+_BACKOFF_BASE_S = 0.4
+_BACKOFF_MAX_S = 4.0
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+_MAX_REDIRECTS = 5
+_METRICS_KEPT = 200
+_CHUNK = 64 * 1024
+
+# Ошибки, после которых запрос можно безопасно повторить на новом соединении.
+_TRANSIENT_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.IncompleteRead,
+    http.client.BadStatusLine,
+    ConnectionError,
+    socket.timeout,
+    TimeoutError,
+)
+
+
+class OfflineError(OSError):
+    """Сетевой запрос при включённом автономном режиме."""
+
+
+class HTTPError(OSError):
+    def __init__(self, response: Response):
+        super().__init__(f"HTTP {response.status} для {response.url}")
+        self.response = response
+        self.status = response.status
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    elapsed_s: float = 0.0
+
+    def header(self, name: str, default: str = "") -> str:
+        return self.headers.get(name.lower(), default)
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+_Key = tuple[str, str, int]
+
+_offline = os.environ.get("ALTBOOSTER_OFFLINE", "") not in ("", "0")
+_origins: dict[str, str] = {}
+_idle: dict[_Key, list[tuple[http.client.HTTPConnection, float]]] = {}
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(_MAX_CONCURRENT)
+_metrics: deque[dict] = deque(maxlen=_METRICS_KEPT)
+_metrics_lock = threading.Lock()
+_ssl_context: ssl.SSLContext | None = None
+
+
+def set_offline(offline: bool) -> None:
+    """Глобальный автономный режим: любой запрос сразу завершается OfflineError."""
+    global _offline
+    _offline = bool(offline)
+    if _offline:
+        close_idle()
+
+
+def is_offline() -> bool:
+    return _offline
+
+
+def override_origin(origin: str, target: str | None) -> None:
+    """Перенаправить все запросы к origin (https://host) на target, например на локальный
+    тестовый сервер http://127.0.0.1:8000. target=None снимает подмену."""
+    origin = origin.rstrip("/")
+    if target is None:
+        _origins.pop(origin, None)
+    else:
+        _origins[origin] = target.rstrip("/")
+
+
+def _load_env_overrides() -> None:
+    # ALTBOOSTER_HTTP_OVERRIDE="https://rdb.altlinux.org=http://127.0.0.1:8000,..."
+    for pair in os.environ.get("ALTBOOSTER_HTTP_OVERRIDE", "").split(","):
+        origin, sep, target = pair.strip().partition("=")
+        if sep and origin and target:
+            override_origin(origin, target)
+
+
+def _rewrite(url: str) -> str:
+    if not _origins:
+        return url
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    target = _origins.get(origin)
+    return target + url[len(origin):] if target else url
+
+
+def _context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def _acquire(key: _Key, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+    now = time.monotonic()
+    with _pool_lock:
+        idle = _idle.get(key, [])
+        while idle:
+            conn, since = idle.pop()
+            if now - since < _IDLE_TIMEOUT_S:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            conn.close()
+    scheme, host, port = key
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=timeout, context=_context()), False
+    return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+
+def _release(key: _Key, conn: http.client.HTTPConnection) -> None:
+    if _offline:
+        conn.close()
+        return
+    with _pool_lock:
+        idle = _idle.setdefault(key, [])
+        if len(idle) < _MAX_IDLE_PER_HOST:
+            idle.append((conn, time.monotonic()))
+            return
+    conn.close()
+
+
+def close_idle() -> None:
+    with _pool_lock:
+        pools = list(_idle.values())
+        _idle.clear()
+    for idle in pools:
+        for conn, _since in idle:
+            conn.close()
+
+
+def _decode(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _backoff(attempt: int) -> float:
+    # Экспоненциальная задержка с полным джиттером, чтобы повторы не шли синхронно.
+    return random.uniform(0, min(_BACKOFF_MAX_S, _BACKOFF_BASE_S * (2 ** attempt)))
+
+
+def _record(method: str, url: str, status: int, elapsed: float, size: int,
+            attempts: int, reused: bool) -> None:
+    entry = {
+        "method": method, "url": url, "status": status, "elapsed_s": elapsed,
+        "bytes": size, "attempts": attempts, "reused": reused, "at": time.time(),
+    }
+    with _metrics_lock:
+        _metrics.append(entry)
+    if config.DEBUG:
+        conn = "keep-alive" if reused else "новое соединение"
+        print(f"[ALT Booster] HTTP {method} {url} → {status} за {elapsed * 1000:.0f} мс "
+              f"({size} Б, попыток: {attempts}, {conn})")
+
+
+def metrics() -> list[dict]:
+    """Последние запросы: метод, URL, статус, время, размер, число попыток, keep-alive."""
+    with _metrics_lock:
+        return list(_metrics)
+
+
+def _send(
+    method: str, url: str, headers: dict[str, str], body: bytes | None, timeout: float,
+    sink=None,
+) -> tuple[Response, bool]:
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"Неподдерживаемая схема URL: {url}")
+    key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    conn, reused = _acquire(key, timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if sink is not None and 200 <= resp.status < 300:
+            data = b""
+            while chunk := resp.read(_CHUNK):
+                sink.write(chunk)
+        else:
+            data = _decode(resp.read(), resp_headers.get("content-encoding", ""))
+    except BaseException:
+        conn.close()
+        raise
+    if resp.will_close:
+        conn.close()
+    else:
+        _release(key, conn)
+    return Response(url, resp.status, resp_headers, data), reused
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    params: dict | None = None,
+    headers: dict[str, str] | None = None,
+    body: bytes | None = None,
+    json_body=None,
+    timeout: float = 10,
+    retries: int = _RETRIES,
+    sink=None,
+) -> Response:
+    """HTTP-запрос через общий пул соединений.
+
+    Возвращает ответ со статусом < 400 (включая 304), иначе бросает HTTPError.
+    Сетевые сбои и 429/5xx повторяются с задержкой и джиттером. Если задан sink,
+    тело успешного ответа пишется в него по частям и в Response.body не попадает.
+    """
+    if _offline:
+        raise OfflineError(f"Автономный режим: запрос {url} не выполнен")
+    if params:
+        url += ("&" if "?" in url else "?") + urlencode(params)
+    url = _rewrite(url)
+    hdrs = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity" if sink else "gzip"}
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        hdrs["Content-Type"] = "application/json"
+    hdrs.update(headers or {})
+
+    started = time.monotonic()
+    attempts = 0
+    redirects = 0
+    while True:
+        attempts += 1
+        if sink is not None and attempts > 1:
+            sink.seek(0)
+            sink.truncate()
+        with _slots:
+            try:
+                resp, reused = _send(method, url, hdrs, body, timeout, sink)
+            except _TRANSIENT_ERRORS as e:
+                # Сервер мог закрыть простаивавшее соединение — это не повод ждать.
+                if attempts > retries + 1:
+                    raise
+                delay = 0.0 if isinstance(e, http.client.RemoteDisconnected) else _backoff(attempts)
+                resp = None
+        if resp is None:
+            time.sleep(delay)
+            continue
+        if resp.status in _REDIRECT_STATUSES and resp.header("location") and redirects < _MAX_REDIRECTS:
+            redirects += 1
+            url = _rewrite(urljoin(url, resp.header("location")))
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                hdrs.pop("Content-Type", None)
+            continue
+        if resp.status in _RETRY_STATUSES and attempts <= retries:
+            retry_after = resp.header("retry-after")
+            delay = float(retry_after) if retry_after.isdigit() else _backoff(attempts)
+            time.sleep(min(delay, _BACKOFF_MAX_S))
+            continue
+        break
+
+    resp.elapsed_s = time.monotonic() - started
+    _record(method, url, resp.status, resp.elapsed_s, len(resp.body), attempts, reused)
+    if resp.status >= 400:
+        raise HTTPError(resp)
+    return resp
+
+
+def get_json(url: str, **kwargs):
+    return request("GET", url, **kwargs).json()
+
+
+def post_json(url: str, payload, **kwargs):
+    return request("POST", url, json_body=payload, **kwargs).json()
+
+
+def download(url: str, path: str | os.PathLike, *, timeout: float = 30) -> None:
+    """Скачать файл потоково; при ошибке недокачанный файл удаляется."""
+    try:
+        with open(path, "wb") as f:
+            request("GET", url, timeout=timeout, sink=f)
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+
+
+_load_env_overrides()
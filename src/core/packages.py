@@ -1,14 +1,35 @@
 from __future__ import annotations
 
+import copy
+import os
 import re
 import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Callable
 
+from core import config, pkgindex
+from core.checks import flatpak_inventory_generation, rpm_inventory_generation
 
 PrivilegedRunner = Callable[[list[str], Callable[[str], None]], bool]
 
 
+@dataclass
+class PackageChange:
+    """Одна строка Inst/Remv из симуляции apt; размеры в байтах, None — неизвестно."""
+
+    name: str
+    action: str  # "install" | "upgrade" | "remove"
+    old_version: str = ""
+    new_version: str = ""
+    arch: str = ""
+    download_bytes: int | None = None
+    size_delta: int | None = None
+
+
 @dataclass
 class InstallPreview:
     new_packages: list[str] = field(default_factory=list)
@@ -26,6 +47,10 @@ class InstallPreview:
     app_description: str = ""
     flatpak_updates: list[str] = field(default_factory=list)
     app_url: str = ""
+    changes: list[PackageChange] = field(default_factory=list)
+    total_download: int | None = None
+    total_size_delta: int | None = None
+    sizes_pending: bool = False  # индекс apt не готов — размеры досчитаются при повторном открытии
 
 
 def _extract_pkg_names(cmd: list[str]) -> list[str]:
@@ -45,6 +70,29 @@ def _detect_source_type(cmd: list[str]) -> str:
     return "apt"
 
 
+def is_dist_upgrade_cmd(cmd: list[str]) -> bool:
+    return (
+        len(cmd) > 1 and cmd[1] in ("dist-upgrade", "full-upgrade", "upgrade")
+    ) or (
+        cmd[0] == "epm" and len(cmd) > 1 and cmd[1] in ("full-upgrade", "upgrade")
+    )
+
+
+# Симуляция всегда идёт с LC_ALL=C, а строки Inst/Remv/Conf от локали не зависят:
+# «Inst name [старая] (новая источник [arch])», «Remv name [старая]».
+_SIM_ACTION_PREFIXES = ("Inst ", "Remv ", "Conf ")
+_SIM_ACTION_RE = re.compile(r"(Inst|Remv|Conf) (\S+)(?: \[([^\]]*)\])?(?: \((\S+)([^)]*)\))?")
+_SIM_ARCH_RE = re.compile(r"\[([^\]]+)\]")
+_KEPT_HEADER_RE = re.compile(r"The following packages (?:have been kept back|will be kept)")
+_NEED_TO_GET_RE = re.compile(r"Need to get (.+?) of archives")
+_DISK_SPACE_RE = re.compile(
+    r"After (?:this operation|unpacking),? (.+?) (?:of )?(?:additional )?disk space will be (used|freed)"
+)
+_PKG_VERSION_SUFFIX_RE = re.compile(r"[#=].*$")
+_EPOCH_RE = re.compile(r"^\d+:")
+_DISTTAG_RE = re.compile(r"[:@].*$")
+
+
 def _parse_apt_simulate_output(
     lines: list[str],
     source_type: str,
@@ -56,76 +104,193 @@ def _parse_apt_simulate_output(
         dry_run_failed=failed,
         package_names=package_names,
     )
-
-    section: str | None = None
+    lists = {
+        "install": preview.new_packages,
+        "upgrade": preview.upgraded_packages,
+        "remove": preview.removed_packages,
+    }
+    kept = False
 
     for line in lines:
-        stripped = line.strip()
-
-        if any(x in line for x in (
-            "The following NEW packages will be installed",
-            "Следующие НОВЫЕ пакеты будут установлены",
-        )):
-            section = "new"
-            continue
-        if any(x in line for x in (
-            "The following packages will be upgraded",
-            "Следующие пакеты будут ОБНОВЛЕНЫ",
-            "будут обновлены",
-        )):
-            section = "upgrade"
-            continue
-        if any(x in line for x in (
-            "The following packages will be REMOVED",
-            "Следующие пакеты будут УДАЛЕНЫ",
-            "будут удалены",
-        )):
-            section = "removed"
-            continue
-        if any(x in line for x in (
-            "The following packages have been kept back",
-            "The following packages will be kept",
-            "Следующие пакеты будут СОХРАНЕНЫ",
-        )):
-            section = "kept"
-            continue
-        if line.startswith("The following") or line.startswith("0 upgraded"):
-            section = None
-
-        if section and line.startswith(" ") and stripped:
-            pkgs = [re.sub(r"[#=].*$", "", p) for p in stripped.split()]
-            pkgs = [p for p in pkgs if p]
-            if section == "new":
-                preview.new_packages.extend(pkgs)
-            elif section == "upgrade":
-                preview.upgraded_packages.extend(pkgs)
-            elif section == "removed":
-                preview.removed_packages.extend(pkgs)
-            elif section == "kept":
-                preview.kept_packages.extend(pkgs)
+        if line.startswith(_SIM_ACTION_PREFIXES):
+            m = _SIM_ACTION_RE.match(line)
+            if m is None or m.group(1) == "Conf":
+                continue
+            kind, name, old, new, tail = m.groups()
+            name = _PKG_VERSION_SUFFIX_RE.sub("", name)
+            if not name:
+                continue
+            if kind == "Remv":
+                action = "remove"
+            else:
+                action = "upgrade" if old else "install"
+            arch = _SIM_ARCH_RE.search(tail) if tail else None
+            preview.changes.append(PackageChange(
+                name=name,
+                action=action,
+                old_version=old or "",
+                new_version=new or "",
+                arch=arch.group(1) if arch else "",
+            ))
+            lists[action].append(name)
             continue
 
-        m = re.search(
-            r"(?:Need to get|Необходимо получить)\s+([^\s]+(?:\s+[^\s]+)?)\s+(?:of archives|архивов)",
-            line,
-        )
-        if m:
-            preview.download_size = m.group(1).strip()
+        if kept:
+            if line.startswith(" "):
+                for p in line.split():
+                    p = _PKG_VERSION_SUFFIX_RE.sub("", p)
+                    if p:
+                        preview.kept_packages.append(p)
+                continue
+            kept = False
+
+        if line.startswith("The following"):
+            kept = _KEPT_HEADER_RE.match(line) is not None
+        elif line.startswith("Need to get"):
+            m = _NEED_TO_GET_RE.match(line)
+            if m:
+                preview.download_size = m.group(1).strip()
+        elif line.startswith("After "):
+            m = _DISK_SPACE_RE.match(line)
+            if m:
+                size = m.group(1).strip()
+                preview.disk_space = size if m.group(2) == "used" else f"освободится {size}"
+        else:
+            stripped = line.strip()
+            if stripped.startswith("E:"):
+                preview.errors.append(stripped[2:].strip())
+            elif stripped.startswith("W:"):
+                preview.warnings.append(stripped[2:].strip())
+
+    return preview
+
+
+def _plain_version(version: str) -> str:
+    """Версия-релиз без эпохи, disttag и времени сборки — для сравнения со списками apt."""
+    return _DISTTAG_RE.sub("", _EPOCH_RE.sub("", version))
 
-        m = re.search(
-            r"(?:After this operation,?\s+|После распаковки потребуется дополнительно\s+)"
-            r"([^\s]+(?:\s+[^\s]+)?)\s+(?:of additional|дискового)",
-            line,
+
+def _installed_sizes(names: list[str]) -> dict[str, int]:
+    if not names:
+        return {}
+    try:
+        r = subprocess.run(
+            ["rpm", "-q", "--qf", "%{NAME}\t%{SIZE}\n", *names],
+            capture_output=True, text=True, timeout=15,
         )
-        if m:
-            preview.disk_space = m.group(1).strip()
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    sizes: dict[str, int] = {}
+    for line in r.stdout.splitlines():
+        name, sep, size = line.partition("\t")
+        if sep and size.isdigit():
+            sizes[name] = int(size)
+    return sizes
+
+
+def _attach_sizes(preview: InstallPreview) -> None:
+    """Размеры пакетов из локального индекса apt и базы rpm; суммы — по известным."""
+    if not preview.changes:
+        return
+    if not pkgindex.available():
+        # Без индекса размеры пришлось бы собирать по частям — показываем только итоги apt.
+        preview.sizes_pending = True
+        return
+    available = pkgindex.package_sizes(
+        c.name for c in preview.changes if c.action != "remove"
+    )
+    installed = _installed_sizes([c.name for c in preview.changes if c.action != "install"])
+    downloads: list[int] = []
+    deltas: list[int] = []
+    for change in preview.changes:
+        new = None
+        if change.action != "remove":
+            wanted = _plain_version(change.new_version)
+            for version, arch, size, installed_size in available.get(change.name, ()):
+                if _plain_version(version) != wanted:
+                    continue
+                if change.arch and arch not in (change.arch, "noarch"):
+                    continue
+                new = (size, installed_size)
+                change.download_bytes = size
+                downloads.append(size)
+                break
+        old = installed.get(change.name)
+        if change.action == "install" and new is not None:
+            change.size_delta = new[1]
+        elif change.action == "remove" and old is not None:
+            change.size_delta = -old
+        elif change.action == "upgrade" and new is not None and old is not None:
+            change.size_delta = new[1] - old
+        if change.size_delta is not None:
+            deltas.append(change.size_delta)
+    if downloads:
+        preview.total_download = sum(downloads)
+    if deltas:
+        preview.total_size_delta = sum(deltas)
 
-        if stripped.startswith("E:"):
-            preview.errors.append(stripped[2:].strip())
-        elif stripped.startswith("W:"):
-            preview.warnings.append(stripped[2:].strip())
 
-    return preview
+@dataclass
+class BulkStep:
+    """Одна транзакция массовой установки и ключи строк, которые она покрывает."""
+
+    kind: str  # "epm" | "flatpak" | "epm_play" | "script"
+    cmd: list[str]
+    keys: list = field(default_factory=list)
+    packages: list[str] = field(default_factory=list)
+
+
+_EPM_INSTALL_ACTIONS = ("-i", "install")
+
+
+def _flatpak_install_args(cmd: list[str]) -> tuple[str, list[str]] | None:
+    if len(cmd) < 4 or cmd[0] != "flatpak" or cmd[1] != "install":
+        return None
+    args = [a for a in cmd[2:] if not a.startswith("-")]
+    flags = [a for a in cmd[2:] if a.startswith("-") and a not in ("-y", "--assumeyes")]
+    if len(args) < 2 or flags:
+        return None
+    return args[0], args[1:]
+
+
+def plan_bulk_install(items: list[tuple[object, list[str]]]) -> list[BulkStep]:
+    """Сгруппировать команды установки [(ключ, cmd), ...] в минимум транзакций.
+
+    Все пакеты «epm -i/install» — одной командой epm install, Flatpak — одной командой на remote,
+    «epm play» и скрипты — по отдельности в исходном порядке.
+    """
+    epm = BulkStep("epm", [])
+    flatpak: dict[str, BulkStep] = {}
+    separate: list[BulkStep] = []
+    for key, cmd in items:
+        cmd = list(cmd)
+        kind = _detect_source_type(cmd)
+        if kind == "apt" and cmd[0] == "epm" and len(cmd) > 2 and cmd[1] in _EPM_INSTALL_ACTIONS:
+            names = [a for a in _extract_pkg_names(cmd) if a not in epm.packages]
+            epm.packages.extend(names)
+            epm.keys.append(key)
+            continue
+        if kind == "flatpak":
+            parsed = _flatpak_install_args(cmd)
+            if parsed is not None:
+                remote, refs = parsed
+                step = flatpak.setdefault(remote, BulkStep("flatpak", [], packages=[]))
+                step.packages.extend(r for r in refs if r not in step.packages)
+                step.keys.append(key)
+                continue
+        if kind == "epm_play":
+            separate.append(BulkStep("epm_play", cmd, [key], _extract_pkg_names(cmd)))
+        else:
+            separate.append(BulkStep("script", cmd, [key]))
+
+    steps: list[BulkStep] = []
+    if epm.keys:
+        epm.cmd = ["epm", "install", "-y", *epm.packages]
+        steps.append(epm)
+    for remote, step in flatpak.items():
+        step.cmd = ["flatpak", "install", "-y", "--noninteractive", remote, *step.packages]
+        steps.append(step)
+    return steps + separate
 
 
 def get_flatpak_system_updates() -> list[str]:
@@ -152,27 +317,33 @@ def get_flatpak_system_updates() -> list[str]:
     return updates
 
 
+def _flatpak_remote_info(scope: str, remote: str, appid: str) -> str:
+    env = {"LC_ALL": "C.UTF-8", "PATH": "/usr/bin:/bin:/usr/sbin:/sbin"}
+    try:
+        r = subprocess.run(
+            ["flatpak", scope, "remote-info", remote, appid],
+            capture_output=True, text=True, encoding="utf-8",
+            timeout=10, env=env,
+        )
+    except Exception:
+        return ""
+    return r.stdout if r.returncode == 0 else ""
+
+
 def _get_flatpak_info(cmd: list[str]) -> InstallPreview:
     args = [a for a in cmd[2:] if not a.startswith("-")]
     if len(args) < 2:
         return InstallPreview(source_type="flatpak", package_names=args)
 
     remote, appid = args[0], args[1]
-    env = {"LC_ALL": "C.UTF-8", "PATH": "/usr/bin:/bin:/usr/sbin:/sbin"}
 
-    output = ""
-    for scope in ("--system", "--user"):
-        try:
-            r = subprocess.run(
-                ["flatpak", scope, "remote-info", remote, appid],
-                capture_output=True, text=True, encoding="utf-8",
-                timeout=10, env=env,
-            )
-            if r.returncode == 0:
-                output = r.stdout
-                break
-        except Exception:
-            pass
+    # Удалённый репозиторий может быть в любой из установок; опрашиваем обе сразу,
+    # при совпадении предпочитаем системную.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outputs = list(pool.map(
+            lambda scope: _flatpak_remote_info(scope, remote, appid), ("--system", "--user"),
+        ))
+    output = next((o for o in outputs if o), "")
 
     preview = InstallPreview(source_type="flatpak", package_names=[appid])
 
@@ -225,9 +396,28 @@ def _get_epm_play_info(cmd: list[str]) -> InstallPreview:
     return preview
 
 
-def get_install_preview(
+def _simulate(dry_cmd: list[str], runner: PrivilegedRunner | None) -> tuple[list[str], bool]:
+    lines: list[str] = []
+    if runner is not None:
+        try:
+            return lines, not runner(dry_cmd, lambda line: lines.append(line))
+        except Exception:
+            return lines, True
+    env = {"LC_ALL": "C", "PATH": "/usr/bin:/bin:/usr/sbin:/sbin"}
+    try:
+        r = subprocess.run(
+            dry_cmd[1:],
+            capture_output=True, text=True, encoding="utf-8",
+            timeout=15, env=env,
+        )
+    except Exception:
+        return lines, True
+    return (r.stdout + r.stderr).splitlines(keepends=True), r.returncode != 0
+
+
+def _compute_install_preview(
     cmd: list[str],
-    runner: PrivilegedRunner | None = None,
+    runner: PrivilegedRunner | None,
 ) -> InstallPreview:
     source_type = _detect_source_type(cmd)
 
@@ -240,11 +430,7 @@ def get_install_preview(
 
     package_names = _extract_pkg_names(cmd)
 
-    is_dist_upgrade = (
-        len(cmd) > 1 and cmd[1] in ("dist-upgrade", "full-upgrade", "upgrade")
-    ) or (
-        cmd[0] == "epm" and len(cmd) > 1 and cmd[1] in ("full-upgrade", "upgrade")
-    )
+    is_dist_upgrade = is_dist_upgrade_cmd(cmd)
 
     if is_dist_upgrade:
         dry_cmd = ["env", "LC_ALL=C", "apt-get", "-s", "dist-upgrade"]
@@ -255,31 +441,115 @@ def get_install_preview(
             source_type=source_type, dry_run_failed=True, package_names=package_names
         )
 
-    lines: list[str] = []
-    failed = False
+    if not is_dist_upgrade:
+        lines, failed = _simulate(dry_cmd, runner)
+        preview = _parse_apt_simulate_output(lines, source_type, package_names, failed)
+        _attach_sizes(preview)
+        return preview
 
-    if runner is not None:
-        try:
-            ok = runner(dry_cmd, lambda line: lines.append(line))
-            failed = not ok
-        except Exception:
-            failed = True
-    else:
-        env = {"LC_ALL": "C", "PATH": "/usr/bin:/bin:/usr/sbin:/sbin"}
+    # Обновления Flatpak не зависят от apt — проверяем их, пока идёт симуляция.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        flatpak_updates = pool.submit(get_flatpak_system_updates)
+        lines, failed = _simulate(dry_cmd, runner)
+        preview = _parse_apt_simulate_output(lines, source_type, package_names, failed)
+        _attach_sizes(preview)
+        preview.flatpak_updates = flatpak_updates.result()
+    return preview
+
+
+_APT_LISTS_DIR = Path("/var/lib/apt/lists")
+_FLATPAK_APPSTREAM_DIRS = (
+    Path("/var/lib/flatpak/appstream"),
+    Path.home() / ".local/share/flatpak/appstream",
+)
+_PREVIEW_CACHE_ENTRIES = 32
+
+_preview_cache: OrderedDict[tuple, InstallPreview] = OrderedDict()
+_preview_lock = threading.Lock()
+
+
+def _apt_lists_stamp() -> int:
+    latest = 0
+    try:
+        with os.scandir(_APT_LISTS_DIR) as it:
+            for entry in it:
+                try:
+                    latest = max(latest, entry.stat().st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return latest
+
+
+def _appstream_stamp() -> int:
+    """Время последнего обновления appstream Flatpak: .timestamp в каталоге <remote>/<arch>."""
+    latest = 0
+    for base in _FLATPAK_APPSTREAM_DIRS:
         try:
-            r = subprocess.run(
-                dry_cmd[1:],
-                capture_output=True, text=True, encoding="utf-8",
-                timeout=15, env=env,
-            )
-            lines = (r.stdout + r.stderr).splitlines(keepends=True)
-            failed = r.returncode != 0
-        except Exception:
-            failed = True
+            remotes = list(os.scandir(base))
+        except OSError:
+            continue
+        for remote in remotes:
+            try:
+                arches = list(os.scandir(remote.path))
+            except OSError:
+                continue
+            for arch in arches:
+                for name in (".timestamp", "active"):
+                    try:
+                        latest = max(latest, os.lstat(os.path.join(arch.path, name)).st_mtime_ns)
+                        break
+                    except OSError:
+                        continue
+    return latest
+
+
+def _preview_key(cmd: list[str]) -> tuple:
+    # Кроме списков apt и appstream, превью зависит от уже установленного — учитываем и его.
+    return (
+        tuple(cmd), _apt_lists_stamp(), _appstream_stamp(),
+        rpm_inventory_generation(), flatpak_inventory_generation(),
+    )
 
-    preview = _parse_apt_simulate_output(lines, source_type, package_names, failed)
 
-    if is_dist_upgrade:
-        preview.flatpak_updates = get_flatpak_system_updates()
+def _is_cacheable(preview: InstallPreview) -> bool:
+    if preview.dry_run_failed or preview.errors:
+        return False
+    # Пустое превью Flatpak — remote-info не ответил (например, нет сети).
+    return preview.source_type != "flatpak" or bool(preview.new_packages)
+
 
+def get_install_preview(
+    cmd: list[str],
+    runner: PrivilegedRunner | None = None,
+) -> InstallPreview:
+    """Превью установки; повторный запрос той же команды при неизменных списках
+    пакетов и установленных приложениях отдаётся из кэша."""
+    key = _preview_key(cmd)
+    with _preview_lock:
+        cached = _preview_cache.get(key)
+        if cached is not None:
+            _preview_cache.move_to_end(key)
+            cached = copy.deepcopy(cached)
+
+    if config.DEBUG:
+        state = "из кэша" if cached is not None else "симуляция"
+        print(f"[ALT Booster] Превью {' '.join(cmd)}: {state}")
+    if cached is not None:
+        if not cached.sizes_pending or not pkgindex.available():
+            return cached
+        # Превью сохранено до готовности индекса: досчитываем размеры без новой симуляции.
+        cached.sizes_pending = False
+        _attach_sizes(cached)
+        preview = cached
+    else:
+        preview = _compute_install_preview(cmd, runner)
+        if not _is_cacheable(preview):
+            return preview
+
+    with _preview_lock:
+        _preview_cache[key] = copy.deepcopy(preview)
+        while len(_preview_cache) > _PREVIEW_CACHE_ENTRIES:
+            _preview_cache.popitem(last=False)
     return preview
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+import threading
+import time
+
+# Как часто сверять mtime каталогов PATH: установка пакета меняет mtime каталога, а не PATH.
+_RECHECK_INTERVAL_S = 2.0
+
+_index: dict[str, str] = {}
+_signature: tuple = ()
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _path_dirs() -> list[str]:
+    seen: set[str] = set()
+    dirs: list[str] = []
+    for d in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        d = d or os.curdir
+        if d not in seen:
+            seen.add(d)
+            dirs.append(d)
+    return dirs
+
+
+def _signature_of(dirs: list[str]) -> tuple:
+    sig = []
+    for d in dirs:
+        try:
+            sig.append((d, os.stat(d).st_mtime_ns))
+        except OSError:
+            sig.append((d, -1))
+    return tuple(sig)
+
+
+def _scan(dirs: list[str]) -> dict[str, str]:
+    index: dict[str, str] = {}
+    for d in dirs:
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.name in index:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.S_ISREG(st.st_mode) and st.st_mode & 0o111:
+                        index[entry.name] = entry.path
+        except OSError:
+            continue
+    return index
+
+
+def _current_index() -> dict[str, str]:
+    global _index, _signature, _checked_at
+    now = time.monotonic()
+    with _lock:
+        if _signature and now - _checked_at < _RECHECK_INTERVAL_S:
+            return _index
+        dirs = _path_dirs()
+        sig = _signature_of(dirs)
+        _checked_at = now
+        if sig != _signature:
+            _index = _scan(dirs)
+            _signature = sig
+        return _index
+
+
+def which(name: str) -> str | None:
+    """shutil.which по индексу PATH в памяти; каталоги пересканируются только после их изменения."""
+    if not name:
+        return None
+    if os.sep in name:
+        return shutil.which(name)
+    return _current_index().get(name)
+
+
+def has(name: str) -> bool:
+    return which(name) is not None
+
+
+def invalidate() -> None:
+    """Принудительно сверить каталоги PATH при следующем запросе (например после установки пакета)."""
+    global _checked_at
+    with _lock:
+        _checked_at = 0.0
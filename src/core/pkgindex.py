@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from core import config, resources
+from core.state_store import connect_private
+
+APT_LISTS_DIR = Path("/var/lib/apt/lists")
+PKG_INDEX_DB = config.CONFIG_DIR / "pkgindex.db"
+# Индекс строится только по явному согласию пользователя: переключатель на вкладке «Приложения».
+ENABLED_STATE_KEY = "pkgindex_enabled"
+
+# Как часто сверять размеры и mtime списков apt при поиске.
+_RECHECK_INTERVAL_S = 5.0
+# После ошибки (например, sqlite без FTS5) повторяем не сразу, а с нарастающей паузой.
+_RETRY_BASE_S = 30.0
+_RETRY_MAX_S = 3600.0
+_SEARCH_LIMIT = 100
+
+# pkglist.* в apt-rpm — подряд записанные заголовки rpm.
+_HEADER_MAGIC = b"\x8e\xad\xe8\x01"
+_INDEX_ENTRY = struct.Struct(">iiii")
+_HEADER_SIZES = struct.Struct(">ii")
+_INT32 = struct.Struct(">i")
+
+_TAG_NAME = 1000
+_TAG_VERSION = 1001
+_TAG_RELEASE = 1002
+_TAG_EPOCH = 1003
+_TAG_SUMMARY = 1004
+_TAG_SIZE = 1009
+_TAG_ARCH = 1022
+_TAG_FILESIZE = 1000001  # CRPMTAG_FILESIZE: размер .rpm, добавляется genpkglist
+_WANTED_TAGS = frozenset({
+    _TAG_NAME, _TAG_VERSION, _TAG_RELEASE, _TAG_EPOCH, _TAG_SUMMARY, _TAG_SIZE, _TAG_ARCH,
+    _TAG_FILESIZE,
+})
+
+_TYPE_INT32 = 4
+_TYPE_STRING = 6
+_TYPE_STRING_ARRAY = 8
+_TYPE_I18NSTRING = 9
+
+_BRANCH_RE = re.compile(r"_(p\d+|c\d+(?:\.\d+)?)_branch_|_(sisyphus)_", re.IGNORECASE)
+_QUERY_TOKEN_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    branch   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS packages (
+    id             INTEGER PRIMARY KEY,
+    list           TEXT NOT NULL,
+    branch         TEXT NOT NULL,
+    name           TEXT NOT NULL,
+    version        TEXT NOT NULL,
+    arch           TEXT NOT NULL,
+    summary        TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    installed_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_list ON packages(list);
+CREATE INDEX IF NOT EXISTS packages_name ON packages(name, branch);
+CREATE VIRTUAL TABLE IF NOT EXISTS packages_fts USING fts5(
+    name, summary, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_conn: sqlite3.Connection | None = None
+_db_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_state_lock = threading.Lock()
+_checked_at = 0.0
+_refreshing = False
+_ready = False
+_failures = 0
+_retry_at = 0.0
+
+
+def branch_of_list(filename: str) -> str:
+    m = _BRANCH_RE.search(filename)
+    if not m:
+        return ""
+    return (m.group(1) or m.group(2)).lower()
+
+
+def _read_header(buf, pos: int) -> tuple[dict[int, object], int] | None:
+    """Разобрать один заголовок rpm с позиции pos; вернуть (нужные теги, позиция следующего)."""
+    if buf[pos:pos + 4] == _HEADER_MAGIC:
+        pos += 8
+    if pos + 8 > len(buf):
+        return None
+    il, dl = _HEADER_SIZES.unpack_from(buf, pos)
+    index_start = pos + 8
+    store = index_start + il * 16
+    end = store + dl
+    if il <= 0 or dl < 0 or end > len(buf):
+        return None
+    tags: dict[int, object] = {}
+    for i in range(il):
+        tag, typ, offset, count = _INDEX_ENTRY.unpack_from(buf, index_start + i * 16)
+        if tag not in _WANTED_TAGS or not 0 <= offset < dl:
+            continue
+        at = store + offset
+        if typ == _TYPE_INT32:
+            tags[tag] = _INT32.unpack_from(buf, at)[0]
+        elif typ in (_TYPE_STRING, _TYPE_STRING_ARRAY, _TYPE_I18NSTRING):
+            # Для I18N первой строкой идёт локаль «C» — её и берём.
+            stop = buf.find(b"\0", at, end)
+            tags[tag] = bytes(buf[at:stop if stop >= 0 else end]).decode("utf-8", "replace")
+    return tags, end
+
+
+def iter_pkglist(path: Path) -> Iterator[dict]:
+    """Пакеты из файла pkglist.*: name, version (epoch:version-release), arch, summary, размеры."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pos = 0
+            while pos < len(buf):
+                parsed = _read_header(buf, pos)
+                if parsed is None:
+                    break
+                tags, pos = parsed
+                name = tags.get(_TAG_NAME)
+                if not name:
+                    continue
+                version = f"{tags.get(_TAG_VERSION, '')}-{tags.get(_TAG_RELEASE, '')}"
+                if tags.get(_TAG_EPOCH):
+                    version = f"{tags[_TAG_EPOCH]}:{version}"
+                yield {
+                    "name": name,
+                    "version": version,
+                    "arch": tags.get(_TAG_ARCH, ""),
+                    "summary": tags.get(_TAG_SUMMARY, ""),
+                    "size": tags.get(_TAG_FILESIZE, 0),
+                    "installed_size": tags.get(_TAG_SIZE, 0),
+                }
+
+
+def _list_files() -> dict[str, tuple[int, int]]:
+    found: dict[str, tuple[int, int]] = {}
+    try:
+        with os.scandir(APT_LISTS_DIR) as it:
+            for entry in it:
+                if "_pkglist." not in entry.name or not entry.is_file():
+                    continue
+                st = entry.stat()
+                found[entry.path] = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        pass
+    return found
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = connect_private(PKG_INDEX_DB)
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def _drop_list(conn: sqlite3.Connection, path: str) -> None:
+    conn.execute(
+        "DELETE FROM packages_fts WHERE rowid IN (SELECT id FROM packages WHERE list = ?)", (path,),
+    )
+    conn.execute("DELETE FROM packages WHERE list = ?", (path,))
+    conn.execute("DELETE FROM lists WHERE path = ?", (path,))
+
+
+def _reindex_list(path: str, size: int, mtime_ns: int) -> int:
+    branch = branch_of_list(os.path.basename(path))
+    rows = [
+        (path, branch, p["name"], p["version"], p["arch"], p["summary"], p["size"],
+         p["installed_size"])
+        for p in iter_pkglist(Path(path))
+    ]
+    # Список разбирается без блокировки, чтобы поиск по уже готовым веткам не ждал.
+    with _db_lock:
+        _write_list(_connect(), path, size, mtime_ns, branch, rows)
+    return len(rows)
+
+
+def _write_list(
+    conn: sqlite3.Connection, path: str, size: int, mtime_ns: int, branch: str, rows: list,
+) -> None:
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _drop_list(conn, path)
+        for row in rows:
+            cur = conn.execute(
+                "INSERT INTO packages (list, branch, name, version, arch, summary, size, "
+                "installed_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row,
+            )
+            conn.execute(
+                "INSERT INTO packages_fts (rowid, name, summary) VALUES (?, ?, ?)",
+                (cur.lastrowid, row[2], row[5]),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO lists VALUES (?, ?, ?, ?)", (path, size, mtime_ns, branch),
+        )
+
+
+def refresh(force: bool = False) -> bool:
+    """Переиндексировать изменившиеся списки apt (только их); False — индекс недоступен.
+
+    Выполняется синхронно и на больших списках занимает секунды — из интерфейса
+    вызывайте refresh_in_background().
+    """
+    global _checked_at, _ready, _failures, _retry_at
+    with _refresh_lock:
+        now = time.monotonic()
+        if now < _retry_at:
+            return False
+        if not force and now - _checked_at < _RECHECK_INTERVAL_S:
+            return _ready
+        _checked_at = now
+        current = _list_files()
+        try:
+            with _db_lock:
+                conn = _connect()
+                known = {
+                    path: (size, mtime_ns)
+                    for path, size, mtime_ns in conn.execute(
+                        "SELECT path, size, mtime_ns FROM lists"
+                    )
+                }
+                for path in known.keys() - current.keys():
+                    with conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        _drop_list(conn, path)
+            for path, (size, mtime_ns) in current.items():
+                if known.get(path) == (size, mtime_ns):
+                    continue
+                started = time.monotonic()
+                count = _reindex_list(path, size, mtime_ns)
+                if config.DEBUG:
+                    print(f"[ALT Booster] Индекс пакетов: {os.path.basename(path)} — "
+                          f"{count} пакетов за {time.monotonic() - started:.1f} с")
+        except (sqlite3.Error, OSError) as e:
+            # Например, sqlite собран без FTS5 — пока индекс недоступен, поиск идёт онлайн.
+            delay = min(_RETRY_MAX_S, _RETRY_BASE_S * 2 ** _failures)
+            _failures += 1
+            _retry_at = time.monotonic() + delay
+            print(f"[ALT Booster] Локальный индекс пакетов недоступен: {e} "
+                  f"(повтор через {delay:.0f} с)")
+            return False
+        _failures = 0
+        _ready = True
+    return True
+
+
+def enabled() -> bool:
+    return bool(config.state_get(ENABLED_STATE_KEY, False))
+
+
+def set_enabled(value: bool) -> None:
+    config.state_set(ENABLED_STATE_KEY, bool(value))
+    if value:
+        refresh_in_background()
+
+
+def refresh_in_background(force: bool = False) -> None:
+    global _refreshing
+    if not enabled():
+        return
+    with _state_lock:
+        if _refreshing:
+            return
+        _refreshing = True
+
+    def _worker():
+        global _refreshing
+        try:
+            refresh(force)
+        finally:
+            with _state_lock:
+                _refreshing = False
+
+    threading.Thread(target=_worker, daemon=True).start()
+
+
+def available() -> bool:
+    """Можно ли читать индекс прямо сейчас; сверка со списками apt уходит в фон.
+
+    Пока индекс не построен или выключен, вызывающие обходятся без него
+    (онлайн-поиск, превью без размеров).
+    """
+    global _ready
+    if not enabled():
+        return False
+    now = time.monotonic()
+    if now - _checked_at >= _RECHECK_INTERVAL_S and now >= _retry_at:
+        refresh_in_background()
+    if _ready:
+        return True
+    if now < _retry_at:
+        return False
+    # Индекс с прошлого запуска годится сразу, пока фон сверяет его со списками.
+    try:
+        with _db_lock:
+            built = _connect().execute("SELECT 1 FROM lists LIMIT 1").fetchone() is not None
+    except (sqlite3.Error, OSError):
+        return False
+    if built:
+        _ready = True
+    return built
+
+
+def branches() -> set[str]:
+    """Ветки, для которых на диске есть списки apt (например {"p11"})."""
+    if not available():
+        return set()
+    with _db_lock:
+        return {row[0] for row in _connect().execute("SELECT DISTINCT branch FROM lists")
+                if row[0]}
+
+
+def _fts_query(query: str) -> str:
+    tokens = _QUERY_TOKEN_RE.findall(query.lower())
+    return " AND ".join(f'"{t}"*' for t in tokens)
+
+
+def search(query: str, branch: str, limit: int = _SEARCH_LIMIT) -> list[dict]:
+    """Поиск по локальному индексу; словари те же, что у поиска через rdb.altlinux.org."""
+    match = _fts_query(query)
+    if not match or not available():
+        return []
+    name = query.strip().lower()
+    try:
+        with _db_lock:
+            rows = _connect().execute(
+                "SELECT p.name, p.version, p.summary FROM packages_fts "
+                "JOIN packages p ON p.id = packages_fts.rowid "
+                "WHERE packages_fts MATCH ? AND p.branch = ? "
+                "ORDER BY p.name = ? DESC, p.name LIKE ? DESC, bm25(packages_fts, 10.0, 1.0) "
+                "LIMIT ?",
+                (match, branch, name, name.replace("%", "") + "%", limit * 2),
+            ).fetchall()
+    except sqlite3.Error as e:
+        if config.DEBUG:
+            print(f"[ALT Booster] Ошибка поиска в индексе пакетов: {e}")
+        return []
+    results: list[dict] = []
+    seen: set[str] = set()
+    for pkg_name, version, summary in rows:
+        if pkg_name in seen:
+            continue
+        seen.add(pkg_name)
+        results.append({
+            "display_name": pkg_name,
+            "install_id": pkg_name,
+            "summary": summary or "",
+            "version": version,
+            "install_type": "epm",
+            "branch": branch,
+        })
+        if len(results) >= limit:
+            break
+    return results
+
+
+def package_sizes(names) -> dict[str, list[tuple[str, str, int, int]]]:
+    """Доступные в списках apt версии пакетов: имя → [(версия, arch, размер .rpm, размер после установки)]."""
+    names = sorted(set(names))
+    if not names or not available():
+        return {}
+    found: dict[str, list[tuple[str, str, int, int]]] = {}
+    try:
+        with _db_lock:
+            conn = _connect()
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                for name, version, arch, size, installed_size in conn.execute(
+                    "SELECT name, version, arch, size, installed_size FROM packages "
+                    f"WHERE name IN ({','.join('?' * len(chunk))})", chunk,
+                ):
+                    found.setdefault(name, []).append((version, arch, size, installed_size))
+    except sqlite3.Error as e:
+        if config.DEBUG:
+            print(f"[ALT Booster] Ошибка чтения индекса пакетов: {e}")
+        return {}
+    return found
+
+
+def _on_resources_changed(changed: frozenset[str]) -> None:
+    global _checked_at
+    if resources.PACKAGES not in changed or _conn is None:
+        return
+    # После apt-get update списки уже на диске — переиндексируем в фоне, а не при поиске.
+    _checked_at = 0.0
+    refresh_in_background()
+
+
+resources.subscribe(_on_resources_changed)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import secrets
+import shlex
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable
+
+from core import config
+from core.packages import InstallPreview, PrivilegedRunner, is_dist_upgrade_cmd
+
+APT_ARCHIVES_DIR = "/var/cache/apt/archives"
+FLATPAK_SYSTEM_REPO = "/var/lib/flatpak/repo"
+# Списки «до/после» держит root в своём каталоге: из каталога пользователя скрипт читает
+# только флаги cancel/keep (проверка существования), а не имена файлов для удаления.
+PREFETCH_STATE_DIR = "/var/cache/altbooster-prefetch"
+
+# Скрипт выполняется в root-shell: загрузка идёт в фоне, а отмена приходит файлом-флагом
+# в каталоге пользователя — прервать процесс root иначе нельзя, не убивая всю сессию pkexec.
+_RUN_TEMPLATE = """\
+W={workdir}
+R={statedir}
+mkdir -p -m 0700 {parent} || exit 1
+find {parent} -mindepth 1 -maxdepth 1 -mtime +1 -exec rm -rf -- {{}} + 2>/dev/null
+rm -rf -- "$R"
+mkdir -m 0700 "$R" || exit 1
+{snapshot} > "$R/before" 2>/dev/null
+{fetch} >/dev/null 2>&1 &
+pid=$!
+while kill -0 $pid 2>/dev/null; do
+    if [ -e "$W/cancel" ]; then kill $pid 2>/dev/null; break; fi
+    sleep 0.3
+done
+wait $pid
+rc=$?
+{snapshot} 2>/dev/null | grep -vxF -f "$R/before" {filter}> "$R/fetched" || true
+if [ -e "$W/cancel" ]; then
+{cleanup}
+    rm -rf -- "$R"
+    exit 1
+fi
+if [ -e "$W/keep" ]; then rm -rf -- "$R"; fi
+exit $rc
+"""
+
+# Имена из списка — только файлы прямо в каталоге архивов, без «/» и скрытых.
+_APT_CLEANUP = """\
+    while IFS= read -r f; do
+        case "$f" in ""|*/*|.*) continue ;; esac
+        rm -f -- {archives}/"$f"
+    done < "$R/fetched"
+    rm -f {archives}/partial/*"""
+
+_FLATPAK_CLEANUP = """\
+    if command -v ostree >/dev/null; then
+        while IFS= read -r ref; do
+            case "$ref" in ""|-*|*..*) continue ;; esac
+            ostree --repo={repo} refs --delete "$ref"
+        done < "$R/fetched"
+        ostree --repo={repo} prune --refs-only >/dev/null 2>&1
+    fi"""
+
+
+def _fetch_command(preview: InstallPreview, cmd: list[str]) -> tuple[str, list[str]] | None:
+    """(вид, команда только загрузки) для превью или None, если загружать нечего."""
+    if preview.dry_run_failed:
+        return None
+    if preview.source_type == "apt" and (preview.new_packages or preview.upgraded_packages):
+        if is_dist_upgrade_cmd(cmd):
+            return "apt", ["env", "LC_ALL=C", "apt-get", "-d", "-y", "-q", "dist-upgrade"]
+        if preview.package_names:
+            return "apt", ["env", "LC_ALL=C", "apt-get", "-d", "-y", "-q", "install",
+                           *preview.package_names]
+        return None
+    if preview.source_type == "flatpak" and preview.new_packages:
+        args = [a for a in cmd[2:] if not a.startswith("-")]
+        if len(args) >= 2:
+            return "flatpak", ["flatpak", "install", "--system", "--no-deploy", "-y",
+                               "--noninteractive", *args]
+    return None
+
+
+class Prefetch:
+    """Загрузка пакетов, пока пользователь читает окно предпросмотра установки.
+
+    keep() — установка подтверждена, загруженное остаётся в кэше; cancel() — прервать
+    загрузку и удалить то, что успело скачаться. Оба вызова идемпотентны.
+    """
+
+    def __init__(self, kind: str, fetch_cmd: list[str], runner: PrivilegedRunner):
+        self.kind = kind
+        self._fetch_cmd = fetch_cmd
+        self._runner = runner
+        self._workdir = Path(tempfile.mkdtemp(prefix="altbooster-prefetch-"))
+        self._statedir = f"{PREFETCH_STATE_DIR}/{secrets.token_hex(8)}"
+        self._lock = threading.Lock()
+        self._running = False
+        self._finished = False
+        self._decided = False
+        self.ok: bool | None = None
+
+    @classmethod
+    def for_preview(
+        cls, preview: InstallPreview, cmd: list[str], runner: PrivilegedRunner | None,
+    ) -> Prefetch | None:
+        if runner is None:
+            return None
+        planned = _fetch_command(preview, cmd)
+        if planned is None:
+            return None
+        return cls(planned[0], planned[1], runner)
+
+    def _cleanup_script(self) -> str:
+        if self.kind == "apt":
+            return _APT_CLEANUP.format(archives=APT_ARCHIVES_DIR)
+        return _FLATPAK_CLEANUP.format(repo=FLATPAK_SYSTEM_REPO)
+
+    def _script(self) -> str:
+        if self.kind == "apt":
+            snapshot = f"ls -1 {APT_ARCHIVES_DIR}"
+            flt = "| grep '\\.rpm$' "
+        else:
+            snapshot = f"ostree --repo={FLATPAK_SYSTEM_REPO} refs"
+            flt = ""
+        return _RUN_TEMPLATE.format(
+            workdir=shlex.quote(str(self._workdir)),
+            statedir=shlex.quote(self._statedir),
+            parent=shlex.quote(PREFETCH_STATE_DIR),
+            snapshot=snapshot,
+            fetch=shlex.join(self._fetch_cmd),
+            filter=flt,
+            cleanup=self._cleanup_script(),
+        )
+
+    def start(self, on_done: Callable[[bool], None] | None = None) -> None:
+        """on_done(ok) вызывается из рабочего потока, если загрузку не отменили."""
+        with self._lock:
+            if self._running or self._decided:
+                return
+            self._running = True
+
+        def _worker():
+            try:
+                ok = self._runner(["bash", "-c", self._script()], lambda _line: None)
+            except Exception:
+                ok = False
+            with self._lock:
+                self.ok = ok
+                self._finished = True
+                decided = self._decided
+                cancelled = (self._workdir / "cancel").exists()
+            if config.DEBUG:
+                print(f"[ALT Booster] Предзагрузка {self.kind}: {'готово' if ok else 'не удалась'}")
+            if decided:
+                # Отмена во время загрузки уже обработана скриптом, подтверждение чистить не требует.
+                self._remove_workdir()
+            if not cancelled and on_done is not None:
+                on_done(ok)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def keep(self) -> None:
+        with self._lock:
+            if self._decided:
+                return
+            self._decided = True
+            running, finished = self._running, self._finished
+            if running and not finished:
+                # Скрипт увидит флаг в конце и сам уберёт список скачанного;
+                # установка подождёт загрузку в очереди root-shell.
+                self._touch_flag("keep")
+                return
+        if not running:
+            self._remove_workdir()
+            return
+        self._run_in_background(f"rm -rf -- {shlex.quote(self._statedir)}\n")
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._decided:
+                return
+            self._decided = True
+            running, finished = self._running, self._finished
+            if not running:
+                self._remove_workdir()
+                return
+            if not finished:
+                # Скрипт сам остановит загрузку и уберёт скачанное.
+                self._touch_flag("cancel")
+                return
+        statedir = shlex.quote(self._statedir)
+        self._run_in_background(
+            f"R={statedir}\n"
+            '[ -d "$R" ] || exit 0\n'
+            f"{self._cleanup_script()}\n"
+            'rm -rf -- "$R"\n'
+        )
+
+    def _touch_flag(self, name: str) -> None:
+        try:
+            (self._workdir / name).touch()
+        except OSError:
+            pass
+
+    def _run_in_background(self, script: str) -> None:
+        def _worker():
+            try:
+                self._runner(["bash", "-c", script], lambda _line: None)
+            except Exception:
+                pass
+            self._remove_workdir()
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _remove_workdir(self) -> None:
+        shutil.rmtree(self._workdir, ignore_errors=True)
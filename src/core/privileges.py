@@ -3,16 +3,14 @@ from __future__ import annotations
 import os
 import re
 import shlex
-import shutil
 import subprocess
 import threading
 import time
 import uuid
 from typing import Callable, Sequence
 
-from gi.repository import GLib
-
-from core import config
+from core import config, pathindex, resources
+from core.watchdog import begin_job, idle_add
 
 OnLine = Callable[[str], None]
 OnDone = Callable[[bool], None]
@@ -20,7 +18,7 @@ OnDone = Callable[[bool], None]
 _current_proc: subprocess.Popen | None = None
 _current_proc_lock = threading.Lock()
 
-_stdbuf: list[str] = ["stdbuf", "-oL"] if shutil.which("stdbuf") else []
+_stdbuf: list[str] = ["stdbuf", "-oL"] if pathindex.which("stdbuf") else []
 
 _pkexec_shell_proc: subprocess.Popen | None = None
 _pkexec_shell_lock = threading.Lock()
@@ -132,12 +130,12 @@ def _wait_for_apt_lock(on_line: OnLine | None = None, timeout: int = 60) -> bool
             return True
         if on_line:
             if attempt == 0:
-                GLib.idle_add(
+                idle_add(
                     on_line,
                     "⏳ Пакетный менеджер занят другим процессом (возможно, GNOME Software или PackageKit обновляет базу в фоне). Ожидание освобождения...\n",
                 )
             else:
-                GLib.idle_add(
+                idle_add(
                     on_line,
                     f"⏳ Ожидание... ({attempt * 5} с)\n",
                 )
@@ -193,9 +191,10 @@ def _wrap_epm_auto_install(cmd: Sequence[str]) -> Sequence[str]:
 def _run_pkexec(cmd: Sequence[str], on_line: OnLine | None, on_done: OnDone) -> None:
     def _emit(line: str) -> None:
         if on_line is not None:
-            GLib.idle_add(on_line, line)
+            idle_add(on_line, line)
 
     def _worker() -> None:
+        begin_job(f"pkexec {cmd[0] if cmd else ''}".strip())
         check_lock = False
         if cmd:
             if cmd[0] in ("apt", "apt-get", "flatpak", "epm", "epmi"):
@@ -211,7 +210,7 @@ def _run_pkexec(cmd: Sequence[str], on_line: OnLine | None, on_done: OnDone) ->
 
             if not proc or proc.poll() is not None:
                 _emit("⚠  Root-сессия не активна (pkexec).\n")
-                GLib.idle_add(on_done, False)
+                idle_add(on_done, False)
                 return
 
             marker = f"__AB_EXIT__{uuid.uuid4().hex}__"
@@ -247,7 +246,8 @@ def _run_pkexec(cmd: Sequence[str], on_line: OnLine | None, on_done: OnDone) ->
             except (BrokenPipeError, OSError):
                 _emit("⚠  Root-сессия была прервана.\n")
 
-            GLib.idle_add(on_done, success)
+            idle_add(on_done, success)
+        resources.notify_changed(resources.resources_of_command(cmd))
 
     threading.Thread(target=_worker, daemon=True).start()
 
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+# (доля 0..1 или None, строка 1, строка 2, строка 3) для плавающей карточки операции
+ProgressUpdate = tuple[float | None, str, str, str]
+ProgressParser = Callable[[str], ProgressUpdate | None]
+
+PROGRESS_BORG = "borg"
+PROGRESS_RSYNC = "rsync"
+PROGRESS_BTRFS = "btrfs"
+PROGRESS_APT = "apt"
+PROGRESS_FLATPAK = "flatpak"
+PROGRESS_LINES = "lines"
+PROGRESS_NONE = "none"
+
+# borg create --progress: "2.88 GB O 1.70 GB C 1.60 GB D 14576 N path/to/file"
+# borg extract --progress / старые сборки: "78.9% Extracting: path"
+_BORG_RE = re.compile(
+    r"^(?:([\d.,]+\s+\S+)\s+O\s+([\d.,]+\s+\S+)\s+C\s+([\d.,]+\s+\S+)\s+D\s+"
+    r"(?:[\d.,]+\s+%\s+)?"
+    r"(\d+)\s+N\s*(.*)"
+    r"|(\d+(?:\.\d+)?)\s*%\s*(.*))$"
+)
+
+# rsync --info=progress2:  "  1,234,567  67%  45.20MB/s    0:01:23 ..."
+_RSYNC_RE = re.compile(r"(\d+)%\s+([\d.]+\s*[KMGTkm]?B/s)\s+(\d+:\d+:\d+)")
+
+# apt-get: "Get:12 http://ftp.altlinux.org p11/branch/x86_64 classic pkg 1.0-alt1 [68.1MB]"
+# rpm:     "firefox-128.0-alt1    ################################ [ 45%]"
+_APT_RE = re.compile(
+    r"^(?:Get:\d+\s+\S+\s+(.*?)(?:\s+\[([^\]]+)\])?"
+    r"|(\S.*?)\s+#*\s*\[\s*(\d+)%\])$"
+)
+
+# flatpak: "Installing 1/3… ████▌      45%  2.1 MB/s  00:12"
+_FLATPAK_RE = re.compile(
+    r"^(.*?)[\s▀-▟]*(\d{1,3})%"
+    r"(?:\s+([\d.,]+\s*[kKMG]?B/s))?"
+    r"(?:\s+(\d+:\d+(?::\d+)?))?"
+)
+
+# Любая другая задача: "... 45% ..." / "45.5% ETA 0:12"
+_PERCENT_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*%"
+    r"(?:.*?\b(?:ETA|осталось|remaining)\s*[:.]?\s*([^\n\r]{1,48}))?",
+    re.IGNORECASE,
+)
+
+_SHORT_LINE_MAX = 80
+
+
+def normalize_borg_progress_path(path: str) -> str:
+    p = (path or "").strip()
+    if not p or p == "-":
+        return ""
+    if p.startswith("/"):
+        return p
+    if p.startswith(("home/", "var/", "usr/", "mnt/", "media/", "run/")):
+        return "/" + p
+    return p
+
+
+def _parse_borg(line: str) -> ProgressUpdate | None:
+    m = _BORG_RE.match(line)
+    if m is None:
+        return None
+    o_s, c_s, d_s, n_raw, path_raw, pct_raw, rest = m.groups()
+    if pct_raw is not None:
+        pct = float(pct_raw) / 100.0
+        return pct, f"{int(pct * 100)}%", rest.strip(), ""
+    try:
+        n_fmt = f"{int(n_raw):,}".replace(",", " ")
+    except ValueError:
+        n_fmt = n_raw
+    path = normalize_borg_progress_path(path_raw)
+    return (
+        None,
+        f"Исходно {o_s}  ·  Сжато {c_s}  ·  В репозитории {d_s}",
+        f"Файлов обработано: {n_fmt}",
+        f"Сейчас: {path}" if path else "",
+    )
+
+
+def _parse_rsync(line: str) -> ProgressUpdate | None:
+    m = _RSYNC_RE.search(line)
+    if m is None:
+        return None
+    pct = int(m.group(1)) / 100.0
+    return pct, f"{int(pct * 100)}%  ·  {m.group(2)}  ·  осталось {m.group(3)}", "", ""
+
+
+def _parse_short_line(line: str) -> ProgressUpdate | None:
+    if line and len(line) < _SHORT_LINE_MAX:
+        return None, line, "", ""
+    return None
+
+
+def _parse_lines(line: str) -> ProgressUpdate | None:
+    """Формат по умолчанию: процент из любой строки, иначе короткая строка как есть."""
+    m = _PERCENT_RE.search(line) if "%" in line else None
+    if m is None:
+        return _parse_short_line(line)
+    pct = min(float(m.group(1)), 100.0) / 100.0
+    eta = f"  ·  осталось ~{m.group(2).strip()}" if m.group(2) else ""
+    return pct, f"{int(pct * 100)}%{eta}", "", ""
+
+
+def _parse_apt(line: str) -> ProgressUpdate | None:
+    m = _APT_RE.match(line)
+    if m is None:
+        return _parse_lines(line)
+    what, size, pkg, pct_raw = m.groups()
+    if pct_raw is not None:
+        pct = int(pct_raw) / 100.0
+        return pct, f"{pct_raw}%  ·  {pkg}", "", ""
+    return None, f"Загрузка: {what}", size or "", ""
+
+
+def _parse_flatpak(line: str) -> ProgressUpdate | None:
+    m = _FLATPAK_RE.match(line)
+    if m is None:
+        return _parse_lines(line)
+    op, pct_raw, speed, eta = m.groups()
+    pct = min(int(pct_raw), 100) / 100.0
+    parts = [f"{int(pct * 100)}%"]
+    if speed:
+        parts.append(speed)
+    if eta:
+        parts.append(f"осталось {eta}")
+    return pct, "  ·  ".join(parts), op.strip(" …."), ""
+
+
+_PARSERS: dict[str, ProgressParser] = {
+    PROGRESS_BORG: _parse_borg,
+    PROGRESS_RSYNC: _parse_rsync,
+    PROGRESS_BTRFS: _parse_short_line,
+    PROGRESS_APT: _parse_apt,
+    PROGRESS_FLATPAK: _parse_flatpak,
+    PROGRESS_LINES: _parse_lines,
+}
+
+
+def get_progress_parser(fmt: str) -> ProgressParser | None:
+    """Парсер строк лога для формата прогресса задачи; None — строки не разбираются."""
+    return _PARSERS.get(fmt)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Sequence
+
+# Классы ресурсов, которые меняют фоновые задачи и от которых зависят проверки состояния.
+PACKAGES = "packages"
+FLATPAK = "flatpak"
+SERVICES = "services"
+SETTINGS = "settings"
+FILES = "files"
+ALL = frozenset({PACKAGES, FLATPAK, SERVICES, SETTINGS, FILES})
+
+_COMMAND_RESOURCES: dict[str, frozenset[str]] = {
+    "epm": frozenset({PACKAGES, FILES}),
+    "epmi": frozenset({PACKAGES, FILES}),
+    "apt-get": frozenset({PACKAGES, FILES}),
+    "apt": frozenset({PACKAGES, FILES}),
+    "rpm": frozenset({PACKAGES, FILES}),
+    "flatpak": frozenset({FLATPAK}),
+    "systemctl": frozenset({SERVICES}),
+    "gsettings": frozenset({SETTINGS}),
+    "dconf": frozenset({SETTINGS}),
+}
+
+Listener = Callable[[frozenset[str]], None]
+_listeners: list[Listener] = []
+_lock = threading.Lock()
+
+
+def resources_of_command(cmd: Sequence[str]) -> frozenset[str]:
+    """Классы ресурсов, которые может изменить команда; неизвестная команда — все классы."""
+    found: set[str] = set()
+    for part in cmd:
+        for word in str(part).split():
+            found |= _COMMAND_RESOURCES.get(os.path.basename(word.strip("\"';&|()")), frozenset())
+    return frozenset(found) if found else ALL
+
+
+def subscribe(listener: Listener) -> None:
+    """Слушатель вызывается из рабочего потока задачи — в GTK переходить через idle_add."""
+    with _lock:
+        _listeners.append(listener)
+
+
+def notify_changed(resources: frozenset[str]) -> None:
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(resources)
+        except Exception as e:
+            print(f"[ALT Booster] Ошибка обработчика изменения ресурсов: {e}")
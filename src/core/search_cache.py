@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from core import config, memprofile
+from core.state_store import connect_private
+
+SEARCH_CACHE_DB = config.CONFIG_DIR / "search_cache.db"
+
+# Срок свежести результатов по ветке/источнику; устаревшие отдаются сразу и обновляются в фоне.
+_TTL_S: dict[str, int] = {
+    "p11": 6 * 3600,
+    "sisyphus": 3600,
+    "flathub": 3 * 3600,
+}
+_DEFAULT_TTL_S = 3600
+_MEMORY_ENTRIES = 64
+_DISK_ENTRIES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search (
+    source        TEXT NOT NULL,
+    branch        TEXT NOT NULL,
+    query         TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    etag          TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    results       TEXT NOT NULL,
+    PRIMARY KEY (source, branch, query)
+);
+"""
+
+# (результаты или None при 304 Not Modified, ETag, Last-Modified)
+FetchResult = tuple[list[dict] | None, str, str]
+# fetch(etag, last_modified) — сетевой запрос с условными заголовками
+Fetcher = Callable[[str, str], FetchResult]
+Key = tuple[str, str, str]
+
+_memory: OrderedDict[Key, dict] = OrderedDict()
+_refreshing: set[Key] = set()
+_lock = threading.Lock()
+_db_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = connect_private(SEARCH_CACHE_DB)
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def _disk_get(key: Key) -> dict | None:
+    try:
+        with _db_lock:
+            row = _connect().execute(
+                "SELECT fetched_at, etag, last_modified, results FROM search "
+                "WHERE source = ? AND branch = ? AND query = ?", key,
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fetched_at": row[0], "etag": row[1], "last_modified": row[2],
+                "results": json.loads(row[3])}
+    except (sqlite3.Error, OSError, json.JSONDecodeError):
+        return None
+
+
+def _disk_put(key: Key, entry: dict) -> None:
+    try:
+        with _db_lock:
+            conn = _connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO search VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, entry["fetched_at"], entry["etag"], entry["last_modified"],
+                     json.dumps(entry["results"], ensure_ascii=False)),
+                )
+                conn.execute(
+                    "DELETE FROM search WHERE rowid NOT IN "
+                    "(SELECT rowid FROM search ORDER BY fetched_at DESC LIMIT ?)", (_DISK_ENTRIES,),
+                )
+    except (sqlite3.Error, OSError) as e:
+        print(f"[ALT Booster] Не удалось сохранить кэш поиска пакетов: {e}")
+
+
+def _remember(key: Key, entry: dict) -> None:
+    with _lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > _MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _lookup(key: Key) -> dict | None:
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+            return entry
+    entry = _disk_get(key)
+    if entry is not None:
+        _remember(key, entry)
+    return entry
+
+
+def _store(key: Key, fetched: FetchResult, previous: dict | None) -> dict:
+    results, etag, last_modified = fetched
+    if results is None:
+        if previous is None:
+            raise ValueError("304 без закэшированного ответа")
+        results = previous["results"]
+    entry = {"fetched_at": time.time(), "etag": etag or "", "last_modified": last_modified or "",
+             "results": results}
+    _remember(key, entry)
+    _disk_put(key, entry)
+    return entry
+
+
+def _copy(results: list[dict]) -> list[dict]:
+    return [dict(r) for r in results]
+
+
+def _refresh(
+    key: Key, fetch: Fetcher, stale: dict, on_refresh: Callable[[list[dict]], None] | None,
+) -> None:
+    try:
+        entry = _store(key, fetch(stale["etag"], stale["last_modified"]), stale)
+        if on_refresh is not None and entry["results"] != stale["results"]:
+            on_refresh(_copy(entry["results"]))
+    except Exception as e:
+        if config.DEBUG:
+            print(f"[ALT Booster] Фоновое обновление поиска {key}: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
+def cached_search(
+    source: str,
+    branch: str,
+    query: str,
+    fetch: Fetcher,
+    on_refresh: Callable[[list[dict]], None] | None = None,
+) -> list[dict]:
+    """Результаты поиска из кэша (память → диск) или из сети.
+
+    Устаревшая запись возвращается сразу, а в фоне перепроверяется условным запросом;
+    если результаты изменились, вызывается on_refresh (из рабочего потока).
+    """
+    key = (source, branch, normalize_query(query))
+    entry = _lookup(key)
+    if entry is None:
+        return _copy(_store(key, fetch("", ""), None)["results"])
+    if time.time() - entry["fetched_at"] >= _TTL_S.get(branch, _DEFAULT_TTL_S):
+        with _lock:
+            start = key not in _refreshing
+            _refreshing.add(key)
+        if start:
+            threading.Thread(
+                target=_refresh, args=(key, fetch, entry, on_refresh), daemon=True,
+            ).start()
+    return _copy(entry["results"])
+
+
+def _memory_size() -> tuple[int, int | None]:
+    with _lock:
+        entries = list(_memory.values())
+    return len(entries), memprofile.approx_sizeof(entries)
+
+
+memprofile.register_cache("Кэш поиска пакетов", _memory_size)
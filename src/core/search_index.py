@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import re
+from typing import Iterable, Sequence
+
+WEIGHT_TITLE = 3.0
+WEIGHT_KEYWORDS = 2.0
+WEIGHT_SUBTITLE = 1.0
+
+_MATCH_EXACT = 1.0
+_MATCH_PREFIX = 0.8
+_MATCH_INFIX = 0.5
+_MATCH_FUZZY = 0.4
+_LAYOUT_PENALTY = 0.9
+_TITLE_PREFIX_BONUS = 1.5
+
+_CACHE_MAX = 64
+# Сколько токенов-кандидатов (по числу общих триграмм) проверять расстоянием правки.
+_FUZZY_CANDIDATES_MAX = 200
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Одна и та же клавиша в раскладках ЙЦУКЕН и QWERTY: «ашкуащч» → «firefox».
+_RU_KEYS = "йцукенгшщзхъфывапролджэячсмитьбюё"
+_EN_KEYS = "qwertyuiop[]asdfghjkl;'zxcvbnm,.`"
+_LAYOUT_SWAP = str.maketrans(_RU_KEYS + _EN_KEYS, _EN_KEYS + _RU_KEYS)
+
+
+def normalize_text(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def swap_layout(text: str) -> str:
+    return text.lower().translate(_LAYOUT_SWAP)
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _max_typos(fragment: str) -> int:
+    n = len(fragment)
+    if n < 4:
+        return 0
+    if n < 8:
+        return 1
+    return 2
+
+
+def prefix_edit_distance(query: str, token: str, max_d: int) -> int:
+    """Минимальное расстояние (Дамерау–Левенштейн) от query до любого префикса token, с отсечкой."""
+    token = token[:len(query) + max_d]
+    prev2: list[int] = []
+    prev = list(range(len(token) + 1))
+    for i, qc in enumerate(query, 1):
+        cur = [i] + [0] * len(token)
+        row_min = i
+        for j, tc in enumerate(token, 1):
+            cost = 0 if qc == tc else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and qc == token[j - 2] and query[i - 2] == tc:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > max_d:
+            return max_d + 1
+        prev2, prev = prev, cur
+    return min(prev)
+
+
+class SearchIndex:
+    """Скомпилированный индекс глобального поиска: токены, префиксы, триграммы и веса полей."""
+
+    def __init__(self, items: Iterable):
+        # Элементы с полями title, subtitle и keywords (например, GlobalSearchItem).
+        self.items: list = list(items)
+        self._titles: list[str] = []
+        postings: dict[str, dict[int, float]] = {}
+
+        for idx, item in enumerate(self.items):
+            self._titles.append(normalize_text(item.title))
+            fields = (
+                (item.title, WEIGHT_TITLE),
+                (" ".join(item.keywords), WEIGHT_KEYWORDS),
+                (item.subtitle, WEIGHT_SUBTITLE),
+            )
+            for text, weight in fields:
+                for tok in tokenize(text):
+                    per_item = postings.setdefault(tok, {})
+                    if per_item.get(idx, 0.0) < weight:
+                        per_item[idx] = weight
+
+        # Порядок при равном счёте: короче заголовок — выше; затем порядок добавления.
+        by_length = sorted(range(len(self.items)), key=lambda idx: (len(self._titles[idx]), idx))
+        self._tiebreak: list[int] = [0] * len(self.items)
+        for pos, idx in enumerate(by_length):
+            self._tiebreak[idx] = pos
+        self._sorted_titles: list[tuple[str, int]] = sorted(
+            (title, idx) for idx, title in enumerate(self._titles)
+        )
+
+        self._vocab: list[str] = sorted(postings)
+        self._postings: list[dict[int, float]] = [postings[t] for t in self._vocab]
+        self._token_id: dict[str, int] = {t: i for i, t in enumerate(self._vocab)}
+        # Словарь одной строкой: короткие подстроки ищутся str.find, а не циклом по токенам.
+        self._vocab_blob = "\n".join(self._vocab)
+        self._vocab_starts: list[int] = []
+        pos = 0
+        for tok in self._vocab:
+            self._vocab_starts.append(pos)
+            pos += len(tok) + 1
+
+        trigram_map: dict[str, list[int]] = {}
+        for tid, tok in enumerate(self._vocab):
+            for tri in _trigrams(tok):
+                trigram_map.setdefault(tri, []).append(tid)
+        self._trigrams: dict[str, frozenset[int]] = {
+            k: frozenset(v) for k, v in trigram_map.items()
+        }
+        self._cache: dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _prefix_range(self, fragment: str) -> range:
+        lo = bisect.bisect_left(self._vocab, fragment)
+        hi = bisect.bisect_left(self._vocab, fragment + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def _direct_matches(self, fragment: str) -> dict[int, float]:
+        scores: dict[int, float] = {}
+
+        def _add(tid: int, factor: float) -> None:
+            for idx, weight in self._postings[tid].items():
+                s = weight * factor
+                if scores.get(idx, 0.0) < s:
+                    scores[idx] = s
+
+        for tid in self._prefix_range(fragment):
+            exact = self._vocab[tid] == fragment
+            _add(tid, _MATCH_EXACT if exact else _MATCH_PREFIX)
+
+        if len(fragment) >= 3:
+            tris = sorted(_trigrams(fragment), key=lambda t: len(self._trigrams.get(t, ())))
+            candidates = set(self._trigrams.get(tris[0], ()))
+            for tri in tris[1:]:
+                if not candidates:
+                    break
+                candidates &= self._trigrams.get(tri, frozenset())
+            for tid in candidates:
+                tok = self._vocab[tid]
+                if not tok.startswith(fragment) and fragment in tok:
+                    _add(tid, _MATCH_INFIX)
+        else:
+            # Короче триграммы — подстрока ищется по всему словарю, как прежде в filter_items.
+            blob, starts = self._vocab_blob, self._vocab_starts
+            pos = blob.find(fragment)
+            while pos >= 0:
+                tid = bisect.bisect_right(starts, pos) - 1
+                if starts[tid] != pos:
+                    _add(tid, _MATCH_INFIX)
+                if tid + 1 >= len(starts):
+                    break
+                pos = blob.find(fragment, starts[tid + 1])
+        return scores
+
+    def _fuzzy_matches(self, fragment: str) -> dict[int, float]:
+        max_d = _max_typos(fragment)
+        scores: dict[int, float] = {}
+        if max_d == 0:
+            return scores
+        tris = _trigrams(fragment)
+        hits: dict[int, int] = {}
+        for tri in tris:
+            for tid in self._trigrams.get(tri, ()):
+                hits[tid] = hits.get(tid, 0) + 1
+        # Одна правка портит не больше трёх триграмм: токены с меньшим числом общих
+        # триграмм заведомо дальше max_d; из остальных проверяем самые похожие.
+        min_hits = len(tris) - 3 * max_d
+        candidates = [tid for tid, n in hits.items() if n >= min_hits]
+        if len(candidates) > _FUZZY_CANDIDATES_MAX:
+            candidates = heapq.nlargest(_FUZZY_CANDIDATES_MAX, candidates, key=hits.__getitem__)
+        for tid in candidates:
+            d = prefix_edit_distance(fragment, self._vocab[tid], max_d)
+            if d > max_d:
+                continue
+            factor = _MATCH_FUZZY / (1 + d)
+            for idx, weight in self._postings[tid].items():
+                s = weight * factor
+                if scores.get(idx, 0.0) < s:
+                    scores[idx] = s
+        return scores
+
+    def _fragment_matches(self, fragment: str) -> dict[int, float]:
+        scores = self._direct_matches(fragment)
+        swapped = "".join(_TOKEN_RE.findall(swap_layout(fragment)))
+        if swapped and swapped != fragment:
+            for idx, s in self._direct_matches(swapped).items():
+                s *= _LAYOUT_PENALTY
+                if scores.get(idx, 0.0) < s:
+                    scores[idx] = s
+        if not scores:
+            scores = self._fuzzy_matches(fragment)
+        return scores
+
+    def search(self, query: str, limit: int | None = None) -> list:
+        q = normalize_text(query).strip()
+        fragments = _TOKEN_RE.findall(q)
+        if not fragments:
+            return []
+        key = " ".join(fragments)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._rank(fragments, q)
+            if len(self._cache) >= _CACHE_MAX:
+                self._cache.clear()
+            self._cache[key] = cached
+        return cached if limit is None else cached[:limit]
+
+    def _rank(self, fragments: Sequence[str], query: str) -> list:
+        ordered = sorted(set(fragments), key=len, reverse=True)
+        total = self._fragment_matches(ordered[0])
+        for fragment in ordered[1:]:
+            if not total:
+                break
+            matches = self._fragment_matches(fragment)
+            total = {idx: s + matches[idx] for idx, s in total.items() if idx in matches}
+        if not total:
+            return []
+        lo = bisect.bisect_left(self._sorted_titles, (query,))
+        hi = bisect.bisect_left(self._sorted_titles, (query + "\U0010ffff",), lo)
+        for _title, idx in self._sorted_titles[lo:hi]:
+            if idx in total:
+                total[idx] += _TITLE_PREFIX_BONUS
+        # Два устойчивых прохода со встроенными ключами вместо ключа-кортежа на каждый элемент.
+        order = sorted(total, key=self._tiebreak.__getitem__)
+        order.sort(key=total.__getitem__, reverse=True)
+        items = self.items
+        return [items[idx] for idx in order]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from core import config
+
+# Пакеты приложения: по ним ищется вызывающий кадр, второй компонент имени модуля — «функция» приложения.
+_APP_PACKAGES = ("core.", "tabs.", "ui.")
+_SKIP_MODULES = frozenset({"subprocess", __name__})
+
+
+@dataclass
+class SpawnRecord:
+    phase: str
+    feature: str
+    argv0: str
+    caller: str
+    duration_s: float
+    returncode: int | None
+
+
+_OriginalPopen = subprocess.Popen
+_records: list[SpawnRecord] = []
+_lock = threading.Lock()
+_phase = "startup"
+_active = False
+
+
+def _argv0(args, shell: bool) -> str:
+    if isinstance(args, (str, bytes)):
+        text = os.fsdecode(args)
+        try:
+            parts = shlex.split(text)
+        except ValueError:
+            parts = text.split()
+        first = parts[0] if parts else text
+    else:
+        seq = list(args)
+        first = os.fsdecode(seq[0]) if seq else "?"
+    name = os.path.basename(first)
+    return f"sh:{name}" if shell else name
+
+
+def _caller() -> tuple[str, str]:
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in _SKIP_MODULES:
+            where = f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+            if module.startswith(_APP_PACKAGES):
+                return module.split(".")[1], where
+            if fallback is None:
+                fallback = (module.split(".")[0] or "?", where)
+        frame = frame.f_back
+    return fallback or ("?", "?")
+
+
+class _AccountedPopen(_OriginalPopen):
+    """Popen, который запоминает исполняемый файл, место вызова, длительность и код возврата."""
+
+    def __init__(self, args, *a, **kw):
+        self._ab_started = time.monotonic()
+        self._ab_feature, self._ab_caller = _caller()
+        self._ab_argv0 = _argv0(args, bool(kw.get("shell", False)))
+        self._ab_recorded = False
+        try:
+            super().__init__(args, *a, **kw)
+        except OSError:
+            self._ab_record(None)
+            raise
+
+    def _ab_record(self, returncode: int | None) -> None:
+        if self._ab_recorded:
+            return
+        self._ab_recorded = True
+        rec = SpawnRecord(
+            phase=_phase,
+            feature=self._ab_feature,
+            argv0=self._ab_argv0,
+            caller=self._ab_caller,
+            duration_s=round(time.monotonic() - self._ab_started, 4),
+            returncode=returncode,
+        )
+        with _lock:
+            _records.append(rec)
+
+    def wait(self, timeout=None):
+        rc = super().wait(timeout)
+        self._ab_record(rc)
+        return rc
+
+    def poll(self):
+        rc = super().poll()
+        if rc is not None:
+            self._ab_record(rc)
+        return rc
+
+
+def install() -> None:
+    """Включить учёт дочерних процессов (режим отладки). Вызывать до импорта модулей UI."""
+    global _active
+    if _active or not config.DEBUG:
+        return
+    subprocess.Popen = _AccountedPopen
+    _active = True
+
+
+def is_active() -> bool:
+    return _active
+
+
+def set_phase(name: str) -> None:
+    global _phase
+    _phase = name
+
+
+def records(phase: str | None = None) -> list[SpawnRecord]:
+    with _lock:
+        return [r for r in _records if phase is None or r.phase == phase]
+
+
+def _top(counter: Counter, limit: int) -> str:
+    parts = [f"{n}× {name}" for name, n in counter.most_common(limit)]
+    if len(counter) > limit:
+        parts.append("…")
+    return ", ".join(parts)
+
+
+def summary(phase: str | None = None, limit: int = 8) -> str:
+    """Сводка для лога: «startup: процессов 94 — 38× rpm, 12× flatpak, …» и разбивка по функциям приложения."""
+    recs = records(phase)
+    title = phase or "всего"
+    if not recs:
+        return f"{title}: дочерних процессов не запускалось\n"
+    by_argv0 = Counter(r.argv0 for r in recs)
+    total_s = sum(r.duration_s for r in recs)
+    failed = sum(1 for r in recs if r.returncode not in (0, None))
+    lines = [f"{title}: процессов {len(recs)} ({total_s:.1f} с, с ошибкой {failed}) — {_top(by_argv0, limit)}"]
+    by_feature: dict[str, Counter] = {}
+    for r in recs:
+        by_feature.setdefault(r.feature, Counter())[r.argv0] += 1
+    for feature, counter in sorted(by_feature.items(), key=lambda kv: -sum(kv[1].values())):
+        lines.append(f"   {feature}: {sum(counter.values())} — {_top(counter, limit)}")
+    return "\n".join(lines) + "\n"
+
+
+def export_report(directory: Path | None = None) -> Path:
+    """Сохранить все записи о запусках в JSON; возвращает путь к файлу."""
+    directory = directory or config.CONFIG_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"spawns-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([asdict(r) for r in records()], f, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Префикс ключа → пространство имён (вкладка). Ключи без известного префикса попадают в "general".
+_NAMESPACE_PREFIXES: tuple[tuple[str, str], ...] = (
+    ("borg_", "timesync"),
+    ("btrfs_", "timesync"),
+    ("mirror_", "timesync"),
+    ("setting_", "setup"),
+    ("papirus_", "setup"),
+    ("app_", "apps"),
+    ("dv_", "davinci"),
+    ("amd_", "amd"),
+    ("lact_", "amd"),
+    ("clean_", "maintenance"),
+)
+
+NAMESPACE_GENERAL = "general"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    ns    TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def connect_private(path: Path) -> sqlite3.Connection:
+    """Соединение с БД в режиме WAL, доступной только владельцу.
+
+    Файл создаётся с правами 0600 до подключения: -wal и -shm sqlite создаёт с правами
+    основного файла. Права уже существующих файлов (от старых версий) поправляются.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.chmod(f"{path}{suffix}", 0o600)
+        except OSError:
+            pass
+    return conn
+
+
+def namespace_of(key: str) -> str:
+    for prefix, ns in _NAMESPACE_PREFIXES:
+        if key.startswith(prefix):
+            return ns
+    return NAMESPACE_GENERAL
+
+
+class StateStore:
+    """Хранилище состояния в SQLite (WAL): каждая запись — отдельная строка, изменения пишутся транзакцией."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = connect_private(self.path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def load(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT key, value FROM state").fetchall()
+        out: dict = {}
+        for key, raw in rows:
+            try:
+                out[key] = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+        return out
+
+    def write(self, changes: dict) -> None:
+        """Записать изменённые ключи одной транзакцией."""
+        upserts = [(namespace_of(k), k, json.dumps(v, ensure_ascii=False)) for k, v in changes.items()]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO state (ns, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value",
+                    upserts,
+                )
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if namespace is None:
+                    conn.execute("DELETE FROM state")
+                else:
+                    conn.execute("DELETE FROM state WHERE ns = ?", (namespace,))
+
+    def migrate_from_json(self, json_path: Path) -> bool:
+        """Однократный перенос state.json; исходный файл переименовывается в state.json.migrated."""
+        with self._lock:
+            conn = self._connect()
+            done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_json'").fetchone()
+        if done is not None:
+            return False
+        data: dict = {}
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                data = loaded
+        except (OSError, json.JSONDecodeError):
+            pass
+        upserts = [(namespace_of(k), k, json.dumps(v, ensure_ascii=False)) for k, v in data.items()]
+        with self._lock:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO state (ns, key, value) VALUES (?, ?, ?)", upserts,
+                )
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', '1')")
+        if data:
+            try:
+                os.replace(json_path, json_path.with_name(json_path.name + ".migrated"))
+            except OSError:
+                pass
+        return bool(data)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
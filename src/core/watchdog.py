@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import itertools
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+from core import config
+
+# Частота опроса главного цикла и порог, после которого колбэк считается медленным (один кадр 60 Гц).
+_TICK_MS = 10
+_SLOW_CALLBACK_MS = 16.0
+_STALL_LOG_MS = 100.0
+
+# Верхние границы корзин гистограмм, мс; последняя корзина — всё, что больше.
+HISTOGRAM_BOUNDS_MS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_active = False
+_lock = threading.Lock()
+_drift_hist = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+_callback_hist = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+# "модуль.функция" → [вызовов дольше порога, суммарно мс, максимум мс]
+_slow_origins: dict[str, list[float]] = {}
+_last_slow: str = ""
+_max_drift_ms = 0.0
+_started_at = 0.0
+_last_tick = 0.0
+
+_job_local = threading.local()
+_job_counter = itertools.count(1)
+
+
+def _glib():
+    import gi
+    gi.require_version("GLib", "2.0")
+    from gi.repository import GLib
+    return GLib
+
+
+def _bucket(ms: float) -> int:
+    for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if ms < bound:
+            return i
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+def _debug(msg: str) -> None:
+    print(f"[DEBUG] {msg}", file=sys.stderr)
+
+
+def begin_job(name: str) -> str:
+    """Пометить текущий рабочий поток идентификатором задачи для атрибуции его колбэков."""
+    job_id = f"{name}#{next(_job_counter)}"
+    _job_local.id = job_id
+    return job_id
+
+
+def _origin(func) -> str:
+    module = getattr(func, "__module__", None) or "?"
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+    return f"{module}.{name}"
+
+
+def _record_callback(func, job: str, elapsed_ms: float) -> None:
+    global _last_slow
+    with _lock:
+        _callback_hist[_bucket(elapsed_ms)] += 1
+        if elapsed_ms < _SLOW_CALLBACK_MS:
+            return
+        origin = _origin(func)
+        stat = _slow_origins.setdefault(origin, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += elapsed_ms
+        stat[2] = max(stat[2], elapsed_ms)
+        _last_slow = f"{origin} [{job}] {elapsed_ms:.1f} мс"
+    _debug(f"Медленный колбэк в главном цикле: {origin} ({elapsed_ms:.1f} мс, задача {job})")
+
+
+def idle_add(func, *args, **kwargs):
+    """GLib.idle_add; в режиме отладки с замером времени колбэка и указанием задачи-источника."""
+    GLib = _glib()
+    if not _active:
+        return GLib.idle_add(func, *args, **kwargs)
+    job = getattr(_job_local, "id", None) or threading.current_thread().name
+
+    def _timed(*a):
+        t0 = time.perf_counter()
+        try:
+            return func(*a)
+        finally:
+            _record_callback(func, job, (time.perf_counter() - t0) * 1000.0)
+
+    return GLib.idle_add(_timed, *args, **kwargs)
+
+
+def _tick() -> bool:
+    global _last_tick, _max_drift_ms
+    now = time.monotonic()
+    drift_ms = max(0.0, (now - _last_tick) * 1000.0 - _TICK_MS)
+    _last_tick = now
+    with _lock:
+        _drift_hist[_bucket(drift_ms)] += 1
+        _max_drift_ms = max(_max_drift_ms, drift_ms)
+        last_slow = _last_slow
+    if drift_ms >= _STALL_LOG_MS:
+        hint = f"; последний медленный колбэк: {last_slow}" if last_slow else ""
+        _debug(f"Главный цикл не отвечал {drift_ms:.0f} мс{hint}")
+    return True
+
+
+def start() -> None:
+    """Запустить сторожа главного цикла (только в режиме отладки)."""
+    global _active, _started_at, _last_tick
+    if _active or not config.DEBUG:
+        return
+    _active = True
+    _started_at = _last_tick = time.monotonic()
+    _glib().timeout_add(_TICK_MS, _tick)
+
+
+def is_active() -> bool:
+    return _active
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "uptime_s": round(time.monotonic() - _started_at, 1) if _active else 0.0,
+            "tick_ms": _TICK_MS,
+            "slow_callback_ms": _SLOW_CALLBACK_MS,
+            "bucket_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+            "loop_drift_histogram": list(_drift_hist),
+            "callback_histogram": list(_callback_hist),
+            "max_drift_ms": round(_max_drift_ms, 1),
+            "slow_callbacks": {
+                origin: {"count": int(c), "total_ms": round(total, 1), "max_ms": round(mx, 1)}
+                for origin, (c, total, mx) in sorted(
+                    _slow_origins.items(), key=lambda kv: kv[1][1], reverse=True
+                )
+            },
+        }
+
+
+def export_report(directory: Path | None = None) -> Path:
+    """Сохранить гистограммы задержек главного цикла в JSON; возвращает путь к файлу."""
+    directory = directory or config.CONFIG_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"mainloop-stalls-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    return path
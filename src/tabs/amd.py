@@ -14,7 +14,7 @@ from ui.common import load_module
 
 class AmdPage(DynamicPage):
     def __init__(self, log_fn):
-        super().__init__(load_module("amd"), log_fn)
+        super().__init__(load_module("amd"), log_fn, module_name="amd")
         self._log = log_fn
 
     def check_overclock(self):
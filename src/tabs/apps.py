@@ -2,13 +2,8 @@
 import json
 import os
 import shutil
-import subprocess
 import tempfile
 import threading
-import time
-import urllib.parse
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import gi
 gi.require_version("Gtk", "4.0")
@@ -17,15 +12,27 @@ from gi.repository import Adw, GLib, Gtk
 
 from core import backend
 from core import config
+from core import epm_play
+from core import net
+from core import pkgindex
+from core import search_cache
+from core.catalog import MODULES_DIR
+from core.checks import installed_flags, invalidate_app_detection_caches
+from core.packages import plan_bulk_install
+from core.progress import PROGRESS_APT, PROGRESS_FLATPAK
 from ui.widgets import (
     make_button, make_scrolled_page,
     make_status_icon, set_status_ok, set_status_error, clear_status, make_suffix_box,
-    scroll_child_into_view,
+    scroll_child_into_view, sync_children,
 )
-from ui.common import load_module, _MODULES_DIR
+from ui.common import load_module
 from ui.dialogs import AppEditDialog
 from ui.rows import AppRow
 
+# Порядок совпадает с выпадающим списком источников.
+_PKG_SOURCES = ("p11", "sisyphus", "epm_play", "flathub")
+_PKG_SOURCE_LABELS = {"flathub": "Flathub", "p11": "p11", "sisyphus": "Sisyphus", "epm_play": "EPM Play"}
+
 
 class AppsPage(Gtk.Box):
 
@@ -35,9 +42,13 @@ class AppsPage(Gtk.Box):
         self._rows = []
         self._group_checkboxes = []
         self._app_row_by_id: dict[str, AppRow] = {}
+        # Ключ группы → {"pg", "exp", "rows", "entries": {id: (отпечаток, AppRow)}, "grp"}
+        self._group_views: dict[str, dict] = {}
+        self._error_group = None
         self._busy = False
-        self._pkg_search_busy = False
-        self._system_json_path = _MODULES_DIR / "apps.json"
+        self._pkg_search_token = None
+        self._pkg_search_pending = 0
+        self._system_json_path = MODULES_DIR / "apps.json"
         self._json_path = config.CONFIG_DIR / "apps.json"
         self._data = {}
 
@@ -56,17 +67,30 @@ class AppsPage(Gtk.Box):
         self._btns_box.append(self._btn_all)
 
         self._pkg_search_groups = []
+        self._pkg_rows = {}
+        self._shown_search = None
         search_box = Gtk.Box(spacing=6)
         search_box.set_hexpand(True)
 
         self._branch_combo = Gtk.DropDown()
         self._branch_combo.set_model(Gtk.StringList.new(["p11", "Sisyphus", "epm play", "Flathub"]))
-        self._epm_play_cache = None
         self._branch_combo.set_selected(0)
         self._branch_combo.set_valign(Gtk.Align.CENTER)
         self._branch_combo.set_tooltip_text("Источник для поиска пакетов")
         search_box.append(self._branch_combo)
 
+        self._local_index_btn = Gtk.ToggleButton()
+        self._local_index_btn.set_icon_name("drive-harddisk-symbolic")
+        self._local_index_btn.add_css_class("flat")
+        self._local_index_btn.set_valign(Gtk.Align.CENTER)
+        self._local_index_btn.set_tooltip_text(
+            "Искать сначала в локальных списках apt (без сети).\n"
+            "Индекс строится из /var/lib/apt/lists и хранится в настройках ALT Booster"
+        )
+        self._local_index_btn.set_active(pkgindex.enabled())
+        self._local_index_btn.connect("toggled", lambda b: pkgindex.set_enabled(b.get_active()))
+        search_box.append(self._local_index_btn)
+
         self._search_entry = Gtk.Entry()
         self._search_entry.set_hexpand(True)
         self._search_entry.set_placeholder_text("Найти приложения в репозиториях и на Flathub")
@@ -129,8 +153,16 @@ class AppsPage(Gtk.Box):
 
         self.append(self._banner_revealer)
 
+        self._apps_heading = Gtk.Label()
+        self._apps_heading.set_markup("<b>Выбрать и установить приложения</b>")
+        self._apps_heading.set_halign(Gtk.Align.START)
+        self._apps_heading.set_margin_top(8)
+        self._apps_heading.set_margin_start(4)
+        self._apps_heading.set_margin_bottom(2)
+
         self._load_and_build()
         GLib.idle_add(self._refresh_btn_all)
+        pkgindex.refresh_in_background()
 
     def _update_reset_button_ui(self, is_default):
         if is_default:
@@ -151,33 +183,73 @@ class AppsPage(Gtk.Box):
                 self._banner_revealer.set_reveal_child(True)
 
     def _on_search_text_changed(self, entry, _):
+        # Новое нажатие клавиши бросает незавершённые запросы прошлого поиска.
+        self._cancel_pkg_search()
         if not entry.get_text():
+            self._shown_search = None
             self._clear_pkg_search_results()
 
     def _on_pkg_search(self, *_):
         text = self._search_entry.get_text().strip()
-        if not text or self._pkg_search_busy:
+        if not text:
             return
-        self._pkg_search_busy = True
-        self._branch_combo.set_sensitive(False)
+        self._cancel_pkg_search()
         clear_status(self._search_status)
         self._clear_pkg_search_results()
-        branch_map = {0: "p11", 1: "sisyphus", 2: "epm_play", 3: "flathub"}
-        branch = branch_map.get(self._branch_combo.get_selected(), "p11")
-        if branch == "epm_play":
-            self._epm_play_cache = None
-        threading.Thread(target=self._do_pkg_search, args=(text, branch), daemon=True).start()
+        branch = dict(enumerate(_PKG_SOURCES)).get(self._branch_combo.get_selected(), "p11")
+        self._shown_search = (text, branch)
+        token = threading.Event()
+        self._pkg_search_token = token
+        group = self._add_source_group(branch, False)
+        self._pkg_search_pending = 1
+        threading.Thread(
+            target=self._do_pkg_search, args=(token, text, branch, group), daemon=True,
+        ).start()
+
+    def _cancel_pkg_search(self):
+        if self._pkg_search_token is None:
+            return
+        self._pkg_search_token.set()
+        self._pkg_search_token = None
+        self._pkg_search_pending = 0
+        for group in [g for g in self._pkg_search_groups if g._pkg_loading]:
+            self._remove_pkg_group(group)
 
-    def _fetch_from_source(self, query, branch):
-        if branch == "flathub":
-            return self._fetch_flathub(query)
+    def _fetch_from_source(self, query, branch, on_refresh=None):
         if branch == "epm_play":
-            return self._search_epm_play(query)
-        params = urllib.parse.urlencode({"name": query, "branch": branch})
-        url = f"https://rdb.altlinux.org/api/site/find_packages?{params}"
-        req = urllib.request.Request(url, headers={"User-Agent": "ALTBooster/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
+            return epm_play.search(query)
+        if branch in pkgindex.branches():
+            # Списки apt этой ветки уже на диске — ищем по ним без сети.
+            local = pkgindex.search(query, branch)
+            if local:
+                return local
+        if branch == "flathub":
+            return search_cache.cached_search(
+                "flathub", branch, query,
+                lambda etag, modified: (self._fetch_flathub(query), "", ""),
+                on_refresh,
+            )
+        return search_cache.cached_search(
+            "rdb", branch, query,
+            lambda etag, modified: self._fetch_rdb(query, branch, etag, modified),
+            on_refresh,
+        )
+
+    def _fetch_rdb(self, query, branch, etag="", last_modified=""):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        resp = net.request(
+            "GET", "https://rdb.altlinux.org/api/site/find_packages",
+            params={"name": query, "branch": branch}, headers=headers,
+        )
+        if resp.status == 304:
+            return None, etag, last_modified
+        data = resp.json()
+        etag = resp.header("ETag")
+        last_modified = resp.header("Last-Modified")
         results = []
         for pkg in data.get("packages", []):
             versions = pkg.get("versions", [])
@@ -190,72 +262,89 @@ class AppsPage(Gtk.Box):
                 "install_type": "epm",
                 "branch": branch,
             })
-        return results
+        return results, etag, last_modified
 
-    def _check_installed(self, install_id, install_type):
+    def _do_pkg_search(self, token, query, branch, group, is_fallback=False):
+        on_refresh = None if is_fallback else (
+            lambda r: self._on_pkg_search_refreshed(token, query, branch, r)
+        )
         try:
-            if install_type == "flatpak":
-                r = subprocess.run(["flatpak", "info", install_id], capture_output=True, timeout=5)
-            else:
-                r = subprocess.run(["rpm", "-q", install_id], capture_output=True, timeout=5)
-            return r.returncode == 0
+            results = self._fetch_from_source(query, branch, on_refresh)
         except Exception:
-            return False
-
-    def _do_pkg_search(self, query, branch):
-        try:
-            primary = []
-            try:
-                primary = self._fetch_from_source(query, branch)
-                for pkg in primary:
-                    pkg["installed"] = self._check_installed(pkg["install_id"], pkg["install_type"])
-            except Exception:
-                pass
+            results = []
+        if token.is_set():
+            return
+        GLib.idle_add(self._fill_source_group, token, query, group, results, is_fallback)
+        self._resolve_installed(results)
 
-            if primary:
-                GLib.idle_add(self._display_pkg_results, [(branch, primary)], False)
-            else:
-                GLib.idle_add(self._log, "ℹ Не найдено в выбранном источнике, ищу в других...\n")
-                all_branches = ["p11", "sisyphus", "epm_play", "flathub"]
-                other_branches = [ob for ob in all_branches if ob != branch]
-                fallback_map = {}
-                with ThreadPoolExecutor(max_workers=len(other_branches)) as executor:
-                    futures = {executor.submit(self._fetch_from_source, query, ob): ob for ob in other_branches}
-                    for future in as_completed(futures):
-                        ob = futures[future]
-                        try:
-                            r = future.result()
-                            for pkg in r:
-                                pkg["installed"] = self._check_installed(pkg["install_id"], pkg["install_type"])
-                            if r:
-                                fallback_map[ob] = r
-                        except Exception:
-                            pass
-                fallback = [(ob, fallback_map[ob]) for ob in other_branches if ob in fallback_map]
-                GLib.idle_add(self._display_pkg_results, fallback, True)
-        finally:
-            def _unlock_search():
-                self._pkg_search_busy = False
-                self._branch_combo.set_sensitive(True)
-                self._search_entry.set_sensitive(True)
+    def _start_fallback_search(self, token, query, branch):
+        self._log("ℹ Не найдено в выбранном источнике, ищу в других...\n")
+        for ob in _PKG_SOURCES:
+            if ob == branch:
+                continue
+            group = self._add_source_group(ob, True)
+            self._pkg_search_pending += 1
+            threading.Thread(
+                target=self._do_pkg_search, args=(token, query, ob, group, True), daemon=True,
+            ).start()
+
+    def _on_pkg_search_refreshed(self, token, query, branch, results):
+        if token.is_set():
+            return
+        GLib.idle_add(self._replace_pkg_results, token, query, branch, results)
+        self._resolve_installed(results)
 
-            GLib.idle_add(_unlock_search)
+    def _resolve_installed(self, results):
+        """Вызывать из рабочего потока после показа результатов: отметки «Установлено» дорисуются."""
+        if not results:
+            return
+        try:
+            flags = installed_flags(
+                [(pkg["install_type"], pkg["install_id"]) for pkg in results]
+            )
+        except Exception:
+            return
+        installed = {
+            (pkg["install_type"], pkg["install_id"])
+            for pkg, flag in zip(results, flags) if flag
+        }
+        GLib.idle_add(self._apply_installed, installed)
+
+    def _apply_installed(self, installed):
+        for key in installed:
+            for row in self._pkg_rows.get(key, ()):
+                if row._pkg_installed:
+                    continue
+                row._pkg_installed = True
+                set_status_ok(row._pkg_status)
+                row._pkg_add_btn.set_visible(False)
+                inst_btn = row._pkg_inst_btn
+                inst_btn.set_label("Установлено")
+                inst_btn.set_sensitive(False)
+                inst_btn.add_css_class("flat")
+        return False
 
-    def on_tab_visible(self):
-        # Защитный сброс состояния: если фоновый поток оборвался, поле поиска не должно "залипать".
-        self._pkg_search_busy = False
-        self._search_entry.set_sensitive(True)
-        self._branch_combo.set_sensitive(True)
+    def _replace_pkg_results(self, token, query, branch, results):
+        # Обновление пришло из фона: показываем его, только если на экране всё ещё этот поиск,
+        # пользователь не начал вводить другой запрос и поиск по остальным источникам завершён.
+        if (
+            not results
+            or token.is_set()
+            or token is not self._pkg_search_token
+            or self._shown_search != (query, branch)
+            or self._search_entry.get_text().strip() != query
+            or self._pkg_search_pending
+        ):
+            return False
+        self._cancel_pkg_search()
+        self._clear_pkg_search_results()
+        self._finish_source_group(self._add_source_group(branch, False), results)
+        return False
 
     def _fetch_flathub(self, query):
-        body = json.dumps({"query": query, "locale": "ru"}).encode()
-        req = urllib.request.Request(
-            "https://flathub.org/api/v2/search",
-            data=body,
-            headers={"User-Agent": "ALTBooster/1.0", "Content-Type": "application/json"},
+        data = net.post_json(
+            "https://flathub.org/api/v2/search", {"query": query, "locale": "ru"},
         )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
         return [
             {
                 "display_name": hit.get("name") or hit.get("app_id", ""),
@@ -268,103 +357,99 @@ class AppsPage(Gtk.Box):
             for hit in data.get("hits", [])
         ]
 
-    def _load_epm_play_list(self):
+    def _add_source_group(self, branch, is_fallback):
+        """Группа источника со спиннером в заголовке; строки появятся, когда источник ответит."""
+        label = _PKG_SOURCE_LABELS.get(branch, branch)
+        group = Adw.PreferencesGroup()
+        group.set_title(f"{'Ищу в' if is_fallback else 'Поиск в'} {label}…")
+        spinner = Gtk.Spinner()
+        spinner.start()
+        group.set_header_suffix(spinner)
+        group._pkg_branch = branch
+        group._pkg_fallback = is_fallback
+        group._pkg_loading = True
+        prev = self._pkg_search_groups[-1] if self._pkg_search_groups else self._btns_box
+        self._body.insert_child_after(group, prev)
+        self._pkg_search_groups.append(group)
+        return group
+
+    def _remove_pkg_group(self, group):
+        if group in self._pkg_search_groups:
+            self._pkg_search_groups.remove(group)
         try:
-            r = subprocess.run(["epm", "play"], capture_output=True, text=True, timeout=30)
-            apps = []
-            for line in r.stdout.splitlines():
-                line = line.strip()
-                if not line or " - " not in line:
-                    continue
-                name, _, desc = line.partition(" - ")
-                name = name.strip()
-                desc = desc.strip()
-                if name:
-                    apps.append((name, desc))
-            return apps
+            self._body.remove(group)
         except Exception:
-            return []
+            pass
 
-    def _search_epm_play(self, query):
-        if self._epm_play_cache is None:
-            self._epm_play_cache = self._load_epm_play_list()
-        q = query.lower()
-        return [
-            {
-                "display_name": name,
-                "install_id": name,
-                "summary": desc,
-                "version": "",
-                "install_type": "epm_play",
-                "branch": "epm_play",
-            }
-            for name, desc in self._epm_play_cache
-            if q in name.lower() or q in desc.lower()
-        ]
-
-    def _display_pkg_results(self, branch_results_list, is_fallback=False):
-        if not branch_results_list:
+    def _fill_source_group(self, token, query, group, results, is_fallback):
+        if token.is_set() or group not in self._pkg_search_groups:
+            return False
+        self._pkg_search_pending -= 1
+        self._finish_source_group(group, results)
+        if not results and not is_fallback:
+            self._start_fallback_search(token, query, group._pkg_branch)
+        elif self._pkg_search_pending == 0 and not self._pkg_search_groups:
             set_status_error(self._search_status)
             self._log("ℹ Пакеты не найдены ни в одном источнике.\n")
+        return False
+
+    def _finish_source_group(self, group, results):
+        group._pkg_loading = False
+        group.set_header_suffix(None)
+        if not results:
+            self._remove_pkg_group(group)
             return
         set_status_ok(self._search_status)
-        label_map = {"flathub": "Flathub", "p11": "p11", "sisyphus": "Sisyphus", "epm_play": "EPM Play"}
-        title_prefix = "Найдено в" if is_fallback else "Результаты в"
-        prev = self._btns_box
-        for branch, results in branch_results_list:
-            label = label_map.get(branch, branch)
-            group = Adw.PreferencesGroup()
-            group.set_title(f"{title_prefix} {label} ({len(results)})")
-            self._body.insert_child_after(group, prev)
-            self._pkg_search_groups.append(group)
-            prev = group
-            for pkg in results:
-                display_name = pkg["display_name"]
-                install_id = pkg["install_id"]
-                summary = pkg.get("summary", "")[:120]
-                version = pkg.get("version", "")
-                install_type = pkg.get("install_type", "epm")
-                installed = pkg.get("installed", False)
-                if version and summary:
-                    subtitle = f"v{version} — {summary}"
-                elif summary:
-                    subtitle = summary
-                elif install_type == "flatpak":
-                    subtitle = install_id
-                else:
-                    subtitle = version
-                row = Adw.ActionRow()
-                row.set_title(display_name)
-                if subtitle:
-                    row.set_subtitle(subtitle)
-                status = make_status_icon()
-                if installed:
-                    set_status_ok(status)
-                    inst_btn = make_button("Установлено", width=110)
-                    inst_btn.set_sensitive(False)
-                    inst_btn.add_css_class("flat")
-                    row.add_suffix(make_suffix_box(status, inst_btn))
-                else:
-                    in_list = self._is_in_list(install_id)
-                    add_btn = Gtk.Button(label="В списке" if in_list else "Добавить")
-                    add_btn.add_css_class("flat")
-                    add_btn.add_css_class("pill")
-                    add_btn.set_valign(Gtk.Align.CENTER)
-                    if in_list:
-                        add_btn.set_sensitive(False)
-                    else:
-                        add_btn.connect(
-                            "clicked",
-                            lambda _, p=pkg, b=add_btn: self._add_pkg_to_list(p, b),
-                        )
-                    inst_btn = make_button("Установить", width=100)
-                    inst_btn.connect(
-                        "clicked",
-                        lambda _, iid=install_id, itype=install_type, b=inst_btn, s=status:
-                            self._install_pkg(iid, itype, b, s),
-                    )
-                    row.add_suffix(make_suffix_box(status, add_btn, inst_btn))
-                group.add(row)
+        label = _PKG_SOURCE_LABELS.get(group._pkg_branch, group._pkg_branch)
+        title_prefix = "Найдено в" if group._pkg_fallback else "Результаты в"
+        group.set_title(f"{title_prefix} {label} ({len(results)})")
+        self._fill_pkg_group(group, results)
+
+    def _fill_pkg_group(self, group, results):
+        for pkg in results:
+            display_name = pkg["display_name"]
+            install_id = pkg["install_id"]
+            summary = pkg.get("summary", "")[:120]
+            version = pkg.get("version", "")
+            install_type = pkg.get("install_type", "epm")
+            if version and summary:
+                subtitle = f"v{version} — {summary}"
+            elif summary:
+                subtitle = summary
+            elif install_type == "flatpak":
+                subtitle = install_id
+            else:
+                subtitle = version
+            row = Adw.ActionRow()
+            row.set_title(display_name)
+            if subtitle:
+                row.set_subtitle(subtitle)
+            status = make_status_icon()
+            in_list = self._is_in_list(install_id)
+            add_btn = Gtk.Button(label="В списке" if in_list else "Добавить")
+            add_btn.add_css_class("flat")
+            add_btn.add_css_class("pill")
+            add_btn.set_valign(Gtk.Align.CENTER)
+            if in_list:
+                add_btn.set_sensitive(False)
+            else:
+                add_btn.connect(
+                    "clicked",
+                    lambda _, p=pkg, b=add_btn: self._add_pkg_to_list(p, b),
+                )
+            inst_btn = make_button("Установить", width=100)
+            inst_btn.connect(
+                "clicked",
+                lambda _, iid=install_id, itype=install_type, b=inst_btn, s=status:
+                    self._install_pkg(iid, itype, b, s),
+            )
+            row.add_suffix(make_suffix_box(status, add_btn, inst_btn))
+            row._pkg_installed = False
+            row._pkg_status = status
+            row._pkg_add_btn = add_btn
+            row._pkg_inst_btn = inst_btn
+            self._pkg_rows.setdefault((install_type, install_id), []).append(row)
+            group.add(row)
 
     def _clear_pkg_search_results(self):
         for group in self._pkg_search_groups:
@@ -373,6 +458,7 @@ class AppsPage(Gtk.Box):
             except Exception:
                 pass
         self._pkg_search_groups = []
+        self._pkg_rows = {}
         clear_status(self._search_status)
 
     def _is_in_list(self, install_id):
@@ -477,7 +563,9 @@ class AppsPage(Gtk.Box):
         btn.set_label("…")
         self._log(f"\n▶  Установка {pkg_id}...\n")
         win = self.get_root()
-        if hasattr(win, "start_progress"): win.start_progress(f"Установка {pkg_id}...")
+        if hasattr(win, "start_progress"):
+            fmt = PROGRESS_FLATPAK if install_type == "flatpak" else PROGRESS_APT
+            win.start_progress(f"Установка {pkg_id}...", progress_format=fmt)
         done_cb = lambda ok: self._pkg_install_done(ok, pkg_id, btn, status)
         if install_type == "flatpak":
             backend.run_privileged(
@@ -512,10 +600,13 @@ class AppsPage(Gtk.Box):
         self._rows.clear()
         self._group_checkboxes.clear()
         self._app_row_by_id.clear()
+        self._group_views.clear()
+        self._error_group = None
+        self._cancel_pkg_search()
         self._pkg_search_groups = []
+        self._pkg_rows = {}
 
     def _load_and_build(self):
-        self._clear_body()
         is_default = False
         try:
             if not self._json_path.exists():
@@ -527,7 +618,7 @@ class AppsPage(Gtk.Box):
                     self._log(f"✘ Ошибка: Файл конфигурации не найден: {self._system_json_path}\n")
                     self._data = {"groups": []}
                     self._update_reset_button_ui(False)
-                    self._build()
+                    self._sync_body()
                     return
 
             user_data = {}
@@ -548,48 +639,88 @@ class AppsPage(Gtk.Box):
             if not backup_path.exists():
                 shutil.copy(self._json_path, backup_path)
             self._update_reset_button_ui(is_default)
-            self._build()
+            self._sync_body()
         except json.JSONDecodeError as e:
             self._log(f"✘ Ошибка синтаксиса в apps.json: {e}\n   Проверьте строку {e.lineno}, позицию {e.colno}.\n")
             self._data = {"groups": []}
             self._update_reset_button_ui(False)
+            self._clear_body()
             self._add_error_widgets()
         except (OSError, ValueError) as e:
             self._log(f"✘ Ошибка загрузки приложений: {e}\n")
             self._data = {"groups": []}
             self._update_reset_button_ui(False)
+            self._clear_body()
 
-    def _build(self):
+    def _sync_body(self):
+        """Привести страницу к self._data: пересоздаются только изменённые и новые строки."""
         USER_GID = "user_apps"
-        groups_all = self._data.get("groups", [])
-        user_gdata = next((g for g in groups_all if g.get("id") == USER_GID), None)
-        if user_gdata and user_gdata.get("items"):
-            self._build_group(user_gdata)
-
-        heading = Gtk.Label()
-        heading.set_markup("<b>Выбрать и установить приложения</b>")
-        heading.set_halign(Gtk.Align.START)
-        heading.set_margin_top(8)
-        heading.set_margin_start(4)
-        heading.set_margin_bottom(2)
-        self._body.append(heading)
+        if self._error_group is not None:
+            self._body.remove(self._error_group)
+            self._error_group = None
 
-        groups = self._data.get("groups", [])
-        if not groups:
+        groups_all = self._data.get("groups", [])
+        if not groups_all:
             self._log("⚠ Список групп приложений пуст или не загружен.\n")
 
-        for gdata in self._data.get("groups", []):
+        old_views = self._group_views
+        self._group_views = {}
+        current = [
+            c for c in self._iter_body_children()
+            if c is self._apps_heading or any(c is v["pg"] for v in old_views.values())
+        ]
+        desired = []
+        user_gdata = next((g for g in groups_all if g.get("id") == USER_GID), None)
+        if user_gdata and user_gdata.get("items"):
+            desired.append(self._sync_group(USER_GID, user_gdata, old_views))
+        desired.append(self._apps_heading)
+        for i, gdata in enumerate(groups_all):
             if gdata.get("id") == USER_GID:
                 continue
-            self._build_group(gdata)
+            desired.append(self._sync_group(gdata.get("id") or f"#{i}", gdata, old_views))
+        sync_children(current, desired, self._body.append, self._body.remove)
+
+        self._rows = [r for v in self._group_views.values() for r in v["rows"]]
+        self._group_checkboxes = [v["grp"] for v in self._group_views.values()]
+        self._app_row_by_id = {
+            aid: row for v in self._group_views.values() for aid, (_fp, row) in v["entries"].items()
+        }
+        self._refresh_btn_all()
 
-    def _build_group(self, gdata):
+    def _iter_body_children(self):
+        child = self._body.get_first_child()
+        while child:
+            yield child
+            child = child.get_next_sibling()
+
+    def _sync_group(self, key, gdata, old_views):
+        view = old_views.pop(key, None) or self._create_group_view(gdata)
+        self._group_views[key] = view
+        gid = gdata.get("id", "")
+        items = gdata.get("items", [])
+        exp = view["exp"]
+        exp.set_title(gdata.get("title", ""))
+        exp.set_subtitle(f"Доступно приложений: {len(items)}")
+
+        old_entries = view["entries"]
+        entries = {}
+        rows = []
+        for app in items:
+            aid = app.get("id", "")
+            fp = json.dumps([gid, app], sort_keys=True, ensure_ascii=False)
+            prev = old_entries.pop(aid, None)
+            row = prev[1] if prev is not None and prev[0] == fp else self._make_app_row(app, gid)
+            entries[aid] = (fp, row)
+            rows.append(row)
+        sync_children(view["rows"], rows, exp.add_row, exp.remove)
+        view["rows"][:] = rows
+        view["entries"] = entries
+        return view["pg"]
+
+    def _create_group_view(self, gdata):
         pg = Adw.PreferencesGroup()
-        self._body.append(pg)
 
         exp = Adw.ExpanderRow()
-        exp.set_title(gdata.get("title", ""))
-        exp.set_subtitle(f"Доступно приложений: {len(gdata.get('items', []))}")
         exp.set_expanded(False)
         pg.add(exp)
 
@@ -623,8 +754,6 @@ class AppsPage(Gtk.Box):
         _grp_prefix.append(grp_status)
         exp.add_prefix(_grp_prefix)
 
-        self._group_checkboxes.append((grp_cb, grp_status, group_rows))
-
         add_btn = Gtk.Button()
         add_btn.set_icon_name("list-add-symbolic")
         add_btn.set_tooltip_text("Добавить приложение в эту группу")
@@ -632,40 +761,45 @@ class AppsPage(Gtk.Box):
         add_btn.connect("clicked", lambda _b, g=gid: self._on_add(g))
         exp.add_suffix(add_btn)
 
-        for app in gdata.get("items", []):
-            sources = []
-            if "sources" in app:
-                sources = app["sources"]
-            elif "source" in app:
-                sources = [app["source"]]
-
-            for s in sources:
-                chk = s.get("check", [])
-                s["check"] = tuple(chk) if isinstance(chk, list) else chk
-
-            app_n = dict(app, sources=sources)
-            row = AppRow(app_n, self._log, self._refresh_btn_all)
-            self._rows.append(row)
-            self._app_row_by_id[app_n["id"]] = row
-            group_rows.append(row)
-            exp.add_row(row)
-
-            edit_btn = Gtk.Button()
-            edit_btn.set_icon_name("document-edit-symbolic")
-            edit_btn.set_tooltip_text("Редактировать")
-            edit_btn.set_valign(Gtk.Align.CENTER)
-            edit_btn.add_css_class("flat")
-            edit_btn.add_css_class("circular")
-            edit_btn.connect("clicked", lambda _b, a=app, g=gid: self._on_edit(a, g))
-
-            del_btn = Gtk.Button()
-            del_btn.set_icon_name("list-remove-symbolic")
-            del_btn.set_tooltip_text("Убрать из списка")
-            del_btn.set_valign(Gtk.Align.CENTER)
-            del_btn.add_css_class("flat")
-            del_btn.add_css_class("circular")
-            del_btn.connect("clicked", lambda _b, a=app, g=gid: self._on_delete(a, g))
-            row.attach_trailing_editor_actions(edit_btn, del_btn)
+        return {
+            "pg": pg,
+            "exp": exp,
+            "rows": group_rows,
+            "entries": {},
+            "grp": (grp_cb, grp_status, group_rows),
+        }
+
+    def _make_app_row(self, app, gid):
+        sources = []
+        if "sources" in app:
+            sources = app["sources"]
+        elif "source" in app:
+            sources = [app["source"]]
+
+        for s in sources:
+            chk = s.get("check", [])
+            s["check"] = tuple(chk) if isinstance(chk, list) else chk
+
+        app_n = dict(app, sources=sources)
+        row = AppRow(app_n, self._log, self._refresh_btn_all)
+
+        edit_btn = Gtk.Button()
+        edit_btn.set_icon_name("document-edit-symbolic")
+        edit_btn.set_tooltip_text("Редактировать")
+        edit_btn.set_valign(Gtk.Align.CENTER)
+        edit_btn.add_css_class("flat")
+        edit_btn.add_css_class("circular")
+        edit_btn.connect("clicked", lambda _b, a=app, g=gid: self._on_edit(a, g))
+
+        del_btn = Gtk.Button()
+        del_btn.set_icon_name("list-remove-symbolic")
+        del_btn.set_tooltip_text("Убрать из списка")
+        del_btn.set_valign(Gtk.Align.CENTER)
+        del_btn.add_css_class("flat")
+        del_btn.add_css_class("circular")
+        del_btn.connect("clicked", lambda _b, a=app, g=gid: self._on_delete(a, g))
+        row.attach_trailing_editor_actions(edit_btn, del_btn)
+        return row
 
     def focus_app_by_id(self, app_id: str) -> bool:
         row = self._app_row_by_id.get(app_id)
@@ -680,6 +814,14 @@ class AppsPage(Gtk.Box):
         row.grab_focus()
         return True
 
+    def focus_epm_play(self, name: str) -> bool:
+        """Показать приложение epm play через поиск пакетов по этому источнику."""
+        self._branch_combo.set_selected(_PKG_SOURCES.index("epm_play"))
+        self._search_entry.set_text(name)
+        self._on_pkg_search()
+        self._search_entry.grab_focus()
+        return True
+
     def _add_error_widgets(self):
         group = Adw.PreferencesGroup()
         group.set_title("Ошибка конфигурации")
@@ -695,6 +837,7 @@ class AppsPage(Gtk.Box):
 
         group.add(row)
         self._body.append(group)
+        self._error_group = group
         self._log("⚠ Список групп приложений пуст или не загружен.\n")
 
     def _on_reset_apps_json(self, _):
@@ -931,33 +1074,83 @@ class AppsPage(Gtk.Box):
     def _run_all(self, _):
         if self._busy:
             return
+        # Строки, которые уже ставятся (одиночная установка или открытый предпросмотр), не трогаем.
+        rows = [
+            r for r in self._rows
+            if r.is_selected() and not r.is_installed() and not r._installing
+        ]
         self._busy = True
         self._cancel_install = False
         self._btn_all.set_sensitive(False)
         self._btn_all.set_label("⏳  Установка...")
-        
+        for row in rows:
+            row.set_bulk_pending()
+
         win = self.get_root()
         if hasattr(win, "start_progress"):
             win.start_progress("Массовая установка приложений...", self._cancel_all)
-            
-        threading.Thread(target=self._worker, daemon=True).start()
+
+        threading.Thread(target=self._worker, args=(rows,), daemon=True).start()
 
     def _cancel_all(self):
         self._cancel_install = True
         self._log("\n⚠  Запрос отмены. Завершаю текущую операцию и останавливаюсь...\n")
 
-    def _worker(self):
-        to_install = [r for r in self._rows if r.is_selected() and not r.is_installed()]
-        for row in to_install:
-            if self._cancel_install:
-                break
-            while row._installing and not self._cancel_install:
-                time.sleep(0.5)
+    def _run_bulk_step(self, step):
+        """Выполнить одну транзакцию; при устаревших индексах — apt-get update и повтор."""
+        names = ", ".join(step.packages) if step.packages else step.cmd[0]
+        GLib.idle_add(self._log, f"\n▶  Установка ({len(step.keys)}): {names}\n")
+        needs_update = False
+
+        def _log_wrapper(text):
+            nonlocal needs_update
+            if ("404" in text and "Not Found" in text) or "Unable to fetch some archives" in text:
+                needs_update = True
+            self._log(text)
+
+        run = backend.run_epm_sync if step.cmd[0] == "epm" else backend.run_privileged_sync
+        ok = run(step.cmd, _log_wrapper)
+        if not ok and needs_update and step.kind == "epm" and not self._cancel_install:
+            GLib.idle_add(
+                self._log,
+                "\n⚠  Обнаружены устаревшие индексы. Выполняю обновление (apt-get update)...\n",
+            )
+            if backend.run_privileged_sync(["apt-get", "update"], _log_wrapper):
+                ok = run(step.cmd, _log_wrapper)
+        return ok
+
+    def _worker(self, rows):
+        sources = {i: row.selected_source() for i, row in enumerate(rows)}
+        # None — до пакета не дошли из-за отмены: строка возвращается в исходное состояние.
+        results: dict[int, bool | None] = {i: False for i, src in sources.items() if src is None}
+        steps = plan_bulk_install(
+            [(i, src["cmd"]) for i, src in sources.items() if src is not None]
+        )
+        for step in steps:
             if self._cancel_install:
                 break
-            row._install_event.clear()
-            GLib.idle_add(row._on_install)
-            row._install_event.wait(timeout=300)
+            if self._run_bulk_step(step):
+                results.update((k, True) for k in step.keys)
+            else:
+                # Транзакция откатывается целиком: выясняем, что всё-таки установлено,
+                # а остальное пробуем по одному, чтобы один пакет не блокировал всю группу.
+                invalidate_app_detection_caches()
+                for k in step.keys:
+                    results[k] = backend.check_app_installed(sources[k])
+                if len(step.keys) > 1:
+                    for k in [k for k in step.keys if not results[k]]:
+                        if self._cancel_install:
+                            results[k] = None
+                            continue
+                        results[k] = all(
+                            self._run_bulk_step(single)
+                            for single in plan_bulk_install([(k, sources[k]["cmd"])])
+                        )
+            for k in step.keys:
+                GLib.idle_add(rows[k].finish_bulk, results[k])
+        for i, row in enumerate(rows):
+            if i not in results or sources[i] is None:
+                GLib.idle_add(row.finish_bulk, results.get(i))
         GLib.idle_add(self._done)
 
     def _done(self):
@@ -9,8 +9,6 @@ import shutil
 import subprocess
 import tempfile
 import threading
-import urllib.parse
-import urllib.request
 from pathlib import Path
 
 import gi
@@ -18,7 +16,7 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Adw, GLib, Gtk
 
-from core import backend
+from core import backend, net, pathindex
 from core.config import CONFIG_DIR
 
 _SHELLVER_BACKUP = CONFIG_DIR / "ext_shellver_backup.json"
@@ -115,7 +113,7 @@ _SYSTEM_EXT_DIR = Path("/usr/share/gnome-shell/extensions")
 
 
 def _gext_path() -> str | None:
-    if cmd := shutil.which("gext"):
+    if cmd := pathindex.which("gext"):
         return cmd
     local_bin = Path.home() / ".local" / "bin" / "gext"
     if local_bin.exists():
@@ -536,11 +534,10 @@ class ExtensionsPage(Gtk.Box):
         try:
             shell_ver = self._get_shell_version()
             key = "pk" if target_id.isdigit() else "uuid"
-            url = f"https://extensions.gnome.org/extension-info/?{key}={target_id}&shell_version={shell_ver}"
-            
-            req = urllib.request.Request(url, headers={"User-Agent": "ALTBooster"})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = json.loads(resp.read().decode())
+            data = net.get_json(
+                "https://extensions.gnome.org/extension-info/",
+                params={key: target_id, "shell_version": shell_ver},
+            )
             
             dl_path = data.get("download_url")
             if not dl_path:
@@ -550,8 +547,8 @@ class ExtensionsPage(Gtk.Box):
             full_url = f"https://extensions.gnome.org{dl_path}"
             
             with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
-                urllib.request.urlretrieve(full_url, tmp.name)
                 zip_path = tmp.name
+            net.download(full_url, zip_path)
             
             subprocess.run(["gnome-extensions", "install", "--force", zip_path], check=True)
             os.unlink(zip_path)
@@ -608,13 +605,13 @@ class ExtensionsPage(Gtk.Box):
 
         GLib.idle_add(self._log, "▶  gext не найден, устанавливаю...\n")
         
-        pip_cmd = next((c for c in ("pip3", "pip") if shutil.which(c)), None)
+        pip_cmd = next((c for c in ("pip3", "pip") if pathindex.which(c)), None)
         
         if not pip_cmd:
             GLib.idle_add(self._log, "▶  pip не найден. Устанавливаю системные пакеты...\n")
             if not backend.run_privileged_sync(["apt-get", "install", "-y", "pip", "python3-module-pip"], self._log):
                 return None
-            pip_cmd = next((c for c in ("pip3", "pip") if shutil.which(c)), None)
+            pip_cmd = next((c for c in ("pip3", "pip") if pathindex.which(c)), None)
 
         if not pip_cmd:
             return None
@@ -689,12 +686,10 @@ class ExtensionsPage(Gtk.Box):
 
         def _do():
             try:
-                params = urllib.parse.urlencode({"search": query, "n_per_page": 10})
-                url = f"https://extensions.gnome.org/extension-query/?{params}"
-                req = urllib.request.Request(url, headers={"User-Agent": "ALTBooster"})
-                
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    data = json.loads(response.read().decode())
+                data = net.get_json(
+                    "https://extensions.gnome.org/extension-query/",
+                    params={"search": query, "n_per_page": 10},
+                )
                 
                 results = data.get("extensions", [])
                 
@@ -1,7 +1,6 @@
 
 from __future__ import annotations
 
-import shutil
 import subprocess
 import threading
 import time
@@ -15,6 +14,10 @@ from gi.repository import Adw, GLib, Gtk
 
 from core import backend
 from core import config
+from core import memprofile
+from core import pathindex
+from core.checks import flatpak_inventory_generation
+from core.progress import PROGRESS_FLATPAK
 from ui.common import load_module
 from ui.rows import TaskRow, SettingRow
 from ui.widgets import make_icon, make_scrolled_page, make_suffix_box, scroll_child_into_view
@@ -52,7 +55,7 @@ def _get_flathub_url() -> str | None:
     return None
 
 def _is_flatpak_available() -> bool:
-    return shutil.which("flatpak") is not None
+    return pathindex.which("flatpak") is not None
 
 
 def _list_flatpak_apps() -> list[FlatpakApp]:
@@ -115,7 +118,33 @@ def _run_user_op(cmd: list, on_line, on_done) -> None:
     threading.Thread(target=_worker, daemon=True).start()
 
 
+_icon_index_cache: tuple[str, dict[str, str]] | None = None
+_icon_index_lock = threading.Lock()
+
+
 def _build_icon_index() -> dict[str, str]:
+    """Индекс иконок Flatpak (app_id → путь); пересканируется только при смене набора установленных приложений."""
+    global _icon_index_cache
+    generation = flatpak_inventory_generation()
+    with _icon_index_lock:
+        if _icon_index_cache is not None and _icon_index_cache[0] == generation:
+            return _icon_index_cache[1]
+    index = _scan_icon_index()
+    with _icon_index_lock:
+        _icon_index_cache = (generation, index)
+    return index
+
+
+def _icon_index_size() -> tuple[int, int | None]:
+    with _icon_index_lock:
+        index = _icon_index_cache[1] if _icon_index_cache else {}
+    return len(index), memprofile.approx_sizeof(index)
+
+
+memprofile.register_cache("Индекс иконок Flatpak", _icon_index_size)
+
+
+def _scan_icon_index() -> dict[str, str]:
     index: dict[str, str] = {}
 
     for size in ("64x64", "128x128", "scalable"):
@@ -520,7 +549,7 @@ class FlatpakPage(Gtk.Box):
         self._log(f"\n▶  Обновление {app.name} ({app.app_id})...\n")
         win = self.get_root()
         if hasattr(win, "start_progress"):
-            win.start_progress(f"Обновление {app.name}...")
+            win.start_progress(f"Обновление {app.name}...", progress_format=PROGRESS_FLATPAK)
 
         scope = "--user" if app.installation == "user" else "--system"
         cmd = ["flatpak", "update", "-y", scope, app.app_id]
@@ -749,7 +778,7 @@ class FlatpakPage(Gtk.Box):
     def _on_update_all(self):
         win = self.get_root()
         if hasattr(win, "start_progress"):
-            win.start_progress("Обновление всех Flatpak-приложений...")
+            win.start_progress("Обновление всех Flatpak-приложений...", progress_format=PROGRESS_FLATPAK)
         self._log("\n▶  Обновление всех Flatpak-приложений...\n")
         if self._update_all_btn:
             self._update_all_btn.set_sensitive(False)
@@ -15,6 +15,8 @@ from gi.repository import Adw, GLib, Gtk
 
 from core import backend
 from core import config
+from core import pathindex
+from core.progress import PROGRESS_APT
 from ui.install_preview_dialog import InstallPreviewDialog
 from ui.widgets import make_button, make_icon, make_scrolled_page, scroll_child_into_view
 from ui.rows import SettingRow
@@ -225,7 +227,7 @@ class SetupPage(Gtk.Box):
             win.start_progress("Обновление приложения...")
 
         url = f"https://github.com/plafonlinux/altbooster/archive/refs/tags/v{version}.tar.gz"
-        if not (downloader := ("wget -O" if shutil.which("wget") else ("curl -L -o" if shutil.which("curl") else ""))):
+        if not (downloader := ("wget -O" if pathindex.which("wget") else ("curl -L -o" if pathindex.which("curl") else ""))):
             self._log("✘  wget и curl не найдены — обновление невозможно\n")
             return
 
@@ -392,7 +394,7 @@ class SetupPage(Gtk.Box):
 
         self._log("\n▶  Обновление списка пакетов...\n")
         if hasattr(win, "start_progress"):
-            win.start_progress("Обновление системы...")
+            win.start_progress("Обновление системы...", progress_format=PROGRESS_APT)
 
         def on_full_upgrade_done(ok):
             GLib.idle_add(row.set_done, False)
@@ -13,6 +13,7 @@ from gi.repository import Adw, GLib, Gtk
 
 from core import backend
 from core import config
+from core import pathindex
 from ui.widgets import make_scrolled_page, scroll_child_into_view
 from ui.rows import SettingRow
 
@@ -677,12 +678,12 @@ class TerminalPage(Gtk.Box):
             f.write(_ALIASES_BLOCK.strip())
         
         editor_cmd = []
-        if shutil.which("gnome-text-editor"):
+        if pathindex.which("gnome-text-editor"):
             editor_cmd = ["gnome-text-editor", tmp_path]
-        elif shutil.which("gedit"):
+        elif pathindex.which("gedit"):
             editor_cmd = ["gedit", tmp_path]
-        elif shutil.which("nano"):
-            term = shutil.which("ptyxis") or shutil.which("gnome-terminal") or shutil.which("kgx")
+        elif pathindex.which("nano"):
+            term = pathindex.which("ptyxis") or pathindex.which("gnome-terminal") or pathindex.which("kgx")
             if term:
                 editor_cmd = [term, "--", "nano", tmp_path]
         
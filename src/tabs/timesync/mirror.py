@@ -15,6 +15,7 @@ gi.require_version("Adw", "1")
 from gi.repository import Adw, Gdk, GLib, Gtk
 
 from core import backend, config
+from core.progress import PROGRESS_BTRFS, PROGRESS_LINES, PROGRESS_RSYNC
 from core.mirror import (
     OPTIONAL_ITEMS,
     detect_mirror_type,
@@ -1200,7 +1201,10 @@ class MirrorPage(Gtk.Box):
         save_pt = sw_pt.get_active()
         optional = _load_optional()
         self._busy = True
-        self._start_progress(f"EXT4 зеркало → {dest}")
+        self._start_progress(
+            f"EXT4 зеркало → {dest}",
+            progress_format=PROGRESS_RSYNC if fmt == "rsync" else PROGRESS_LINES,
+        )
         self._log(f"Создание зеркала EXT4 ({fmt}) → {dest}\n")
 
         def _after_mirror(ok):
@@ -1260,7 +1264,7 @@ class MirrorPage(Gtk.Box):
             return
         self._busy = True
         save_pt = sw_pt.get_active()
-        self._start_progress(f"Btrfs зеркало → {dest}")
+        self._start_progress(f"Btrfs зеркало → {dest}", progress_format=PROGRESS_BTRFS)
         self._log(f"Создание Btrfs-зеркала ({fmt}) → {dest}\n")
         self._log(f"Субволюмы: {', '.join(subvols)}\n")
 
@@ -13,6 +13,7 @@ from gi.repository import Adw, Gdk, GLib, Gtk, Pango
 from core import backend
 from core import config
 from core.borg import _write_borg_env_file
+from core.progress import PROGRESS_BORG
 from ui.widgets import (
     make_icon, make_scrolled_page, make_button,
     make_status_icon, set_status_ok, set_status_error, clear_status,
@@ -924,7 +925,7 @@ class BorgPage(Gtk.Box):
         archive_name = socket.gethostname() + "-" + GLib.DateTime.new_now_local().format("%Y-%m-%dT%H-%M")
         win = self.get_root()
         if hasattr(win, "start_progress"):
-            win.start_progress(f"Создание архива {archive_name}...")
+            win.start_progress(f"Создание архива {archive_name}...", progress_format=PROGRESS_BORG)
         self._log(f"\n▶  Создание резервной копии {archive_name}...\n")
 
         def _done(ok):
@@ -2116,7 +2117,7 @@ class BorgPage(Gtk.Box):
         archive_name = socket.gethostname() + "-" + GLib.DateTime.new_now_local().format("%Y-%m-%dT%H-%M")
         win = self.get_root()
         if hasattr(win, "start_progress"):
-            win.start_progress(f"Создание архива {archive_name}...")
+            win.start_progress(f"Создание архива {archive_name}...", progress_format=PROGRESS_BORG)
         self._log(f"\n▶  Создание архива {archive_name}...\n")
 
         def _done(ok):
@@ -3,6 +3,7 @@ from __future__ import annotations
 import shutil
 import tempfile
 import threading
+import weakref
 from pathlib import Path
 
 import gi
@@ -11,9 +12,26 @@ gi.require_version("Adw", "1")
 from gi.repository import Adw, GLib, Gtk, Pango
 
 from core import backend
+from core import memprofile
+from core.borg import archive_dir_sizes, build_archive_tree
+from core.progress import PROGRESS_BORG
 from ui.widgets import make_icon
 from .summary import _fmt_size
 
+_open_archive_browsers: weakref.WeakSet = weakref.WeakSet()
+
+
+def _archive_trees_size() -> tuple[int, int | None]:
+    entries = 0
+    size = 0
+    for dlg in list(_open_archive_browsers):
+        entries += len(dlg._all_items)
+        size += memprofile.approx_sizeof((dlg._all_items, dlg._children, getattr(dlg, "_dir_sizes", {})))
+    return entries, size
+
+
+memprofile.register_cache("Деревья архивов Borg", _archive_trees_size)
+
 
 class BtrfsRestoreDialog(Adw.AlertDialog):
     def __init__(self, parent, snapshot: dict, log_fn):
@@ -134,6 +152,7 @@ class BorgArchiveBrowserDialog(Adw.Window):
         self._all_items: list[dict] = []
         self._children: dict = {}
         self._nav_stack: list[str] = []
+        _open_archive_browsers.add(self)
         self._current_path: str = ""
 
         self._back_btn = Gtk.Button()
@@ -215,8 +234,8 @@ class BorgArchiveBrowserDialog(Adw.Window):
 
     def _on_loaded(self, items: list[dict]):
         self._all_items = items
-        self._children = self._build_tree(items)
-        self._dir_sizes = self._compute_dir_sizes(items)
+        self._children = build_archive_tree(items)
+        self._dir_sizes = archive_dir_sizes(items)
         initial_path = self._guess_initial_path()
         if initial_path:
             parts = initial_path.split("/")
@@ -248,50 +267,6 @@ class BorgArchiveBrowserDialog(Adw.Window):
 
         return ""
 
-    def _compute_dir_sizes(self, items: list[dict]) -> dict:
-        sizes = {}
-        for item in items:
-            if item.get("type", "-") != "-":
-                continue
-            path = item.get("path", "").rstrip("/")
-            size = item.get("size") or 0
-            parts = path.split("/")
-            for i in range(len(parts)):
-                key = "/".join(parts[:i])
-                sizes[key] = sizes.get(key, 0) + size
-        return sizes
-
-    def _build_tree(self, items: list[dict]) -> dict:
-        children = {}
-
-        def _ensure_chain(path):
-            if path in children:
-                return
-            children[path] = {"dirs": [], "files": []}
-            if path:
-                parent = "/".join(path.split("/")[:-1])
-                _ensure_chain(parent)
-                if path not in children[parent]["dirs"]:
-                    children[parent]["dirs"].append(path)
-
-        for item in items:
-            path = item.get("path", "").rstrip("/")
-            if not path:
-                continue
-            itype = item.get("type", "-")
-            parent = "/".join(path.split("/")[:-1])
-            if itype == "d":
-                _ensure_chain(path)
-            else:
-                _ensure_chain(parent)
-                children[parent]["files"].append(item)
-
-        for v in children.values():
-            v["dirs"].sort()
-            v["files"].sort(key=lambda x: x.get("path", ""))
-
-        return children
-
     def _navigate_to(self, path: str):
         self._current_path = path
         self._path_label.set_text("/" + path if path else "/")
@@ -671,7 +646,7 @@ class BorgRestoreDialog(Adw.AlertDialog):
     def _start_restore(self, target_dir: str, archive_user: str | None = None):
         win = self.get_root()
         if hasattr(win, "start_progress"):
-            win.start_progress("Восстановление архива...")
+            win.start_progress("Восстановление архива...", progress_format=PROGRESS_BORG)
         self._log(f"\n▶  Восстановление {self._archive_name} → {target_dir}...\n")
 
         restore_flatpak = self._cb_flatpak.get_active()
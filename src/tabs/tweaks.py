@@ -3,7 +3,6 @@ import json
 import os
 import re
 import shlex
-import shutil
 import subprocess
 import tempfile
 import threading
@@ -14,6 +13,7 @@ gi.require_version("Adw", "1")
 from gi.repository import Adw, Gdk, Gio, GLib, Gtk
 
 from core import backend
+from core import pathindex
 from ui.common import load_module
 from ui.widgets import make_button, make_icon, make_scrolled_page, scroll_child_into_view
 from ui.rows import SettingRow, TaskRow
@@ -725,7 +725,7 @@ WantedBy=multi-user.target
             "Установка пакета и правил CachyOS из GitHub",
             "Установить",
             self._install_ananicy,
-            lambda: shutil.which("ananicy-cpp") is not None,
+            lambda: pathindex.which("ananicy-cpp") is not None,
             "ananicy_installed",
             done_label="Установлен",
             on_undo=self._uninstall_ananicy,
@@ -1,13 +1,6 @@
-import json
-from pathlib import Path
-
-_MODULES_DIR = Path(__file__).resolve().parent.parent / "modules"
+from core.catalog import get_module
 
 
 def load_module(name: str) -> dict:
-    try:
-        with open(_MODULES_DIR / f"{name}.json", encoding="utf-8") as f:
-            return json.load(f)
-    except (OSError, json.JSONDecodeError) as e:
-        print(f"[ALT Booster] Не удалось загрузить модуль '{name}': {e}")
-        return {}
+    """Данные modules/<name>.json из общего реестра (core.catalog); объект общий — не изменять."""
+    return get_module(name).data
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import shutil
+import json
 import os
 import subprocess
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Callable
 
@@ -14,6 +15,9 @@ from gi.repository import Adw, Gio, GLib, Gtk
 
 from core import backend
 from core import config
+from core import pathindex
+from core import resources
+from core.catalog import get_module
 from tabs.terminal_actions import (
     check_ptyxis_default, set_ptyxis_default,
     check_shortcut_1, set_shortcut_1,
@@ -52,10 +56,27 @@ BUILTIN_REGISTRY: dict[str, Callable] = {
 from ui.widgets import (
     make_icon, make_button, make_status_icon,
     set_status_ok, set_status_error, clear_status, make_suffix_box,
-    scroll_child_into_view,
+    scroll_child_into_view, sync_children,
 )
 
 
+# Периодическая перепроверка видимой страницы: интервал удваивается, пока результаты не меняются.
+_POLL_BASE_S = 15
+_POLL_MAX_S = 240
+
+# Тип проверки → класс ресурсов, после изменения которого её стоит повторить (None — после любой задачи).
+_CHECK_RESOURCES: dict[str, str | None] = {
+    "rpm": resources.PACKAGES,
+    "which": resources.PACKAGES,
+    "flatpak": resources.FLATPAK,
+    "systemd": resources.SERVICES,
+    "gsettings": resources.SETTINGS,
+    "gsettings_contains": resources.SETTINGS,
+    "path": resources.FILES,
+    "builtin": None,
+}
+
+
 def run_check(check: dict | None) -> bool:
     if not check:
         return False
@@ -376,16 +397,27 @@ class RowFactory:
 
 
 class DynamicPage(Gtk.Box):
-    def __init__(self, page_data: dict, log_fn: Callable[[str], None]) -> None:
+    def __init__(
+        self, page_data: dict, log_fn: Callable[[str], None], module_name: str | None = None,
+    ) -> None:
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         self.log = log_fn
         self._page_data = page_data
+        self._module_name = module_name
         self._rows_with_checks: list[Adw.ActionRow] = []
         self._rows_by_id: dict[str, Adw.ActionRow] = {}
+        # Ключ группы → {"group", "rows", "entries": {ключ строки: (отпечаток, строка)}}
+        self._group_views: dict[str, dict] = {}
         self._btn_size_group = Gtk.SizeGroup(mode=Gtk.SizeGroupMode.HORIZONTAL)
         self._factory = RowFactory(self)
         self._poll_running = False
         self._poll_lock = threading.Lock()
+        self._poll_interval_s = _POLL_BASE_S
+        self._poll_timer_id = 0
+        self._polled_at = 0.0
+        self._visible = False
+        self._stale = True
+        self._check_resources: frozenset[str] = frozenset()
 
         scroll = Gtk.ScrolledWindow()
         scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
@@ -405,9 +437,19 @@ class DynamicPage(Gtk.Box):
         scroll.set_child(clamp)
         self.append(scroll)
 
-        self._build(self._body)
+        self.apply_page_data(page_data)
 
-        threading.Thread(target=self._poll_checks, daemon=True).start()
+        # Проверки выполняются только для показанной страницы: первая — при первом показе.
+        self.connect("map", self._on_map)
+        self.connect("unmap", self._on_unmap)
+        resources.subscribe(self._on_resources_changed)
+
+    def on_tab_visible(self) -> None:
+        if not self._module_name:
+            return
+        new_rows = self.apply_page_data(get_module(self._module_name).data)
+        if new_rows:
+            threading.Thread(target=self._poll_checks, args=(new_rows,), daemon=True).start()
 
     def focus_row_by_id(self, row_id: str) -> bool:
         row = self._rows_by_id.get(row_id)
@@ -419,49 +461,161 @@ class DynamicPage(Gtk.Box):
         GLib.idle_add(row.grab_focus)
         return True
 
-    def _build(self, body: Gtk.Box) -> None:
-        for group_data in self._page_data.get("groups", []):
-            if "requires" in group_data and shutil.which(group_data["requires"]) is None:
-                continue
+    def apply_page_data(self, page_data: dict) -> list[Adw.ActionRow]:
+        """Привести страницу к page_data, пересоздавая только изменившиеся группы и строки.
 
-            group = Adw.PreferencesGroup()
-            group.set_title(group_data.get("title", ""))
-            if group_data.get("description"):
-                group.set_description(group_data["description"])
-            body.append(group)
+        Возвращает новые строки с проверками — состояние остальных строк сохраняется.
+        """
+        self._page_data = page_data
+        old_views = self._group_views
+        self._group_views = {}
+        new_check_rows: list[Adw.ActionRow] = []
+        groups: list[Adw.PreferencesGroup] = []
 
-            for row_data in group_data.get("rows", []):
-                if "requires" in row_data and shutil.which(row_data["requires"]) is None:
+        for gidx, group_data in enumerate(page_data.get("groups", [])):
+            if "requires" in group_data and pathindex.which(group_data["requires"]) is None:
+                continue
+            key = str(group_data.get("id") or f"#{gidx}")
+            view = old_views.pop(key, None)
+            if view is None:
+                view = {"group": Adw.PreferencesGroup(), "rows": [], "entries": {}}
+            self._group_views[key] = view
+            group = view["group"]
+            group.set_title(group_data.get("title", ""))
+            group.set_description(group_data.get("description") or None)
+            groups.append(group)
+
+            old_entries = view["entries"]
+            entries: dict[str, tuple[str, Adw.ActionRow]] = {}
+            rows: list[Adw.ActionRow] = []
+            for ri, row_data in enumerate(group_data.get("rows", [])):
+                if "requires" in row_data and pathindex.which(row_data["requires"]) is None:
                     continue
-                row = self._factory.build(row_data)
-                group.add(row)
-                rid = row_data.get("id")
-                if rid:
-                    self._rows_by_id[str(rid)] = row
+                rkey = str(row_data.get("id") or f"#{ri}")
+                fp = json.dumps(row_data, sort_keys=True, ensure_ascii=False)
+                prev = old_entries.pop(rkey, None)
+                if prev is not None and prev[0] == fp:
+                    row = prev[1]
+                else:
+                    row = self._factory.build(row_data)
+                    if hasattr(row, "_dp_check"):
+                        new_check_rows.append(row)
+                entries[rkey] = (fp, row)
+                rows.append(row)
+            sync_children(view["rows"], rows, group.add, group.remove)
+            view["rows"] = rows
+            view["entries"] = entries
+
+        current: list[Gtk.Widget] = []
+        child = self._body.get_first_child()
+        while child is not None:
+            current.append(child)
+            child = child.get_next_sibling()
+        sync_children(current, groups, self._body.append, self._body.remove)
+
+        self._rows_by_id = {}
+        self._rows_with_checks = []
+        check_resources: set[str] = set()
+        for view in self._group_views.values():
+            for rkey, (_fp, row) in view["entries"].items():
+                if not rkey.startswith("#"):
+                    self._rows_by_id[rkey] = row
                 if hasattr(row, "_dp_check"):
                     self._rows_with_checks.append(row)
+                    kind = (row._dp_check or {}).get("type")
+                    if kind:
+                        res = _CHECK_RESOURCES.get(kind)
+                        check_resources |= {res} if res else resources.ALL
+        self._check_resources = frozenset(check_resources)
+        return new_check_rows
+
+    def _on_map(self, _w: Gtk.Widget) -> None:
+        self._visible = True
+        due = self._polled_at + self._poll_interval_s - time.monotonic()
+        if self._stale or due <= 0:
+            self._start_poll()
+        else:
+            self._schedule_poll(due)
+
+    def _on_unmap(self, _w: Gtk.Widget) -> None:
+        self._visible = False
+        self._cancel_poll_timer()
+
+    def _on_resources_changed(self, changed: frozenset[str]) -> None:
+        if changed & self._check_resources:
+            GLib.idle_add(self._recheck_now)
 
-    def _poll_checks(self) -> None:
+    def _recheck_now(self) -> bool:
+        self._poll_interval_s = _POLL_BASE_S
+        if self._visible:
+            self._start_poll()
+        else:
+            self._stale = True
+        return False
+
+    def _cancel_poll_timer(self) -> None:
+        if self._poll_timer_id:
+            GLib.source_remove(self._poll_timer_id)
+            self._poll_timer_id = 0
+
+    def _schedule_poll(self, delay_s: float) -> None:
+        self._cancel_poll_timer()
+        self._poll_timer_id = GLib.timeout_add(max(1, int(delay_s * 1000)), self._on_poll_timer)
+
+    def _on_poll_timer(self) -> bool:
+        self._poll_timer_id = 0
+        self._start_poll()
+        return False
+
+    def _start_poll(self) -> None:
+        self._cancel_poll_timer()
+        self._stale = False
+        self._polled_at = time.monotonic()
+        threading.Thread(target=self._poll_checks, daemon=True).start()
+
+    def _on_poll_finished(self, changed: bool) -> bool:
+        if changed:
+            self._poll_interval_s = _POLL_BASE_S
+        else:
+            self._poll_interval_s = min(self._poll_interval_s * 2, _POLL_MAX_S)
+        if self._visible and not self._poll_timer_id:
+            self._schedule_poll(self._poll_interval_s)
+        return False
+
+    def _poll_checks(self, rows: list[Adw.ActionRow] | None = None) -> None:
+        if rows is not None:
+            self._run_checks(rows)
+            return
         with self._poll_lock:
             if self._poll_running:
                 return
             self._poll_running = True
+        changed = False
         try:
-            rows = list(self._rows_with_checks)
-            if not rows:
-                return
-            with ThreadPoolExecutor(max_workers=min(8, len(rows))) as pool:
-                futures = {pool.submit(run_check, getattr(r, "_dp_check", None)): r for r in rows}
-                for future in as_completed(futures):
-                    row = futures[future]
-                    try:
-                        ok = future.result()
-                    except Exception:
-                        ok = False
-                    GLib.idle_add(self._apply_check_result, row, ok)
+            changed = self._run_checks(list(self._rows_with_checks))
         finally:
             with self._poll_lock:
                 self._poll_running = False
+            GLib.idle_add(self._on_poll_finished, changed)
+
+    def _run_checks(self, rows: list[Adw.ActionRow]) -> bool:
+        """Выполнить проверки строк; True, если хотя бы один результат изменился."""
+        if not rows:
+            return False
+        changed = False
+        with ThreadPoolExecutor(max_workers=min(8, len(rows))) as pool:
+            futures = {pool.submit(run_check, getattr(r, "_dp_check", None)): r for r in rows}
+            for future in as_completed(futures):
+                row = futures[future]
+                try:
+                    ok = future.result()
+                except Exception:
+                    ok = False
+                if getattr(row, "_dp_last_ok", None) != ok:
+                    row._dp_last_ok = ok
+                    changed = True
+                GLib.idle_add(self._apply_check_result, row, ok)
+        return changed
 
     def _apply_check_result(self, row: Adw.ActionRow, ok: bool) -> None:
         status = getattr(row, "_dp_status", None)
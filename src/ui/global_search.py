@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Callable, Sequence
 
 import gi
 
 gi.require_version("Gtk", "4.0")
-from gi.repository import Gdk, GLib, Gtk, Pango
+from gi.repository import Gdk, Gio, GLib, GObject, Gtk, Pango
 
-from core import config
-from ui.common import _MODULES_DIR, load_module
+from core import config, epm_play
+from core.catalog import MODULES_DIR, SYSTEM_APPS_JSON, USER_APPS_JSON, get_catalog, get_module
+from core.checks import flatpak_inventory_generation
+from core.search_index import SearchIndex
 
 OnSearchPick = Callable[[str, str | None], None]
 
@@ -165,12 +170,10 @@ def _setup_detail_items() -> list[GlobalSearchItem]:
 
 
 def _dynamic_module_items(module_file: str, tab_id: str, tab_title: str) -> list[GlobalSearchItem]:
-    data = load_module(module_file)
-    if not data or "groups" not in data:
-        return []
+    module = get_module(module_file)
     tab_kw = _TAB_KEYWORDS.get(tab_id, ())
     items: list[GlobalSearchItem] = []
-    for group in data["groups"]:
+    for group in module.groups:
         gtitle = group.get("title", "")
         for row in group.get("rows", []):
             rid = row.get("id")
@@ -194,27 +197,13 @@ def _dynamic_module_items(module_file: str, tab_id: str, tab_title: str) -> list
     return items
 
 
-def _load_apps_json_for_search() -> dict:
-    user_path = config.CONFIG_DIR / "apps.json"
-    system_path = _MODULES_DIR / "apps.json"
-    path = user_path if user_path.exists() else system_path
-    if not path.exists():
-        return {}
-    try:
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else {}
-    except (OSError, json.JSONDecodeError):
-        return {}
-
-
 def _apps_catalog_items() -> list[GlobalSearchItem]:
     """Пункты из списка приложений (apps.json), включая пользовательскую группу."""
-    data = _load_apps_json_for_search()
+    catalog = get_catalog()
     tab_kw = _TAB_KEYWORDS.get("apps", ())
     USER_GID = "user_apps"
     items: list[GlobalSearchItem] = []
-    for g in data.get("groups", []):
+    for g in catalog.groups:
         gid = g.get("id", "")
         gtitle = g.get("title", "")
         if gid == USER_GID:
@@ -291,11 +280,12 @@ def _extension_catalog_items() -> list[GlobalSearchItem]:
 
 
 def _maintenance_task_items() -> list[GlobalSearchItem]:
-    data = load_module("maintenance")
-    tasks = data.get("tasks", []) if data else []
+    tasks = get_module("maintenance").data.get("tasks", [])
     tab_kw = _TAB_KEYWORDS.get("maintenance", ())
     items: list[GlobalSearchItem] = []
     for t in tasks:
+        if not isinstance(t, dict):
+            continue
         tid = t.get("id")
         label = t.get("label", "")
         if not tid or not label:
@@ -522,42 +512,172 @@ def _flatpak_installed_app_items() -> list[GlobalSearchItem]:
     return items
 
 
+def _epm_play_items() -> list[GlobalSearchItem]:
+    """Приложения из каталога epm play (только закэшированный список, без запуска epm)."""
+    catalog = epm_play.cached()
+    if catalog is None:
+        # Первый запуск: каталог соберётся в фоне и попадёт в индекс при следующей пересборке.
+        epm_play.refresh_in_background()
+        return []
+    tab_kw = _TAB_KEYWORDS.get("apps", ())
+    return [
+        GlobalSearchItem(
+            tab_id="apps",
+            title=app.name,
+            icon_name="application-x-executable-symbolic",
+            subtitle=f"EPM Play · {app.desc}" if app.desc else "EPM Play",
+            keywords=(app.desc, "epm play", "play") + tab_kw,
+            focus_spec=f"play:{app.name}",
+        )
+        for app in catalog.apps
+    ]
+
+
+_SEARCH_INDEX_FILE = config.CONFIG_DIR / "search_index.json"
+_SEARCH_INDEX_FORMAT = 1
+
+
+def _mtimes(*paths: Path) -> list[int]:
+    out: list[int] = []
+    for p in paths:
+        try:
+            out.append(p.stat().st_mtime_ns)
+        except OSError:
+            out.append(0)
+    return out
+
+
+def _extension_dirs_fingerprint() -> list[int]:
+    from tabs.extensions import _SYSTEM_EXT_DIR, _USER_EXT_DIR
+    return _mtimes(_USER_EXT_DIR, _SYSTEM_EXT_DIR)
+
+
+# (имя, сборщик, отпечаток). Отпечаток None — пункты заданы в коде: собираются сразу и не кэшируются;
+# остальные источники читают файлы или запускают процессы и пересобираются только при смене отпечатка.
+_SEARCH_SOURCES: tuple[
+    tuple[str, Callable[[], list[GlobalSearchItem]], Callable[[], object] | None], ...
+] = (
+    ("setup", _setup_detail_items, None),
+    ("terminal", lambda: _dynamic_module_items("terminal", "terminal", "Терминал"),
+     lambda: _mtimes(MODULES_DIR / "terminal.json")),
+    ("amd", lambda: _dynamic_module_items("amd", "amd", "AMD Radeon"),
+     lambda: _mtimes(MODULES_DIR / "amd.json")),
+    ("maintenance", _maintenance_task_items,
+     lambda: _mtimes(MODULES_DIR / "maintenance.json")),
+    ("apps", _apps_catalog_items,
+     lambda: _mtimes(USER_APPS_JSON, SYSTEM_APPS_JSON)),
+    ("epm_play", _epm_play_items, epm_play.generation),
+    ("extensions", _extension_catalog_items, _extension_dirs_fingerprint),
+    ("flatpak", _flatpak_section_items, None),
+    ("flatpak_apps", _flatpak_installed_app_items, flatpak_inventory_generation),
+    ("tweaks", _tweaks_section_items, None),
+)
+
+_source_cache: dict[str, dict] | None = None
+_source_cache_lock = threading.Lock()
+
+
+def _item_to_json(item: GlobalSearchItem) -> list:
+    return [item.tab_id, item.title, item.icon_name, item.subtitle, list(item.keywords), item.focus_spec]
+
+
+def _item_from_json(row: list) -> GlobalSearchItem:
+    tab_id, title, icon_name, subtitle, keywords, focus_spec = row
+    return GlobalSearchItem(tab_id, title, icon_name, subtitle, tuple(keywords), focus_spec)
+
+
+def _read_source_cache() -> dict[str, dict]:
+    try:
+        with open(_SEARCH_INDEX_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != _SEARCH_INDEX_FORMAT or data.get("version") != config.VERSION:
+            return {}
+        return {
+            name: {"fingerprint": src["fingerprint"], "items": [_item_from_json(r) for r in src["items"]]}
+            for name, src in data.get("sources", {}).items()
+        }
+    except (OSError, json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+        return {}
+
+
+def _write_source_cache(sources: dict[str, dict]) -> None:
+    data = {
+        "format": _SEARCH_INDEX_FORMAT,
+        "version": config.VERSION,
+        "sources": {
+            name: {"fingerprint": src["fingerprint"], "items": [_item_to_json(it) for it in src["items"]]}
+            for name, src in sources.items()
+        },
+    }
+    tmp = _SEARCH_INDEX_FILE.with_suffix(".tmp")
+    try:
+        config.CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, _SEARCH_INDEX_FILE)
+    except OSError:
+        pass
+
+
+def _loaded_sources() -> dict[str, dict]:
+    global _source_cache
+    with _source_cache_lock:
+        if _source_cache is None:
+            _source_cache = _read_source_cache()
+        return dict(_source_cache)
+
+
+def _assemble_items(
+    main_tabs: Sequence[tuple], borg_tab: tuple, sources: dict[str, dict]
+) -> list[GlobalSearchItem]:
+    items = tab_items_from_specs(main_tabs, borg_tab)
+    for name, build, fingerprint in _SEARCH_SOURCES:
+        if fingerprint is None:
+            items.extend(build())
+        else:
+            items.extend(sources.get(name, {}).get("items", ()))
+    return items
+
+
 def build_all_search_items(
     main_tabs: Sequence[tuple],
     borg_tab: tuple,
 ) -> list[GlobalSearchItem]:
-    items: list[GlobalSearchItem] = []
-    items.extend(tab_items_from_specs(main_tabs, borg_tab))
-    items.extend(_setup_detail_items())
-    items.extend(_dynamic_module_items("terminal", "terminal", "Терминал"))
-    items.extend(_dynamic_module_items("amd", "amd", "AMD Radeon"))
-    items.extend(_maintenance_task_items())
-    items.extend(_apps_catalog_items())
-    items.extend(_extension_catalog_items())
-    items.extend(_flatpak_section_items())
-    items.extend(_flatpak_installed_app_items())
-    items.extend(_tweaks_section_items())
-    return items
+    sources = {name: {"items": build()} for name, build, fp in _SEARCH_SOURCES if fp is not None}
+    return _assemble_items(main_tabs, borg_tab, sources)
 
 
-def _normalize_blob(item: GlobalSearchItem) -> str:
-    parts = [item.title, item.subtitle, *item.keywords]
-    return " ".join(parts).lower()
+def load_search_index(main_tabs: Sequence[tuple], borg_tab: tuple) -> SearchIndex:
+    """Индекс из дискового кэша без проверки отпечатков: не запускает процессов, годится до первой отрисовки."""
+    return SearchIndex(_assemble_items(main_tabs, borg_tab, _loaded_sources()))
 
 
-def filter_items(items: Sequence[GlobalSearchItem], query: str) -> list[GlobalSearchItem]:
-    q = query.strip().lower()
-    if not q:
-        return []
-    fragments = [f for f in q.split() if f]
-    if not fragments:
-        return []
-    out: list[GlobalSearchItem] = []
-    for it in items:
-        blob = _normalize_blob(it)
-        if all(fr in blob for fr in fragments):
-            out.append(it)
-    return out
+def build_search_index(main_tabs: Sequence[tuple], borg_tab: tuple) -> SearchIndex:
+    """Пересобирает только источники с изменившимся отпечатком и сохраняет результат на диск."""
+    global _source_cache
+    sources = _loaded_sources()
+    changed = False
+    for name, build, fingerprint in _SEARCH_SOURCES:
+        if fingerprint is None:
+            continue
+        fp = fingerprint()
+        cached = sources.get(name)
+        if cached is not None and cached["fingerprint"] == fp:
+            continue
+        sources[name] = {"fingerprint": fp, "items": build()}
+        changed = True
+    if changed:
+        with _source_cache_lock:
+            _source_cache = sources
+        _write_source_cache(sources)
+    return SearchIndex(_assemble_items(main_tabs, borg_tab, sources))
+
+
+def filter_items(
+    items: Sequence[GlobalSearchItem] | SearchIndex, query: str
+) -> list[GlobalSearchItem]:
+    index = items if isinstance(items, SearchIndex) else SearchIndex(items)
+    return index.search(query)
 
 
 _KRUNNER_CSS = b"""
@@ -585,9 +705,12 @@ _KRUNNER_CSS = b"""
 .ab-krunner-scroll {
   margin-top: 10px;
 }
-.ab-krunner-scroll list {
+.ab-krunner-scroll listview {
   background-color: @card_bg_color;
 }
+.ab-krunner-scroll listview > row {
+  border-radius: 10px;
+}
 /* Non-transparent dimming: a fully clear backdrop lets widgets below show through and causes ghosting/double icons */
 .ab-krunner-backdrop {
   background-color: alpha(black, 0.62);
@@ -609,14 +732,27 @@ def _ensure_krunner_css() -> None:
     _krunner_css_installed = True
 
 
+_SEARCH_DEBOUNCE_MS = 60
+
+
+class _SearchResult(GObject.Object):
+    """Обёртка пункта поиска для Gio.ListStore."""
+
+    def __init__(self, item: GlobalSearchItem):
+        super().__init__()
+        self.item = item
+
+
 class GlobalSearchPanel(Gtk.Overlay):
     """Полноэкранный слой поверх стека вкладок: карточка по центру, клик по полю вокруг закрывает."""
 
     def __init__(self):
         super().__init__()
-        self._items: list[GlobalSearchItem] = []
+        self._index = SearchIndex(())
         self._on_pick: OnSearchPick = lambda *_: None
         self._filtered: list[GlobalSearchItem] = []
+        self._result_objects: dict[GlobalSearchItem, _SearchResult] = {}
+        self._debounce_id = 0
 
         self.set_hexpand(True)
         self.set_vexpand(True)
@@ -636,10 +772,22 @@ class GlobalSearchPanel(Gtk.Overlay):
         entry_keys.connect("key-pressed", self._on_entry_key_pressed)
         self._entry.add_controller(entry_keys)
 
-        self._list = Gtk.ListBox()
-        self._list.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self._list.add_css_class("boxed-list")
-        self._list.connect("row-activated", self._on_row_activated)
+        self._store = Gio.ListStore.new(_SearchResult)
+        self._selection = Gtk.SingleSelection.new(self._store)
+        self._selection.set_autoselect(True)
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_row_setup)
+        factory.connect("bind", self._on_row_bind)
+        self._list = Gtk.ListView.new(self._selection, factory)
+        self._list.set_single_click_activate(True)
+        self._list.connect("activate", self._on_row_activated)
+
+        self._empty_label = Gtk.Label(label="Ничего не найдено")
+        self._empty_label.add_css_class("dim-label")
+        self._empty_label.set_margin_top(20)
+        self._empty_label.set_margin_bottom(20)
+        self._empty_label.set_margin_start(8)
+        self._empty_label.set_visible(False)
 
         self._result_scroll = Gtk.ScrolledWindow()
         self._result_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
@@ -653,6 +801,7 @@ class GlobalSearchPanel(Gtk.Overlay):
         inner.add_css_class("ab-krunner-panel")
         inner.append(self._entry)
         inner.append(self._result_scroll)
+        inner.append(self._empty_label)
 
         self._floating_card = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self._floating_card.add_css_class("ab-krunner-floating-card")
@@ -681,23 +830,23 @@ class GlobalSearchPanel(Gtk.Overlay):
         list_keys.connect("key-pressed", self._on_key_pressed)
         self._list.add_controller(list_keys)
 
-        self._rebuild_rows()
+        self._apply_results()
         self.set_visible(False)
 
-    def open(self, items: Sequence[GlobalSearchItem], on_pick: OnSearchPick) -> None:
-        self._items = list(items)
+    def open(self, items: Sequence[GlobalSearchItem] | SearchIndex, on_pick: OnSearchPick) -> None:
+        self._index = items if isinstance(items, SearchIndex) else SearchIndex(items)
         self._on_pick = on_pick
         self._entry.set_text("")
         self._filtered = []
-        self._rebuild_rows()
+        self._apply_results()
         self.set_visible(True)
         GLib.idle_add(self._entry.grab_focus)
 
-    def update_items(self, items: Sequence[GlobalSearchItem]) -> None:
-        self._items = list(items)
+    def update_items(self, items: Sequence[GlobalSearchItem] | SearchIndex) -> None:
+        self._index = items if isinstance(items, SearchIndex) else SearchIndex(items)
         if self._entry.get_text().strip():
-            self._filtered = filter_items(self._items, self._entry.get_text())
-            self._rebuild_rows()
+            self._filtered = self._index.search(self._entry.get_text())
+            self._apply_results()
 
     def dismiss(self) -> None:
         self.set_visible(False)
@@ -718,93 +867,107 @@ class GlobalSearchPanel(Gtk.Overlay):
         return False
 
     def _on_entry_text_changed(self, *_args):
-        self._filtered = filter_items(self._items, self._entry.get_text())
-        self._rebuild_rows()
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+            self._debounce_id = 0
+        if not self._entry.get_text().strip():
+            self._run_search()
+            return
+        self._debounce_id = GLib.timeout_add(_SEARCH_DEBOUNCE_MS, self._on_debounce_timeout)
+
+    def _on_debounce_timeout(self) -> bool:
+        self._debounce_id = 0
+        self._run_search()
+        return GLib.SOURCE_REMOVE
+
+    def _run_search(self) -> None:
+        self._filtered = self._index.search(self._entry.get_text())
+        self._apply_results()
 
     def _on_entry_activate(self, _entry):
         if not _entry.get_text().strip():
             self.dismiss()
             return
-        row = self._list.get_selected_row()
-        if row is None:
-            first = self._list.get_row_at_index(0)
-            if first is not None:
-                self._list.select_row(first)
-                row = first
-        if row is not None:
-            idx = row.get_index()
-            if 0 <= idx < len(self._filtered):
-                self._activate_item(self._filtered[idx])
-
-    def _on_row_activated(self, _list, row: Gtk.ListBoxRow):
-        idx = row.get_index()
-        if 0 <= idx < len(self._filtered):
-            self._activate_item(self._filtered[idx])
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+            self._debounce_id = 0
+            self._run_search()
+        pos = self._selection.get_selected()
+        if pos == Gtk.INVALID_LIST_POSITION:
+            pos = 0
+        if 0 <= pos < len(self._filtered):
+            self._activate_item(self._filtered[pos])
+
+    def _on_row_activated(self, _list, pos: int):
+        if 0 <= pos < len(self._filtered):
+            self._activate_item(self._filtered[pos])
 
     def _activate_item(self, item: GlobalSearchItem):
         self._on_pick(item.tab_id, item.focus_spec)
         self.dismiss()
 
-    def _rebuild_rows(self):
-        while True:
-            row = self._list.get_row_at_index(0)
-            if row is None:
-                break
-            self._list.remove(row)
-
+    def _on_row_setup(self, _factory, list_item: Gtk.ListItem) -> None:
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        hbox.set_margin_top(10)
+        hbox.set_margin_bottom(10)
+        hbox.set_margin_start(12)
+        hbox.set_margin_end(12)
+
+        img = Gtk.Image()
+        img.set_pixel_size(24)
+
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        vbox.set_hexpand(True)
+        t = Gtk.Label()
+        t.add_css_class("heading")
+        t.set_halign(Gtk.Align.START)
+        t.set_ellipsize(Pango.EllipsizeMode.END)
+        vbox.append(t)
+        s = Gtk.Label()
+        s.add_css_class("dim-label")
+        s.set_halign(Gtk.Align.START)
+        s.set_ellipsize(Pango.EllipsizeMode.END)
+        vbox.append(s)
+
+        hbox.append(img)
+        hbox.append(vbox)
+        hbox._ab_widgets = (img, t, s)
+        list_item.set_child(hbox)
+
+    def _on_row_bind(self, _factory, list_item: Gtk.ListItem) -> None:
+        it = list_item.get_item().item
+        img, t, s = list_item.get_child()._ab_widgets
+        img.set_from_icon_name(it.icon_name)
+        t.set_label(it.title)
+        s.set_label(it.subtitle)
+        s.set_visible(bool(it.subtitle))
+
+    def _result_object(self, item: GlobalSearchItem) -> _SearchResult:
+        obj = self._result_objects.get(item)
+        if obj is None:
+            obj = _SearchResult(item)
+            self._result_objects[item] = obj
+        return obj
+
+    def _apply_results(self):
+        """Заменяет в модели только изменившийся хвост списка результатов."""
         query = self._entry.get_text().strip()
-
-        if not query:
-            self._result_scroll.set_visible(False)
-            return
-
-        self._result_scroll.set_visible(True)
-
-        if not self._filtered:
-            row = Gtk.ListBoxRow()
-            row.set_activatable(False)
-            row.set_selectable(False)
-            lbl = Gtk.Label(label="Ничего не найдено")
-            lbl.add_css_class("dim-label")
-            lbl.set_margin_top(20)
-            lbl.set_margin_bottom(20)
-            lbl.set_margin_start(8)
-            row.set_child(lbl)
-            self._list.append(row)
-            return
-
-        for it in self._filtered:
-            row = Gtk.ListBoxRow()
-            row.set_activatable(True)
-            hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-            hbox.set_margin_top(10)
-            hbox.set_margin_bottom(10)
-            hbox.set_margin_start(12)
-            hbox.set_margin_end(12)
-
-            img = Gtk.Image.new_from_icon_name(it.icon_name)
-            img.set_pixel_size(24)
-
-            vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
-            vbox.set_hexpand(True)
-            t = Gtk.Label(label=it.title)
-            t.add_css_class("heading")
-            t.set_halign(Gtk.Align.START)
-            t.set_ellipsize(Pango.EllipsizeMode.END)
-            vbox.append(t)
-            if it.subtitle:
-                s = Gtk.Label(label=it.subtitle)
-                s.add_css_class("dim-label")
-                s.set_halign(Gtk.Align.START)
-                s.set_ellipsize(Pango.EllipsizeMode.END)
-                vbox.append(s)
-
-            hbox.append(img)
-            hbox.append(vbox)
-            row.set_child(hbox)
-            self._list.append(row)
-
-        first = self._list.get_row_at_index(0)
-        if first is not None and first.get_selectable():
-            self._list.select_row(first)
-
+        results = self._filtered if query else []
+
+        n_old = self._store.get_n_items()
+        keep = 0
+        limit = min(n_old, len(results))
+        while keep < limit and self._store.get_item(keep).item == results[keep]:
+            keep += 1
+        if keep < n_old or keep < len(results):
+            self._store.splice(
+                keep, n_old - keep, [self._result_object(it) for it in results[keep:]]
+            )
+        if len(self._result_objects) > 4 * max(len(results), 256):
+            self._result_objects = {it: self._result_objects[it] for it in results}
+
+        self._result_scroll.set_visible(bool(results))
+        self._empty_label.set_visible(bool(query) and not results)
+        if results:
+            self._selection.set_selected(0)
+            self._result_scroll.get_vadjustment().set_value(0)
@@ -9,11 +9,39 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Adw, GLib, Gdk, Gtk
 
-from core.packages import InstallPreview, get_install_preview
+from core.packages import InstallPreview, PackageChange, get_install_preview
+from core.prefetch import Prefetch
 
 _MAX_PKG_ROWS = 20
 
 
+def _fmt_size(size: int) -> str:
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} ГБ"
+
+
+def _change_details(change: PackageChange) -> str:
+    """Версии и размеры пакета для строки списка: «1.0 → 1.1 · 2 МБ, +5 МБ на диске»."""
+    if change.action == "upgrade":
+        parts = [f"{change.old_version} → {change.new_version}"]
+    else:
+        parts = [change.new_version or change.old_version]
+    sizes = []
+    if change.download_bytes:
+        sizes.append(_fmt_size(change.download_bytes))
+    if change.size_delta:
+        sign = "+" if change.size_delta > 0 else ""
+        sizes.append(f"{sign}{_fmt_size(change.size_delta)} на диске")
+    if sizes:
+        parts.append(", ".join(sizes))
+    return " · ".join(p for p in parts if p)
+
+
 class InstallPreviewDialog(Adw.Window):
 
     def __init__(
@@ -46,6 +74,7 @@ class InstallPreviewDialog(Adw.Window):
         self._on_cancel = on_cancel
         self._on_no_changes = on_no_changes or on_cancel
         self._confirmed = False
+        self._prefetch: Prefetch | None = None
         self._log = log
         self._no_changes_message = no_changes_message or f"ℹ  «{app_name}»: уже установлен, обновлять нечего.\n"
 
@@ -82,6 +111,17 @@ class InstallPreviewDialog(Adw.Window):
         bar.set_margin_start(16)
         bar.set_margin_end(16)
 
+        self._prefetch_box = Gtk.Box(spacing=6)
+        self._prefetch_box.set_valign(Gtk.Align.CENTER)
+        self._prefetch_spinner = Gtk.Spinner()
+        self._prefetch_box.append(self._prefetch_spinner)
+        self._prefetch_label = Gtk.Label()
+        self._prefetch_label.add_css_class("dim-label")
+        self._prefetch_label.add_css_class("caption")
+        self._prefetch_box.append(self._prefetch_label)
+        self._prefetch_box.set_visible(False)
+        bar.append(self._prefetch_box)
+
         spacer = Gtk.Box()
         spacer.set_hexpand(True)
         bar.append(spacer)
@@ -140,9 +180,30 @@ class InstallPreviewDialog(Adw.Window):
                 self._log(self._no_changes_message)
         else:
             self._no_active_changes = False
+            self._start_prefetch(preview)
 
         return False
 
+    def _start_prefetch(self, preview: InstallPreview):
+        """Пока пользователь читает превью, скачать пакеты; подтверждение тогда только развернёт их."""
+        if self._confirmed:
+            return
+        self._prefetch = Prefetch.for_preview(preview, self._cmd, self._runner)
+        if self._prefetch is None:
+            return
+        self._prefetch_label.set_label("Загрузка пакетов заранее…")
+        self._prefetch_spinner.start()
+        self._prefetch_box.set_visible(True)
+        self._prefetch.start(lambda ok: GLib.idle_add(self._on_prefetch_done, ok))
+
+    def _on_prefetch_done(self, ok: bool):
+        self._prefetch_spinner.stop()
+        self._prefetch_spinner.set_visible(False)
+        self._prefetch_label.set_label(
+            "Пакеты загружены" if ok else "Загрузка заранее не удалась — пакеты скачаются при установке"
+        )
+        return False
+
     def _build_content(self, preview: InstallPreview):
         content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=16)
         content_box.set_margin_top(16)
@@ -168,12 +229,15 @@ class InstallPreviewDialog(Adw.Window):
                 desc_lbl.set_halign(Gtk.Align.START)
                 content_box.append(desc_lbl)
 
+            details = {c.name: _change_details(c) for c in preview.changes}
+
             if preview.new_packages:
                 icon = "package-x-generic-symbolic" if preview.source_type == "flatpak" else "list-add-symbolic"
                 content_box.append(self._build_package_group(
                     f"Устанавливается ({len(preview.new_packages)})",
                     preview.new_packages,
                     icon,
+                    details,
                 ))
 
             if preview.upgraded_packages:
@@ -181,6 +245,7 @@ class InstallPreviewDialog(Adw.Window):
                     f"Обновляется ({len(preview.upgraded_packages)})",
                     preview.upgraded_packages,
                     "software-update-available-symbolic",
+                    details,
                 ))
 
             if preview.removed_packages:
@@ -188,6 +253,7 @@ class InstallPreviewDialog(Adw.Window):
                     f"Удаляется ({len(preview.removed_packages)})",
                     preview.removed_packages,
                     "user-trash-symbolic",
+                    details,
                 ))
 
             no_active_changes = not any([
@@ -207,7 +273,8 @@ class InstallPreviewDialog(Adw.Window):
                     "package-x-generic-symbolic",
                 ))
 
-            if preview.download_size or preview.disk_space:
+            if (preview.download_size or preview.disk_space
+                    or preview.total_download is not None or preview.total_size_delta is not None):
                 content_box.append(self._build_sizes_group(preview))
 
             if preview.warnings:
@@ -290,7 +357,8 @@ class InstallPreviewDialog(Adw.Window):
         return box
 
     def _build_package_group(
-        self, title: str, packages: list[str], icon_name: str
+        self, title: str, packages: list[str], icon_name: str,
+        details: dict[str, str] | None = None,
     ) -> Gtk.Box:
         outer = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
 
@@ -343,6 +411,16 @@ class InstallPreviewDialog(Adw.Window):
             lbl.set_xalign(0)
             item.append(lbl)
 
+            detail = (details or {}).get(pkg)
+            if detail:
+                detail_lbl = Gtk.Label(label=detail)
+                detail_lbl.add_css_class("dim-label")
+                detail_lbl.add_css_class("caption")
+                detail_lbl.set_halign(Gtk.Align.END)
+                detail_lbl.set_wrap(True)
+                detail_lbl.set_xalign(1)
+                item.append(detail_lbl)
+
             gesture = Gtk.GestureClick.new()
             gesture.connect("released", lambda _g, _n, _x, _y, p=pkg: self._copy_to_clipboard(p))
             item.add_controller(gesture)
@@ -432,20 +510,27 @@ class InstallPreviewDialog(Adw.Window):
         group = Adw.PreferencesGroup()
         group.set_title("Использование ресурсов")
 
-        if preview.download_size:
+        download = preview.download_size
+        if not download and preview.total_download is not None:
+            download = _fmt_size(preview.total_download)
+        if download:
             row = Adw.ActionRow()
             row.set_title("Загрузка")
-            row.set_subtitle(preview.download_size)
+            row.set_subtitle(download)
             try:
                 row.set_icon_name("network-transmit-receive-symbolic")
             except Exception:
                 pass
             group.add(row)
 
-        if preview.disk_space:
+        disk = preview.disk_space
+        if not disk and preview.total_size_delta is not None:
+            delta = preview.total_size_delta
+            disk = _fmt_size(delta) if delta >= 0 else f"освободится {_fmt_size(-delta)}"
+        if disk:
             row = Adw.ActionRow()
             row.set_title("Место на диске")
-            row.set_subtitle(preview.disk_space)
+            row.set_subtitle(disk)
             try:
                 row.set_icon_name("drive-harddisk-symbolic")
             except Exception:
@@ -514,6 +599,8 @@ class InstallPreviewDialog(Adw.Window):
         if self._confirmed:
             return
         self._confirmed = True
+        if self._prefetch is not None:
+            self._prefetch.keep()
         self.close()
         if getattr(self, "_no_active_changes", False):
             self._on_no_changes()
@@ -527,6 +614,8 @@ class InstallPreviewDialog(Adw.Window):
 
     def _on_close_request(self, _) -> bool:
         if not self._confirmed:
+            if self._prefetch is not None:
+                self._prefetch.cancel()
             self._on_cancel()
         return False
 
@@ -109,6 +109,7 @@ def ensure_ab_source_badge_styles() -> None:
 from core import backend
 from core import config
 from core.checks import invalidate_flatpak_cache
+from core.progress import PROGRESS_APT, PROGRESS_FLATPAK, PROGRESS_LINES
 from ui.install_preview_dialog import InstallPreviewDialog
 from ui.widgets import (
     make_icon, make_button, make_status_icon,
@@ -596,7 +597,8 @@ class AppRow(Adw.ActionRow):
         self._log(f"\n▶  Установка {self._app['label']} ({src['label']})...\n")
 
         win = self.get_root()
-        if hasattr(win, "start_progress"): win.start_progress(f"Установка {self._app['label']}...")
+        if hasattr(win, "start_progress"):
+            win.start_progress(f"Установка {self._app['label']}...", progress_format=self._progress_format(cmd))
 
         if is_epm:
             if len(cmd) > 1 and cmd[1] in ("install", "-i", "remove", "-e") and "-y" not in cmd:
@@ -631,6 +633,16 @@ class AppRow(Adw.ActionRow):
         else:
             backend.run_privileged(cmd, _log_wrapper, _first_attempt_done)
 
+    @staticmethod
+    def _progress_format(cmd: list[str]) -> str:
+        if not cmd:
+            return PROGRESS_LINES
+        if cmd[0] == "flatpak":
+            return PROGRESS_FLATPAK
+        if cmd[0] in ("epm", "apt-get") and "play" not in cmd:
+            return PROGRESS_APT
+        return PROGRESS_LINES
+
     def _on_uninstall(self, _):
         if self._installing:
             return
@@ -691,25 +703,58 @@ class AppRow(Adw.ActionRow):
         return False
 
     def _install_done(self, ok):
+        win = self.get_root()
+        if hasattr(win, "stop_progress"): win.stop_progress(ok)
+        self._finish_install(ok)
+
+    def _finish_install(self, ok):
         self._installing = False
         self._install_event.set()
         self._prog.set_visible(False)
-        win = self.get_root()
         if ok:
             invalidate_flatpak_cache()
             self._log(f"✔  {self._app['label']} установлен!\n")
-            if hasattr(win, "stop_progress"): win.stop_progress(ok)
             config.state_set(self._state_key, True)
             self._installed_source_index = self._selected_source_index
             self._set_installed_ui(True)
         else:
             self._log(f"✘  Ошибка установки {self._app['label']}\n")
-            if hasattr(win, "stop_progress"): win.stop_progress(ok)
             self._btn.set_sensitive(True)
             if self._src_menu_btn:
                 self._src_menu_btn.set_sensitive(True)
             self._btn.set_label("Повторить")
 
+    def selected_source(self) -> dict | None:
+        idx = self._selected_source_index
+        if not self._sources:
+            return None
+        return self._sources[idx if 0 <= idx < len(self._sources) else 0]
+
+    def set_bulk_pending(self):
+        """Строка включена в массовую установку: сама команду не запускает, ждёт finish_bulk."""
+        self._installing = True
+        self._install_event.clear()
+        self._btn.set_sensitive(False)
+        self._btn.set_label("…")
+        if self._src_menu_btn:
+            self._src_menu_btn.set_sensitive(False)
+        self._prog.set_visible(True)
+        self._prog.set_fraction(0.0)
+        GLib.timeout_add(120, self._pulse)
+
+    def finish_bulk(self, ok):
+        """ok=None — до строки не дошли (отмена): вернуть кнопку в исходное состояние."""
+        if ok is None:
+            self._installing = False
+            self._install_event.set()
+            self._prog.set_visible(False)
+            self._btn.set_sensitive(True)
+            self._btn.set_label("Установить")
+            if self._src_menu_btn:
+                self._src_menu_btn.set_sensitive(True)
+            return
+        self._finish_install(ok)
+
     def _uninstall_done(self, ok):
         self._installing = False
         self._prog.set_visible(False)
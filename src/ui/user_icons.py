@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+from core import config, pathindex
+
+ICONS_BASE = Path(__file__).parent.parent.parent / "icons"
+_USER_HICOLOR = Path.home() / ".local" / "share" / "icons" / "hicolor"
+_USER_ICON_CATEGORIES = (("scalable", "apps"), ("scalable", "devices"), ("symbolic", "devices"))
+_USER_ICONS_STAMP = config.CONFIG_DIR / "icons.stamp"
+
+
+def _user_icons_stamp() -> str:
+    """Версия приложения и mtime каталогов-источников: меняется при обновлении набора иконок."""
+    parts = [config.VERSION]
+    for kind, cat in _USER_ICON_CATEGORIES:
+        try:
+            parts.append(str((ICONS_BASE / "hicolor" / kind / cat).stat().st_mtime_ns))
+        except OSError:
+            parts.append("0")
+    return ":".join(parts)
+
+
+def _update_icon_cache() -> None:
+    """Обновить общий кэш темы hicolor, если он есть: им пользуются и иконки других приложений.
+
+    Без gtk-update-icon-cache кэш не трогаем — GTK сам не доверяет кэшу старше каталогов.
+    """
+    if not (_USER_HICOLOR / "icon-theme.cache").exists():
+        return
+    tool = pathindex.which("gtk4-update-icon-cache") or pathindex.which("gtk-update-icon-cache")
+    if tool is None:
+        return
+    try:
+        subprocess.run([tool, "-q", "-t", "-f", str(_USER_HICOLOR)], capture_output=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
+def install_user_icons_if_needed() -> bool:
+    """Копирует иконки в ~/.local/share/icons только после обновления; True — что-то скопировано."""
+    stamp = _user_icons_stamp()
+    try:
+        if _USER_HICOLOR.is_dir() and _USER_ICONS_STAMP.read_text(encoding="utf-8") == stamp:
+            return False
+    except OSError:
+        pass
+    copied = False
+    for kind, cat in _USER_ICON_CATEGORIES:
+        src_cat = ICONS_BASE / "hicolor" / kind / cat
+        dst_cat = _USER_HICOLOR / kind / cat
+        if not src_cat.exists():
+            continue
+        try:
+            dst_cat.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            continue
+        for svg in src_cat.glob("*.svg"):
+            dst = dst_cat / svg.name
+            try:
+                src_st = svg.stat()
+                dst_st = dst.stat() if dst.exists() else None
+                if not dst_st or dst_st.st_size != src_st.st_size or dst_st.st_mtime < src_st.st_mtime:
+                    shutil.copy2(svg, dst)
+                    copied = True
+            except OSError:
+                pass
+    if copied:
+        _update_icon_cache()
+    try:
+        config.CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+        _USER_ICONS_STAMP.write_text(stamp, encoding="utf-8")
+    except OSError:
+        pass
+    return copied
@@ -78,3 +78,15 @@ def scroll_child_into_view(scrolled: Gtk.ScrolledWindow, child: Gtk.Widget) -> N
         scrolled.scroll_child(child, Gtk.ScrollChildScrollFlags.FOCUS)
     except (AttributeError, TypeError):
         child.grab_focus()
+
+
+def sync_children(current: list, desired: list, add, remove) -> None:
+    """Привести дочерние виджеты контейнера к desired: общий префикс не трогается, хвост снимается и
+    добавляется заново (уже созданные виджеты переиспользуются)."""
+    keep = 0
+    while keep < len(current) and keep < len(desired) and current[keep] is desired[keep]:
+        keep += 1
+    for w in current[keep:]:
+        remove(w)
+    for w in desired[keep:]:
+        add(w)
@@ -4,13 +4,11 @@ import json
 import os
 import platform
 import queue
-import re
 import shutil
 import subprocess
 import sys
 import threading
 import time
-from pathlib import Path
 
 import gi
 gi.require_version("Gtk", "4.0")
@@ -19,16 +17,9 @@ from gi.repository import Adw, Gdk, Gio, GLib, Gtk, Pango
 
 from core import backend
 from core import config
+from core import pathindex
 from core.checks import invalidate_app_detection_caches
-
-_ALT_ZERO_GUIDE_URL = "https://plafon.gitbook.io/alt-zero"
-
-# borg create --progress: "2.88 GB O 1.70 GB C 1.60 GB D 14576 N path/to/file"
-_BORG_CREATE_PROGRESS_RE = re.compile(
-    r"^([\d.,]+\s+\S+)\s+O\s+([\d.,]+\s+\S+)\s+C\s+([\d.,]+\s+\S+)\s+D\s+"
-    r"(?:[\d.,]+\s+%\s+)?"
-    r"(\d+)\s+N\s*(.*)$"
-)
+from core.progress import PROGRESS_LINES, get_progress_parser
 from tabs.setup import SetupPage
 from tabs.apps import AppsPage
 from tabs.extensions import ExtensionsPage
@@ -39,6 +30,9 @@ from tabs.maintenance import MaintenancePage
 from tabs.tweaks import TweaksPage
 from tabs.flatpak import FlatpakPage
 from tabs.timesync import BorgPage
+from ui.user_icons import ICONS_BASE, install_user_icons_if_needed
+
+_ALT_ZERO_GUIDE_URL = "https://plafon.gitbook.io/alt-zero"
 
 
 class AltBoosterWindow(Adw.ApplicationWindow):
@@ -64,46 +58,16 @@ class AltBoosterWindow(Adw.ApplicationWindow):
             icon_theme = "alt-workstation"
         Gtk.Settings.get_default().set_property("gtk-icon-theme-name", icon_theme)
 
-        _icons_base = Path(__file__).parent.parent.parent / "icons"
-
-        _hicolor_src = _icons_base / "hicolor"
-        _dst_hicolor = Path.home() / ".local" / "share" / "icons" / "hicolor"
-        _icons_copied = False
-        for _kind, _cat in (("scalable", "apps"), ("scalable", "devices"), ("symbolic", "devices")):
-            _src_cat = _hicolor_src / _kind / _cat
-            _dst_cat = _dst_hicolor / _kind / _cat
-            if not _src_cat.exists():
-                continue
-            _dst_cat.mkdir(parents=True, exist_ok=True)
-            for _svg in _src_cat.glob("*.svg"):
-                _dst = _dst_cat / _svg.name
-                try:
-                    _src_st = _svg.stat()
-                    _dst_st = _dst.stat() if _dst.exists() else None
-                    if not _dst_st or _dst_st.st_size != _src_st.st_size or _dst_st.st_mtime < _src_st.st_mtime:
-                        shutil.copy2(_svg, _dst)
-                        _icons_copied = True
-                except OSError:
-                    pass
-
-        if _icons_copied:
-            def _update_icon_cache(_dst_hicolor=_dst_hicolor):
-                try:
-                    subprocess.run(
-                        ["gtk-update-icon-cache", "-f", "-t", str(_dst_hicolor)],
-                        capture_output=True, timeout=5,
-                    )
-                except (OSError, subprocess.TimeoutExpired):
-                    pass
-            threading.Thread(target=_update_icon_cache, daemon=True).start()
-
         _it = Gtk.IconTheme.get_for_display(Gdk.Display.get_default())
-        _it.add_search_path(str(_icons_base))
+        _it.add_search_path(str(ICONS_BASE))
 
         self._reset_status_timer_id = None
         self._last_app_detection_cache_flush = 0.0
         self._progress_message = ""
         self._op_card_pct: float | None = None
+        self._progress_parser = get_progress_parser(PROGRESS_LINES)
+        self._op_card_pending = None
+        self._op_card_tick_id = 0
         self._log_queue = queue.SimpleQueue()
         self._log_widget = self._build_log_panel()
 
@@ -184,9 +148,10 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         self._content_host_overlay.set_vexpand(True)
         self._global_search_panel = None
         self._log_overlay_panel = None
-        self._search_items_cache: list | None = None
+        self._search_index = None
         self._search_items_building = False
         self._search_items_built_at: float = 0.0
+        threading.Thread(target=self._load_cached_search_index, daemon=True).start()
 
         root.append(self._content_host_overlay)
 
@@ -245,6 +210,13 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         section_diag.append("Очистить кэш", "win.reset_state")
         menu.append_section(None, section_diag)
 
+        if config.DEBUG:
+            section_debug = Gio.Menu()
+            section_debug.append("Экспорт задержек главного цикла", "win.export_stalls")
+            section_debug.append("Отчёт о дочерних процессах", "win.spawn_report")
+            section_debug.append("Профилирование памяти (вкл/выкл)", "win.memprofile")
+            menu.append_section("Отладка", section_debug)
+
         section_reset = Gio.Menu()
         section_reset.append("Сброс настроек приложения", "win.reset_config")
         menu.append_section(None, section_reset)
@@ -375,6 +347,9 @@ class AltBoosterWindow(Adw.ApplicationWindow):
             ("reset_config",      self._reset_config),
             ("open_log",          self._open_log_file),
             ("global_search",     self._present_global_search),
+            ("export_stalls",     self._export_stall_report),
+            ("spawn_report",      self._show_spawn_report),
+            ("memprofile",        self._toggle_memprofile),
         ]
         for name, cb in actions:
             a = Gio.SimpleAction.new(name, None)
@@ -393,6 +368,9 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         app.set_accels_for_action("win.about", ["<Ctrl>F1"])
         app.set_accels_for_action("win.show-help-overlay", ["<Ctrl>question"])
         app.set_accels_for_action("win.global_search", ["<Ctrl>k"])
+        if config.DEBUG:
+            app.set_accels_for_action("win.memprofile", ["<Ctrl><Shift>m"])
+            self._register_memprofile_caches()
 
         self.set_help_overlay(self._build_shortcuts_window())
 
@@ -931,17 +909,34 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         if config.INITIAL_TAB and config.INITIAL_TAB in self._pages:
             GLib.idle_add(self._stack.set_visible_child_name, config.INITIAL_TAB)
         GLib.timeout_add(2000, self._warmup_search_cache)
+        GLib.idle_add(self._start_user_icons_install, priority=GLib.PRIORITY_LOW)
+        if config.DEBUG:
+            GLib.timeout_add_seconds(15, self._finish_startup_spawn_phase)
+
+    def _start_user_icons_install(self) -> bool:
+        def _install():
+            if install_user_icons_if_needed():
+                GLib.idle_add(self._refresh_icon_theme)
+
+        threading.Thread(target=_install, daemon=True).start()
+        return False
+
+    def _refresh_icon_theme(self) -> bool:
+        # Повторная установка пути поиска заставляет тему перечитать каталоги без gtk-update-icon-cache.
+        theme = Gtk.IconTheme.get_for_display(Gdk.Display.get_default())
+        theme.set_search_path(theme.get_search_path())
+        return False
 
     def _warmup_search_cache(self) -> bool:
-        from ui.global_search import build_all_search_items
-        if not self._search_items_building and self._search_items_cache is None:
+        from ui.global_search import build_search_index
+        if not self._search_items_building:
             self._search_items_building = True
             main_tabs = self._MAIN_TABS
             borg_tab = self._BORG_TAB
 
             def _build():
                 try:
-                    result = build_all_search_items(main_tabs, borg_tab)
+                    result = build_search_index(main_tabs, borg_tab)
                     GLib.idle_add(self._on_search_items_ready, result)
                 except Exception as e:
                     GLib.idle_add(self._on_search_items_build_failed, e)
@@ -1003,15 +998,16 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         self._setup.check_for_updates(manual=True, on_update_found=self._on_update_found_global)
 
     def _present_global_search(self, *_):
-        from ui.global_search import GlobalSearchPanel, build_all_search_items
+        from ui.global_search import GlobalSearchPanel, build_search_index, load_search_index
 
         if self._global_search_panel is None:
             self._global_search_panel = GlobalSearchPanel()
             self._content_host_overlay.add_overlay(self._global_search_panel)
             self._content_host_overlay.set_measure_overlay(self._global_search_panel, False)
 
-        items = self._search_items_cache or []
-        self._global_search_panel.open(items, self._on_global_search_pick)
+        if self._search_index is None:
+            self._search_index = load_search_index(self._MAIN_TABS, self._BORG_TAB)
+        self._global_search_panel.open(self._search_index, self._on_global_search_pick)
 
         stale = (time.time() - self._search_items_built_at) > 60.0
         if not self._search_items_building and stale:
@@ -1021,19 +1017,28 @@ class AltBoosterWindow(Adw.ApplicationWindow):
 
             def _build():
                 try:
-                    result = build_all_search_items(main_tabs, borg_tab)
+                    result = build_search_index(main_tabs, borg_tab)
                     GLib.idle_add(self._on_search_items_ready, result)
                 except Exception as e:
                     GLib.idle_add(self._on_search_items_build_failed, e)
 
             threading.Thread(target=_build, daemon=True).start()
 
-    def _on_search_items_ready(self, items: list) -> None:
-        self._search_items_cache = items
+    def _load_cached_search_index(self) -> None:
+        from ui.global_search import load_search_index
+        index = load_search_index(self._MAIN_TABS, self._BORG_TAB)
+        GLib.idle_add(self._on_cached_search_index_ready, index)
+
+    def _on_cached_search_index_ready(self, index) -> None:
+        if self._search_index is None:
+            self._search_index = index
+
+    def _on_search_items_ready(self, index) -> None:
+        self._search_index = index
         self._search_items_building = False
         self._search_items_built_at = time.time()
         if self._global_search_panel and self._global_search_panel.get_visible():
-            self._global_search_panel.update_items(items)
+            self._global_search_panel.update_items(index)
 
     def _on_search_items_build_failed(self, err: Exception) -> None:
         self._search_items_building = False
@@ -1057,6 +1062,10 @@ class AltBoosterWindow(Adw.ApplicationWindow):
             page = self._pages.get("apps")
             if page is not None and hasattr(page, "focus_app_by_id"):
                 page.focus_app_by_id(focus_spec[4:])
+        elif focus_spec.startswith("play:"):
+            page = self._pages.get("apps")
+            if page is not None and hasattr(page, "focus_epm_play"):
+                page.focus_epm_play(focus_spec[5:])
         elif focus_spec.startswith("ext:"):
             page = self._pages.get("extensions")
             if page is not None and hasattr(page, "focus_extension_by_uuid"):
@@ -1198,6 +1207,69 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         dialog.connect("response", _on_response)
         dialog.present(self)
 
+    def _export_stall_report(self, *_):
+        from core import watchdog
+        if not watchdog.is_active():
+            self.add_toast(Adw.Toast(title="Сторож главного цикла работает только с --debug"))
+            return
+        try:
+            path = watchdog.export_report()
+        except OSError as e:
+            self._log(f"✘  Не удалось сохранить статистику задержек: {e}\n")
+            return
+        self._log(f"ℹ  Статистика задержек главного цикла: {path}\n")
+        self.add_toast(Adw.Toast(title="Статистика задержек сохранена"))
+
+    def _finish_startup_spawn_phase(self) -> bool:
+        from core import spawn
+        self._log("ℹ  " + spawn.summary("startup"))
+        spawn.set_phase("session")
+        return False
+
+    def _show_spawn_report(self, *_):
+        from core import spawn
+        if not spawn.is_active():
+            self.add_toast(Adw.Toast(title="Учёт процессов работает только с --debug"))
+            return
+        for phase in ("startup", "session"):
+            self._log("ℹ  " + spawn.summary(phase))
+        try:
+            path = spawn.export_report()
+        except OSError as e:
+            self._log(f"✘  Не удалось сохранить отчёт о процессах: {e}\n")
+            return
+        self._log(f"ℹ  Отчёт о дочерних процессах: {path}\n")
+
+    def _register_memprofile_caches(self) -> None:
+        from core import memprofile
+        memprofile.register_cache(
+            "Буфер лога", lambda: (self._buf.get_line_count(), self._buf.get_char_count() * 4),
+        )
+        memprofile.register_cache(
+            "Индекс глобального поиска",
+            lambda: (len(self._search_index or ()), memprofile.approx_sizeof(self._search_index)),
+        )
+
+    def _toggle_memprofile(self, *_):
+        from core import memprofile
+        if not config.DEBUG:
+            self.add_toast(Adw.Toast(title="Профилирование памяти доступно только с --debug"))
+            return
+        if not memprofile.is_tracing():
+            memprofile.start()
+            self._log("ℹ  tracemalloc запущен; повторите Ctrl+Shift+M, чтобы сохранить отчёт\n")
+            for line in memprofile.cache_report():
+                self._log(f"   {line}\n")
+            return
+        try:
+            path = memprofile.stop_and_dump()
+        except OSError as e:
+            self._log(f"✘  Не удалось сохранить отчёт о памяти: {e}\n")
+            return
+        self._log(f"ℹ  Отчёт о памяти: {path}\n")
+        for line in memprofile.cache_report():
+            self._log(f"   {line}\n")
+
     def _open_log_file(self, *_):
         if not self._log_file.exists():
             self.add_toast(Adw.Toast(title="Файл логов еще не создан"))
@@ -1206,12 +1278,12 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         path = str(self._log_file)
         cmd = []
 
-        if shutil.which("gnome-text-editor"):
+        if pathindex.which("gnome-text-editor"):
             cmd = ["gnome-text-editor", path]
-        elif shutil.which("gedit"):
+        elif pathindex.which("gedit"):
             cmd = ["gedit", path]
-        elif shutil.which("nano"):
-            term = shutil.which("ptyxis") or shutil.which("gnome-terminal") or shutil.which("kgx")
+        elif pathindex.which("nano"):
+            term = pathindex.which("ptyxis") or pathindex.which("gnome-terminal") or pathindex.which("kgx")
             if term:
                 cmd = [term, "--", "nano", path]
 
@@ -1296,8 +1368,9 @@ class AltBoosterWindow(Adw.ApplicationWindow):
 
         return card
 
-    def start_progress(self, message: str, on_cancel=None):
+    def start_progress(self, message: str, on_cancel=None, progress_format: str = PROGRESS_LINES):
         _cb = on_cancel if on_cancel is not None else backend.cancel_current
+        parser = get_progress_parser(progress_format)
 
         def _do():
             if on_cancel is not None:
@@ -1306,7 +1379,9 @@ class AltBoosterWindow(Adw.ApplicationWindow):
                 self._progress_nesting += 1
             self._on_cancel_cb = _cb
             self._progress_message = message
+            self._progress_parser = parser
             self._op_card_pct = None
+            self._op_card_pending = None
             self._op_card_title.set_label(message)
             self._op_card_spinner.set_visible(True)
             self._op_card_spinner.set_spinning(True)
@@ -1354,6 +1429,7 @@ class AltBoosterWindow(Adw.ApplicationWindow):
             label = self._last_log_line or ("✔ Готово" if success else "✘ Ошибка")
             if self._progress_nesting == 0:
                 self._on_cancel_cb = None
+                self._op_card_pending = None
                 self._op_card_title.set_label(label)
                 self._op_card_spinner.set_spinning(False)
                 self._op_card_spinner.set_visible(False)
@@ -1380,7 +1456,7 @@ class AltBoosterWindow(Adw.ApplicationWindow):
         stripped = text.strip()
         if stripped:
             self._last_log_line = stripped
-            if self._op_card.get_visible() and self._progress_nesting > 0:
+            if self._progress_nesting > 0 and self._progress_parser is not None:
                 self._parse_progress_line(stripped)
 
         self._log_queue.put(text)
@@ -1404,60 +1480,25 @@ class AltBoosterWindow(Adw.ApplicationWindow):
             lbl.set_visible(bool(t))
             lbl.set_label(t if t else "")
 
-    @staticmethod
-    def _normalize_borg_progress_path(path: str) -> str:
-        p = (path or "").strip()
-        if not p or p == "-":
-            return ""
-        if p.startswith("/"):
-            return p
-        if p.startswith(("home/", "var/", "usr/", "mnt/", "media/", "run/")):
-            return "/" + p
-        return p
-
     def _parse_progress_line(self, line: str):
-        # borg create --progress: "2.88 GB O 1.70 GB C 1.60 GB D 14576 N path"
-        bm = _BORG_CREATE_PROGRESS_RE.match(line.strip())
-        if bm:
-            o_s, c_s, d_s, n_raw, path_raw = bm.groups()
-            try:
-                n_fmt = f"{int(n_raw):,}".replace(",", " ")
-            except ValueError:
-                n_fmt = n_raw
-            path = self._normalize_borg_progress_path(path_raw)
-            self._set_op_detail_lines(
-                f"Исходно {o_s}  ·  Сжато {c_s}  ·  В репозитории {d_s}",
-                f"Файлов обработано: {n_fmt}",
-                f"Сейчас: {path}" if path else "",
-            )
-            return
-        # rsync --info=progress2:  "  1,234,567  67%  45.20MB/s    0:01:23 ..."
-        m = re.search(r'(\d+)%\s+([\d.]+\s*[KMGTkm]?B/s)\s+(\d+:\d+:\d+)', line)
-        if m:
-            pct = int(m.group(1)) / 100.0
-            speed = m.group(2)
-            eta = m.group(3)
-            self._op_card_pct = pct
-            self._set_op_detail_lines(f"{int(pct * 100)}%  ·  {speed}  ·  осталось {eta}", "", "")
-            return
-        # borg create --progress: "2.34 GB O 1.23 GB C 456.78 MB D 78.9% N ..." (старые/другие сборки)
-        m2 = re.search(r'(\d+(?:\.\d+)?)\s*%', line)
-        if m2:
-            pct = float(m2.group(1)) / 100.0
-            self._op_card_pct = pct
-            eta_hint = ""
-            meta = re.search(
-                r"\b(?:ETA|осталось|remaining)\s*[:.]?\s*([^\n\r]{1,48})",
-                line,
-                re.IGNORECASE,
-            )
-            if meta:
-                eta_hint = f"  ·  осталось ~{meta.group(1).strip()}"
-            self._set_op_detail_lines(f"{int(pct * 100)}%{eta_hint}", "", "")
+        update = self._progress_parser(line)
+        if update is None:
             return
-        # btrfs send / generic: короткая строка — одна строка деталей
-        if line and len(line) < 80:
-            self._set_op_detail_lines(line, "", "")
+        self._op_card_pending = update
+        if not self._op_card_tick_id and self._op_card.get_visible():
+            self._op_card_tick_id = self._op_card.add_tick_callback(self._flush_op_card_progress)
+
+    def _flush_op_card_progress(self, _widget, _frame_clock) -> bool:
+        # Не чаще одного обновления карточки за кадр, сколько бы строк ни пришло.
+        self._op_card_tick_id = 0
+        update = self._op_card_pending
+        self._op_card_pending = None
+        if update is not None:
+            pct, l1, l2, l3 = update
+            if pct is not None:
+                self._op_card_pct = pct
+            self._set_op_detail_lines(l1, l2, l3)
+        return GLib.SOURCE_REMOVE
 
     def _log_writer_loop(self):
         self._setup_logging()